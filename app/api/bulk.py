@@ -0,0 +1,199 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.services.dedup import content_hash
+from app.services.executor import BoundedExecutor
+from app.services.vector_db import VectorDatabase
+from app.dependencies import app_state
+from app.models.schemas import CATEGORIES
+from app.utils.file_utils import extract_archive, save_image_bytes, read_upload_limited
+from app.utils.thumbnails import generate_derivatives
+from app.utils.logging import logger
+
+
+MAX_BULK_ITEMS = 500
+
+REQUIRED_FIELDS = {
+    'wardrobe': {'name': str, 'category': str},
+    'marketplace': {'name': str, 'category': str, 'price': int, 'store': str},
+}
+
+
+def parse_manifest(manifest: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse a bulk upload manifest into a filename -> metadata mapping
+
+    Accepts either a list of objects with a ``filename`` key or an object
+    keyed by filename.
+    """
+    try:
+        parsed = json.loads(manifest)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid manifest JSON: {e}")
+
+    if isinstance(parsed, dict):
+        return {filename: dict(meta) for filename, meta in parsed.items() if isinstance(meta, dict)}
+    if isinstance(parsed, list):
+        entries = {}
+        for entry in parsed:
+            if isinstance(entry, dict) and entry.get('filename'):
+                entries[entry['filename']] = {k: v for k, v in entry.items() if k != 'filename'}
+        return entries
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Manifest must be a list of objects with a 'filename' key or an object keyed by filename"
+    )
+
+
+async def bulk_upload(
+    vector_db: VectorDatabase,
+    cpu_executor: BoundedExecutor,
+    collection: Literal['wardrobe', 'marketplace'],
+    files: Optional[List[UploadFile]],
+    archive: Optional[UploadFile],
+    manifest: str,
+    owner_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Upload many items in one request, reporting success or failure per item.
+
+    Images come from multipart ``files`` and/or a zip/tar ``archive``; the
+    manifest supplies each file's metadata. Valid items are embedded and
+    tagged in batches and written with chunked multi-point upserts, owned by
+    ``owner_id`` when given.
+    """
+    metadata = parse_manifest(manifest)
+    images = await _collect_images(cpu_executor, files, archive)
+
+    if not images:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No image files provided")
+
+    results = []
+    accepted = []
+    for filename, data in images:
+        result = {"filename": filename, "id": None, "status": "failed"}
+        results.append(result)
+
+        meta = metadata.get(filename)
+        if meta is None:
+            result["error"] = "No manifest entry for file"
+            continue
+        payload, error = _validate_metadata(meta, collection)
+        if error:
+            result["error"] = error
+            continue
+        if owner_id is not None:
+            payload["owner_id"] = owner_id
+
+        result["id"] = str(uuid.uuid4())
+        accepted.append((result, data, payload))
+
+    missing = set(metadata) - {filename for filename, _ in images}
+    for filename in sorted(missing):
+        results.append({"filename": filename, "id": None, "status": "failed", "error": "File not provided"})
+
+    if accepted:
+        errors = await cpu_executor.run(_process_bulk, vector_db, collection, accepted)
+        for (result, _, payload), error in zip(accepted, errors):
+            if error is None:
+                result.update(payload)
+                result["status"] = "completed"
+            else:
+                result["error"] = error
+
+    succeeded = sum(1 for result in results if result["status"] == "completed")
+    logger.info(f"Bulk upload to {collection}: {succeeded}/{len(results)} items succeeded")
+
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "items": results
+    }
+
+
+async def _collect_images(
+    cpu_executor: BoundedExecutor,
+    files: Optional[List[UploadFile]],
+    archive: Optional[UploadFile]
+) -> List[Tuple[str, bytes]]:
+    # Count before reading, so an oversized request is rejected without buffering it
+    files = files or []
+    if len(files) > MAX_BULK_ITEMS or (archive is not None and len(files) == MAX_BULK_ITEMS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_ITEMS} items can be uploaded per request"
+        )
+
+    images = []
+    for upload in files:
+        images.append((upload.filename, await read_upload_limited(upload, app_state.max_upload_bytes)))
+
+    if archive is not None:
+        data = await read_upload_limited(archive, app_state.max_archive_bytes)
+        try:
+            # The archive gets whatever is left of the item budget
+            images.extend(await cpu_executor.run(
+                extract_archive, data, archive.filename, app_state.max_upload_bytes,
+                MAX_BULK_ITEMS - len(images), app_state.max_archive_uncompressed_bytes
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return images
+
+
+def _validate_metadata(meta: Dict[str, Any], collection: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    payload = {}
+    for field, field_type in REQUIRED_FIELDS[collection].items():
+        value = meta.get(field)
+        if value is None:
+            return payload, f"Missing required field '{field}'"
+        try:
+            payload[field] = field_type(value)
+        except (TypeError, ValueError):
+            return payload, f"Invalid value for '{field}': {value!r}"
+
+    if payload['category'] not in CATEGORIES:
+        return payload, f"Category must be one of {', '.join(CATEGORIES)}"
+    return payload, None
+
+
+def _process_bulk(
+    vector_db: VectorDatabase,
+    collection: str,
+    accepted: List[Tuple[Dict[str, Any], bytes, Dict[str, Any]]]
+) -> List[Optional[str]]:
+    for result, data, _ in accepted:
+        result["image_path"] = save_image_bytes(data, result["id"], collection, result["filename"])
+
+    errors = vector_db.upload_batch(
+        images=[data for _, data, _ in accepted],
+        payloads=[payload for _, _, payload in accepted],
+        point_ids=[result["id"] for result, _, _ in accepted]
+    )
+
+    # Only stored items keep their original and get thumbnails
+    thumbnails = {}
+    for (result, data, payload), error in zip(accepted, errors):
+        if error is not None:
+            os.remove(result.pop("image_path"))
+            continue
+        try:
+            payload["thumbnails"] = thumbnails[result["id"]] = generate_derivatives(
+                data, content_hash(data), collection, app_state.thumbnail_widths, app_state.thumbnail_format
+            )
+        except Exception as e:
+            # The lazy endpoint covers missing thumbnails
+            logger.warning(f"Could not generate thumbnails for {result['filename']}: {e}")
+
+    try:
+        vector_db.update_payloads({point_id: {"thumbnails": urls} for point_id, urls in thumbnails.items()})
+    except Exception as e:
+        logger.warning(f"Could not store thumbnail URLs for bulk upload to {collection}: {e}")
+    return errors
@@ -0,0 +1,138 @@
+import glob
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+from app.dependencies import app_state
+from app.services.dedup import content_hash
+from app.services.executor import BoundedExecutor
+from app.services.vector_db import VectorDatabase
+from app.utils.thumbnails import generate_derivatives, pick_thumbnail
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated field projection, None meaning the default fields"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+async def list_collection(
+    vector_db: VectorDatabase,
+    io_executor: BoundedExecutor,
+    collection: str,
+    page_size: int,
+    cursor: Optional[str],
+    fields: Optional[str],
+    stream: bool,
+    owner_id: Optional[str] = None
+):
+    """
+    List a collection either as one cursor-paginated page or as an NDJSON stream.
+
+    The page response keeps the ``items`` key and adds ``next_cursor``; pass it
+    back as ``cursor`` to fetch the next page. Streaming scrolls the whole
+    collection page by page, so memory stays constant regardless of its size.
+    Items stored before thumbnails existed point ``thumbnail_url`` at the lazy
+    thumbnail endpoint. With ``owner_id``, only that owner's items are listed.
+    """
+    if page_size < 1 or page_size > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"page_size must be between 1 and {MAX_PAGE_SIZE}"
+        )
+    projection = parse_fields(fields)
+
+    if stream:
+        return StreamingResponse(
+            _ndjson_items(vector_db, io_executor, collection, page_size, cursor, projection, owner_id),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        items, next_cursor = await io_executor.run(vector_db.retrieve_page, page_size, cursor, projection, owner_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    for item in items:
+        _fill_thumbnail_url(item, collection)
+
+    return {
+        "items": items,
+        "next_cursor": next_cursor
+    }
+
+
+async def _ndjson_items(
+    vector_db: VectorDatabase,
+    io_executor: BoundedExecutor,
+    collection: str,
+    page_size: int,
+    cursor: Optional[str],
+    fields: Optional[List[str]],
+    owner_id: Optional[str]
+) -> AsyncIterator[str]:
+    while True:
+        items, cursor = await io_executor.run(vector_db.retrieve_page, page_size, cursor, fields, owner_id)
+        for item in items:
+            _fill_thumbnail_url(item, collection)
+            yield json.dumps(item) + "\n"
+        if cursor is None:
+            break
+
+
+def _fill_thumbnail_url(item: Dict[str, Any], collection: str):
+    if "thumbnail_url" in item and item["thumbnail_url"] is None:
+        item["thumbnail_url"] = f"/api/{collection}/thumbnail/{item['id']}"
+
+
+async def thumbnail_redirect(
+    vector_db: VectorDatabase,
+    io_executor: BoundedExecutor,
+    cpu_executor: BoundedExecutor,
+    collection: str,
+    item_id: str,
+    width: Optional[int],
+    owner_id: Optional[str] = None
+) -> RedirectResponse:
+    """
+    Redirect to an item's derivative, generating it on first request.
+
+    Items uploaded before derivatives existed have none in their payload; the
+    original is read from disk, resized, and the URLs are stored on the point
+    so later listings link to them directly. With ``owner_id``, another
+    owner's item is reported as missing.
+    """
+    point = await io_executor.run(vector_db.get_items_by_id, item_id, owner_id)
+    if point is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+    url = pick_thumbnail(point.payload.get("thumbnails"), width)
+    if url is None:
+        data = await io_executor.run(_read_original, collection, item_id)
+        if data is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Original image not found")
+
+        thumbnails = await cpu_executor.run(_generate_derivatives, data, collection)
+        await io_executor.run(vector_db.update_payload, item_id, {"thumbnails": thumbnails})
+        url = pick_thumbnail(thumbnails, width)
+
+    return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+
+def _read_original(collection: str, item_id: str) -> Optional[bytes]:
+    originals = glob.glob(os.path.join("app", "static", "images-qdrant", collection, f"{item_id}.*"))
+    if not originals:
+        return None
+    with open(originals[0], "rb") as f:
+        return f.read()
+
+
+def _generate_derivatives(data: bytes, collection: str) -> Dict[str, str]:
+    return generate_derivatives(data, content_hash(data), collection, app_state.thumbnail_widths, app_state.thumbnail_format)
@@ -1,49 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Header, UploadFile, File
 import traceback
+from typing import Optional, List
 
 from app.services.vector_db import VectorDatabase
-from app.dependencies import get_marketplace_db
+from app.dependencies import (
+    require_model, get_marketplace_db, get_marketplace_async_db, get_wardrobe_async_db, get_cpu_executor, get_io_executor,
+    get_owner_id, get_job_queue
+)
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.services.database import JobQueue
+from app.services.complete_the_look import complementary_category
+from app.services.executor import BoundedExecutor
 from app.models.schemas import MarketplaceItem, ClothingItem
-from app.utils.file_utils import save_upload_file
 from app.utils.logging import logger
-
-
-import uuid
+from app.api.listing import list_collection, thumbnail_redirect
+from app.api.bulk import bulk_upload
+from app.api.uploads import enqueue_upload, upload_status
 
 router = APIRouter()
 
-@router.post('/upload-item')
+@router.post('/upload-item', status_code=status.HTTP_202_ACCEPTED)
 async def upload_marketplace_item(
     name: str = Form(...),
     category: str = Form(...),
     price: int = Form(...),
     store: str = Form(...),
     file: UploadFile = File(...),
-    vector_db: VectorDatabase = Depends(get_marketplace_db)
+    reuse_existing: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None),
+    job_queue: JobQueue = Depends(get_job_queue),
+    io_executor: BoundedExecutor = Depends(get_io_executor)
 ):
+    """
+    Store the image and queue it for embedding, tagging and indexing.
+
+    Works like `/wardrobe/upload-clothing`: returns `202` with a job id as
+    soon as the job is recorded; poll `/upload-status/{id}` for the outcome.
+    """
     try:
         logger.info("Received marketplace item image")
-        # Generate a unique ID
-        item_id = str(uuid.uuid4())
-        
-        # Save the file first
-        image_path = await save_upload_file(file, item_id, 'marketplace')
-        
-        # Process directly
-        with open(image_path, "rb") as f:
-            point_id = vector_db.upload_marketplace_clothing(f, name, category, item_id, price, store)
-        
-        return {
-            "id": item_id,
-            "status": "completed",
-            "name": name,
-            "category": category,
-            "price": price,
-            "store": store,
-            "image_path": image_path,
-            "vector_id": point_id,
-            "message": "Marketplace item uploaded successfully."
-        }
+        return await enqueue_upload(
+            job_queue, io_executor, 'marketplace', file,
+            {"name": name, "category": category, "price": price, "store": store},
+            reuse_existing, idempotency_key
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         error_details = traceback.format_exc()
         logger.error(f"Error in upload_marketplace_item: {str(e)}\n{error_details}")
@@ -53,15 +55,61 @@ async def upload_marketplace_item(
             detail=f"An error occurred: {str(e)}"
         )
 
+@router.get('/upload-status/{task_id}')
+async def get_upload_status(
+    task_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    io_executor: BoundedExecutor = Depends(get_io_executor)
+):
+    """Status of a queued upload: queued, processing, completed, duplicate or failed"""
+    return await upload_status(job_queue, io_executor, 'marketplace', task_id)
+
+@router.post('/upload-items-bulk', dependencies=[Depends(require_model)])
+async def upload_marketplace_items_bulk(
+    manifest: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    vector_db: VectorDatabase = Depends(get_marketplace_db),
+    cpu_executor: BoundedExecutor = Depends(get_cpu_executor)
+):
+    """
+    Upload many marketplace items in one request.
+
+    Send images as repeated `files` parts and/or one zip/tar `archive`, plus a
+    JSON `manifest` giving `name`, `category`, `price` and `store` for each filename.
+    Each item is reported as completed or failed without failing the batch.
+    """
+    try:
+        return await bulk_upload(vector_db, cpu_executor, 'marketplace', files, archive, manifest)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_details = traceback.format_exc()
+        logger.error(f"Error in upload_marketplace_items_bulk: {str(e)}\n{error_details}")
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
 @router.get('/marketplace')
 async def get_marketplace(
     vector_db: VectorDatabase = Depends(get_marketplace_db),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False,
 ):
+    """
+    List items one page at a time. Pass `next_cursor` back as `cursor` for the
+    next page, `fields` (comma-separated) to project payload fields, or
+    `stream=true` to receive the whole collection as NDJSON.
+    """
     try:
-        marketplace_items = vector_db.retrieve_collection()
-        return {
-            "items": marketplace_items
-        }
+        return await list_collection(vector_db, io_executor, 'marketplace', page_size, cursor, fields, stream)
+    except HTTPException:
+        raise
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"Error in upload_clothing: {str(e)}\n {error_details}")
@@ -71,13 +119,35 @@ async def get_marketplace(
             detail=f"An error occurred: {str(e)}"
         )
     
+@router.get('/thumbnail/{item_id}')
+async def get_thumbnail(
+    item_id: str,
+    width: Optional[int] = None,
+    vector_db: VectorDatabase = Depends(get_marketplace_db),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    cpu_executor: BoundedExecutor = Depends(get_cpu_executor)
+):
+    """Redirect to the item's smallest derivative at least `width` wide"""
+    try:
+        return await thumbnail_redirect(vector_db, io_executor, cpu_executor, 'marketplace', item_id, width)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_details = traceback.format_exc()
+        logger.error(f"Error in get_thumbnail: {str(e)}\n{error_details}")
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
 @router.get('/get-item/{item_id}', response_model=MarketplaceItem)
 async def get_item(
     item_id: str,
-    vector_db: VectorDatabase = Depends(get_marketplace_db)
+    vector_db: AsyncVectorDatabase = Depends(get_marketplace_async_db)
 ):
     try:
-        item = vector_db.get_items_by_id(item_id)
+        item = await vector_db.get_items_by_id(item_id)
         
         if not item:
             raise HTTPException(
@@ -111,10 +181,19 @@ async def get_item(
 @router.get('/get-matching-clothing/{item_id}')
 async def get_matching_item(
     item_id: str,
-    vector_db: VectorDatabase = Depends(get_marketplace_db)
+    limit: int = 3,
+    vector_db: AsyncVectorDatabase = Depends(get_marketplace_async_db),
+    wardrobe_db: AsyncVectorDatabase = Depends(get_wardrobe_async_db),
+    owner_id: Optional[str] = Depends(get_owner_id)
 ):
+    """
+    Find wardrobe items that go with a marketplace item.
+
+    See `/outfit/complete-the-look/{item_id}` to search the wardrobe and the
+    marketplace together.
+    """
     try:
-        item = vector_db.get_items_by_id(item_id)
+        item = await vector_db.get_items_by_id(item_id)
 
         if not item:
             raise HTTPException(
@@ -123,16 +202,13 @@ async def get_matching_item(
             )
         
         current_category = item.payload.get("category", "").lower()
-        target_category = None
-
-        if current_category == "top":
-            target_category = "bottom"
-        elif current_category == "bottom":
-            target_category = "top"
+        target_category = complementary_category(current_category)
+        if target_category is None:
+            return {'items': []}
 
         logger.info(f"Finding matching {target_category} items for {current_category} item {item_id}")
 
-        matching_items = vector_db.get_items_by_category(target_category, item.vector, limit=3, collection_name='clothes')
+        matching_items = await wardrobe_db.get_items_by_category(target_category, item.vector, limit=limit, owner_id=owner_id)
 
         result = []
         for match_item in matching_items:
@@ -157,5 +233,3 @@ async def get_matching_item(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
         )
-
-
@@ -1,29 +1,76 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
 
 
-from app.services.outfit_generation import generate_outfit
-from app.services.vector_db import VectorDatabase
-from app.dependencies import get_wardrobe_db
-from app.models.schemas import OutfitRequest, OutfitResponse
+from app.services.outfit_generation import (
+    generate_outfit_async, generate_outfits_batch_async, MAX_CANDIDATE_POOL, MAX_OUTFIT_LIMIT
+)
+from app.services.outfit_search import MAX_BEAM_WIDTH
+from app.services.complete_the_look import complete_the_look, DEFAULT_SOURCE_LIMIT, MAX_SOURCE_LIMIT
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.dependencies import require_model, get_wardrobe_async_db, get_marketplace_async_db, get_owner_id
+from app.models.schemas import (
+    OutfitRequest, OutfitResponse, BatchOutfitRequest, BatchOutfitResponse, CompleteTheLookResponse, ClothingItem, MatchedItem
+)
 
 router = APIRouter()
 
+MAX_BATCH_QUERIES = 32
 
-@router.post('/generate-outfit', response_model=OutfitResponse)
-def outfit_generate(request: OutfitRequest, vector_db: VectorDatabase = Depends(get_wardrobe_db)):
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _validate_outfit_request(request):
+    if request.limit is None or not 1 <= request.limit <= MAX_OUTFIT_LIMIT:
+        raise _bad_request(f"limit must be between 1 and {MAX_OUTFIT_LIMIT}")
+    if request.candidate_pool is not None and not 1 <= request.candidate_pool <= MAX_CANDIDATE_POOL:
+        raise _bad_request(f"candidate_pool must be between 1 and {MAX_CANDIDATE_POOL}")
+    for category, pool in (request.category_limits or {}).items():
+        if not 1 <= pool <= MAX_CANDIDATE_POOL:
+            raise _bad_request(f"category_limits[{category}] must be between 1 and {MAX_CANDIDATE_POOL}")
+    if request.beam_width is not None and not 1 <= request.beam_width <= MAX_BEAM_WIDTH:
+        raise _bad_request(f"beam_width must be between 1 and {MAX_BEAM_WIDTH}")
+    if request.diversity is not None and not 0 <= request.diversity <= 1:
+        raise _bad_request("diversity must be between 0 and 1")
+    if request.max_item_reuse is not None and request.max_item_reuse < 1:
+        raise _bad_request("max_item_reuse must be at least 1")
+
+
+@router.post('/generate-outfit', response_model=OutfitResponse, dependencies=[Depends(require_model)])
+async def outfit_generate(
+    request: OutfitRequest,
+    vector_db: AsyncVectorDatabase = Depends(get_wardrobe_async_db),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
     """
     Generate outfit recommendations based on a text query.
     
     The query can describe a style, occasion, color preference, etc.
-    Returns a list of top outfits, each containing a top and bottom item.
+    Returns a list of top outfits with one item per category in `categories`
+    (default top and bottom), keyed by category under `items`.
+    `candidate_pool` sets how many items per category are scored against each
+    other (`category_limits` overrides it per category), and `beam_width` how
+    many partial outfits are kept as categories are added.
+    Only the wardrobe of the `X-Owner-Id` owner is searched when the header is set.
+    Outfits are in score order unless re-ranking for variety is requested:
+    `diversity` (0-1, default 0) trades score for novelty and `max_item_reuse`
+    caps how many outfits share an item.
     """
+    _validate_outfit_request(request)
     try:
-        outfits = generate_outfit(
+        outfits = await generate_outfit_async(
             query=request.query, 
             vector_db=vector_db, 
-            limit=request.limit
+            limit=request.limit,
+            candidate_pool=request.candidate_pool,
+            owner_id=owner_id,
+            categories=request.categories,
+            category_limits=request.category_limits,
+            beam_width=request.beam_width,
+            diversity=request.diversity,
+            max_item_reuse=request.max_item_reuse
         )
         
         if not outfits:
@@ -35,8 +82,131 @@ def outfit_generate(request: OutfitRequest, vector_db: VectorDatabase = Depends(
         # return outfits
         return {"outfits": outfits}
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate outfits: {str(e)}"
+        )
+
+
+
+@router.post('/generate-outfits', response_model=BatchOutfitResponse, dependencies=[Depends(require_model)])
+async def outfit_generate_batch(
+    request: BatchOutfitRequest,
+    vector_db: AsyncVectorDatabase = Depends(get_wardrobe_async_db),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
+    """
+    Generate outfit recommendations for several queries in one call.
+
+    The queries are embedded together and every category search runs in a
+    single batch request. Results are keyed by query; a query with no
+    suitable outfits maps to an empty list.
+    """
+    _validate_outfit_request(request)
+    if not request.queries or len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_BATCH_QUERIES} queries are allowed per request"
+        )
+
+    try:
+        results = await generate_outfits_batch_async(
+            queries=request.queries,
+            vector_db=vector_db,
+            limit=request.limit,
+            candidate_pool=request.candidate_pool,
+            owner_id=owner_id,
+            categories=request.categories,
+            category_limits=request.category_limits,
+            beam_width=request.beam_width,
+            diversity=request.diversity,
+            max_item_reuse=request.max_item_reuse
+        )
+        return {"results": results}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate outfits: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get('/complete-the-look/{item_id}', response_model=CompleteTheLookResponse)
+async def complete_the_look_route(
+    item_id: str,
+    wardrobe_limit: int = DEFAULT_SOURCE_LIMIT,
+    marketplace_limit: int = DEFAULT_SOURCE_LIMIT,
+    limit: Optional[int] = None,
+    wardrobe_db: AsyncVectorDatabase = Depends(get_wardrobe_async_db),
+    marketplace_db: AsyncVectorDatabase = Depends(get_marketplace_async_db),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
+    """
+    Find items that go with a wardrobe or marketplace item.
+
+    The complementary category is searched in the owner's wardrobe and in the
+    marketplace at the same time, and both result sets are returned as one
+    ranking. `wardrobe_limit` and `marketplace_limit` cap each source (0 skips
+    it) and `limit` caps the merged list.
+    """
+    for name, value in (("wardrobe_limit", wardrobe_limit), ("marketplace_limit", marketplace_limit)):
+        if value < 0 or value > MAX_SOURCE_LIMIT:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{name} must be between 0 and {MAX_SOURCE_LIMIT}"
+            )
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be at least 1")
+
+    try:
+        result = await complete_the_look(
+            wardrobe_db, marketplace_db, item_id,
+            wardrobe_limit=wardrobe_limit,
+            marketplace_limit=marketplace_limit,
+            limit=limit,
+            owner_id=owner_id
+        )
+
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Item with ID {item_id} not found"
+            )
+
+        item = result["item"]
+        return {
+            "source": result["source"],
+            "item": ClothingItem(
+                id=item.id,
+                name=item.payload.get("name", "Unnamed Item"),
+                category=item.payload.get("category"),
+                tags=item.payload.get("tags", [])
+            ),
+            "target_category": result["target_category"],
+            "items": [
+                MatchedItem(
+                    id=point.id,
+                    name=point.payload.get("name", "Unnamed Item"),
+                    category=point.payload.get("category"),
+                    tags=point.payload.get("tags", []),
+                    score=point.score,
+                    source=source,
+                    store=point.payload.get("store"),
+                    price=point.payload.get("price")
+                )
+                for source, point in result["matches"]
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to complete the look: {str(e)}"
+        )
@@ -0,0 +1,102 @@
+import os
+import uuid
+from typing import Any, Dict, Literal, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.dependencies import app_state
+from app.models.schemas import CATEGORIES
+from app.services.database import JobQueue, Job
+from app.services.executor import BoundedExecutor
+from app.utils.file_utils import stream_upload_file
+
+
+async def enqueue_upload(
+    job_queue: JobQueue,
+    io_executor: BoundedExecutor,
+    collection: Literal['wardrobe', 'marketplace'],
+    file: UploadFile,
+    fields: Dict[str, Any],
+    reuse_existing: bool = False,
+    idempotency_key: Optional[str] = None,
+    owner_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Store an uploaded image and queue it for embedding, tagging and indexing.
+
+    ``fields`` become the item's payload once the job completes. The job id
+    is also the item's id. A repeated ``idempotency_key`` (scoped to the
+    collection and owner) returns the job it first created.
+    """
+    if fields.get("category") not in CATEGORIES:
+        # Reject now rather than letting the job fail after every retry
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Category must be one of {', '.join(CATEGORIES)}"
+        )
+
+    key = f"{collection}:{owner_id or ''}:{idempotency_key}" if idempotency_key else None
+    if key is not None:
+        existing = await io_executor.run(job_queue.find_by_idempotency_key, key)
+        if existing is not None:
+            return job_response(existing)
+
+    # Generate a unique ID, used for both the job and the point
+    item_id = str(uuid.uuid4())
+
+    # Stream to disk while hashing; the worker reads the image back from there
+    upload = await stream_upload_file(file, item_id, collection, max_bytes=app_state.max_upload_bytes)
+
+    payload = {
+        **fields,
+        "image_path": upload.path,
+        "content_hash": upload.content_hash,
+        "reuse_existing": reuse_existing,
+    }
+    if owner_id is not None:
+        payload["owner_id"] = owner_id
+
+    try:
+        job, created = await io_executor.run(job_queue.enqueue, collection, payload, item_id, key)
+    except BaseException:
+        # No job will ever read the stored image
+        os.remove(upload.path)
+        raise
+    if not created:
+        # A concurrent request with the same key won the race
+        os.remove(upload.path)
+    return job_response(job)
+
+
+async def upload_status(
+    job_queue: JobQueue,
+    io_executor: BoundedExecutor,
+    collection: str,
+    task_id: str,
+    owner_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Status of a queued upload to ``collection``; another owner's job is reported as missing"""
+    job = await io_executor.run(job_queue.get, task_id)
+    if (job is None or job.collection != collection
+            or (owner_id is not None and job.payload.get("owner_id") != owner_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload task not found"
+        )
+    return job_response(job)
+
+
+def job_response(job: Job) -> Dict[str, Any]:
+    response = {
+        "id": job.id,
+        "status": job.status,
+        "name": job.payload.get("name"),
+        "category": job.payload.get("category"),
+        "attempts": job.attempts,
+        "status_url": f"/api/{job.collection}/upload-status/{job.id}",
+    }
+    if job.result:
+        response.update(job.result)
+    if job.error:
+        response["error"] = job.error
+    return response
@@ -1,47 +1,46 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, status, Depends, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Header, status, Depends
 
-import uuid
 import traceback
+from typing import Optional, List
 
 from app.models.schemas import ClothingItem
-from app.dependencies import get_wardrobe_db
+from app.dependencies import require_model, get_wardrobe_db, get_cpu_executor, get_io_executor, get_owner_id, get_job_queue
 from app.services.vector_db import VectorDatabase
-from app.utils.file_utils import save_upload_file
+from app.services.database import JobQueue
+from app.services.executor import BoundedExecutor
 from app.utils.logging import logger
+from app.api.listing import list_collection, thumbnail_redirect
+from app.api.bulk import bulk_upload
+from app.api.uploads import enqueue_upload, upload_status
 
 router = APIRouter()
 
-# Storage for tracking upload status
-upload_tasks = {}
-
-@router.post('/upload-clothing')
+@router.post('/upload-clothing', status_code=status.HTTP_202_ACCEPTED)
 async def upload_clothing(
     name: str = Form(...),
     category: str = Form(...),
     file: UploadFile = File(...),
-    vector_db: VectorDatabase = Depends(get_wardrobe_db)
+    reuse_existing: bool = Form(False),
+    idempotency_key: Optional[str] = Header(None),
+    job_queue: JobQueue = Depends(get_job_queue),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    owner_id: Optional[str] = Depends(get_owner_id)
 ):
+    """
+    Store the image and queue it for embedding, tagging and indexing.
+
+    Returns as soon as the job is recorded; poll `/upload-status/{id}` for the
+    outcome. The job id is also the item's id once it completes. Resending a
+    request with the same `Idempotency-Key` header returns the original job.
+    """
     try:
         logger.info("Received Image")
-        # Generate a unique ID
-        item_id = str(uuid.uuid4())
-        
-        # Save the file first
-        image_path = await save_upload_file(file, item_id, 'wardrobe')
-        
-        # Process directly instead of using background tasks
-        with open(image_path, "rb") as f:
-            point_id = vector_db.upload_clothing(f, name, category, item_id)
-        
-        return {
-            "id": item_id,
-            "status": "completed",
-            "name": name,
-            "category": category,
-            "image_path": image_path,
-            "vector_id": point_id,
-            "message": "Upload completed successfully."
-        }
+        return await enqueue_upload(
+            job_queue, io_executor, 'wardrobe', file, {"name": name, "category": category},
+            reuse_existing, idempotency_key, owner_id
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         error_details = traceback.format_exc()
         logger.error(f"Error in upload_clothing: {str(e)}\n{error_details}")
@@ -51,15 +50,54 @@ async def upload_clothing(
             detail=f"An error occurred: {str(e)}"
         )
 
+@router.post('/upload-clothing-bulk', dependencies=[Depends(require_model)])
+async def upload_clothing_bulk(
+    manifest: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    vector_db: VectorDatabase = Depends(get_wardrobe_db),
+    cpu_executor: BoundedExecutor = Depends(get_cpu_executor),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
+    """
+    Upload many wardrobe items in one request.
+
+    Send images as repeated `files` parts and/or one zip/tar `archive`, plus a
+    JSON `manifest` giving `name` and `category` for each filename.
+    Each item is reported as completed or failed without failing the batch.
+    """
+    try:
+        return await bulk_upload(vector_db, cpu_executor, 'wardrobe', files, archive, manifest, owner_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_details = traceback.format_exc()
+        logger.error(f"Error in upload_clothing_bulk: {str(e)}\n{error_details}")
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
 @router.get('/wardrobe')
 async def get_wardrobe(
     vector_db: VectorDatabase = Depends(get_wardrobe_db),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    stream: bool = False,
+    owner_id: Optional[str] = Depends(get_owner_id),
 ):
+    """
+    List items one page at a time. Pass `next_cursor` back as `cursor` for the
+    next page, `fields` (comma-separated) to project payload fields, or
+    `stream=true` to receive the whole collection as NDJSON.
+    """
     try:
-        wardrobe_items = vector_db.retrieve_collection()
-        return {
-            "items": wardrobe_items
-        }
+        return await list_collection(vector_db, io_executor, 'wardrobe', page_size, cursor, fields, stream, owner_id)
+    except HTTPException:
+        raise
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"Error in upload_clothing: {str(e)}\n{error_details}")
@@ -69,78 +107,62 @@ async def get_wardrobe(
             detail=f"An error occurred: {str(e)}"
         )
 
-# @router.post('/upload-clothing')
-# async def upload_clothing(
-#     background_tasks: BackgroundTasks,
-#     name: str = Form(...),
-#     category: str = Form(...),
-#     file: UploadFile = File(...),
-#     vector_db: VectorDatabase = Depends(get_wardrobe_db)
-# ):
-#     try:
-#         logger.info("Receive Image")
-#         # Generate a unique ID for tracking
-#         task_id = str(uuid.uuid4())
-        
-#         # Save the file first (this is usually quick)
-#         image_path = await save_upload_file(file, task_id)
-        
-#         # Initialize task status
-#         upload_tasks[task_id] = {
-#             "status": "processing",
-#             "name": name,
-#             "category": category,
-#             "image_path": image_path
-#         }
-        
-#         # Define the background task inline with a lambda function
-#         # This directly calls vector_db.upload_clothing and handles the status updates
-#         background_tasks.add_task(
-#             lambda: update_vector_db(task_id, image_path, name, category, vector_db)
-#         )
-        
-#         # Return immediately with the tracking ID
-#         return {
-#             "id": task_id,
-#             "status": "processing",
-#             "name": name,
-#             "category": category,
-#             "image_path": image_path,
-#             "message": "Upload started. Check status endpoint for completion."
-#         }
-#     except Exception as e:
-#         error_details = traceback.format_exc()
-#         print(f"Error in upload_clothing: {str(e)}\n{error_details}")
-        
-#         raise HTTPException(
-#             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-#             detail=f"An error occurred: {str(e)}"
-#         )
+@router.get('/thumbnail/{item_id}')
+async def get_thumbnail(
+    item_id: str,
+    width: Optional[int] = None,
+    vector_db: VectorDatabase = Depends(get_wardrobe_db),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    cpu_executor: BoundedExecutor = Depends(get_cpu_executor),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
+    """Redirect to the item's smallest derivative at least `width` wide"""
+    try:
+        return await thumbnail_redirect(vector_db, io_executor, cpu_executor, 'wardrobe', item_id, width, owner_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_details = traceback.format_exc()
+        logger.error(f"Error in get_thumbnail: {str(e)}\n{error_details}")
 
-@router.get('/upload-status/{task_id}')
-async def get_upload_status(task_id: str):
-    if task_id not in upload_tasks:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Upload task not found"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
         )
-    
-    return upload_tasks[task_id]
+
+@router.get('/upload-status/{task_id}')
+async def get_upload_status(
+    task_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    owner_id: Optional[str] = Depends(get_owner_id)
+):
+    """Status of a queued upload: queued, processing, completed, duplicate or failed"""
+    return await upload_status(job_queue, io_executor, 'wardrobe', task_id, owner_id)
 
 @router.delete('/delete-clothing/{clothing_id}')
 async def delete_clothing(
     clothing_id: str,
-    vector_db: VectorDatabase = Depends(get_wardrobe_db)
+    vector_db: VectorDatabase = Depends(get_wardrobe_db),
+    io_executor: BoundedExecutor = Depends(get_io_executor),
+    owner_id: Optional[str] = Depends(get_owner_id)
 ):
     try:
         # Call the delete_clothing method from VectorDatabase
-        vector_db.delete_clothing(clothing_id)
-        
+        deleted = await io_executor.run(vector_db.delete_clothing, clothing_id, owner_id)
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Item with ID {clothing_id} not found"
+            )
+
         return {
             "success": True,
             "id": clothing_id,
             "message": "Clothing item deleted"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         error_details = traceback.format_exc()
         logger.error(f"Error deleting clothing: {str(e)}\n{error_details}")
@@ -149,27 +171,3 @@ async def delete_clothing(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
         )
-
-
-
-
-
-# Helper function for the background task
-def update_vector_db(task_id: str, file_path: str, name: str, category: str, vector_db: VectorDatabase):
-    try:
-        logger.info('Starting Vector DB Upsert')
-        # Open the file from the saved path
-        with open(file_path, "rb") as f:
-            # Process the vector DB operation - this is where the time-consuming work happens
-            point_id = vector_db.upload_clothing(f, name, category, task_id)
-        
-        # Update status to completed
-        upload_tasks[task_id]["status"] = "completed"
-        upload_tasks[task_id]["vector_id"] = point_id
-    except Exception as e:
-        # Update status to failed
-        upload_tasks[task_id]["status"] = "failed"
-        upload_tasks[task_id]["error"] = str(e)
-        print(f"Background task error: {str(e)}")
-
-
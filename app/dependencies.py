@@ -1,4 +1,6 @@
-from fastapi import HTTPException
+from typing import Optional
+
+from fastapi import HTTPException, Header
 
 # App state to be initialized in main.py
 class AppState:
@@ -7,6 +9,28 @@ class AppState:
         self.processor = None
         self.vector_db_marketplace = None
         self.vector_db_wardrobe = None
+        self.inference_engine = None
+        self.text_cache = None
+        self.embedding_store = None
+        self.tag_classifier = None
+        self.qdrant_client = None
+        self.async_qdrant_client = None
+        self.async_vector_db_marketplace = None
+        self.async_vector_db_wardrobe = None
+        self.cpu_executor = None
+        self.io_executor = None
+        self.point_caches = {}
+        self.job_queue = None
+        self.ingestion_pool = None
+        self.max_upload_bytes = 20 * 1024 * 1024
+        self.max_archive_bytes = 500 * 1024 * 1024
+        self.max_archive_uncompressed_bytes = 1024 * 1024 * 1024
+        self.thumbnail_widths = (256, 512, 1024)
+        self.thumbnail_format = "webp"
+        self.require_owner_id = False
+        self.model_ready = False
+        self.model_error = None
+        self.background_tasks = []
 
 # Global app state
 app_state = AppState()
@@ -22,6 +46,18 @@ def get_processor():
         raise HTTPException(status_code=500, detail="Processor not loaded")
     return app_state.processor
 
+def require_model():
+    if app_state.model_error is not None:
+        raise HTTPException(status_code=503, detail=f"Model failed to load: {app_state.model_error}")
+    if not app_state.model_ready:
+        raise HTTPException(status_code=503, detail="Model is still loading", headers={"Retry-After": "5"})
+
+def get_owner_id(x_owner_id: Optional[str] = Header(None)) -> Optional[str]:
+    """The owner wardrobe requests are scoped to, from the X-Owner-Id header"""
+    if not x_owner_id and app_state.require_owner_id:
+        raise HTTPException(status_code=401, detail="X-Owner-Id header is required")
+    return x_owner_id or None
+
 def get_marketplace_db():
     if app_state.vector_db_marketplace is None:
         raise HTTPException(status_code=500, detail="Marketplace DB not initialized")
@@ -30,4 +66,29 @@ def get_marketplace_db():
 def get_wardrobe_db():
     if app_state.vector_db_wardrobe is None:
         raise HTTPException(status_code=500, detail="Wardrobe DB not initialized")
-    return app_state.vector_db_wardrobe
\ No newline at end of file
+    return app_state.vector_db_wardrobe
+
+def get_marketplace_async_db():
+    if app_state.async_vector_db_marketplace is None:
+        raise HTTPException(status_code=500, detail="Marketplace DB not initialized")
+    return app_state.async_vector_db_marketplace
+
+def get_wardrobe_async_db():
+    if app_state.async_vector_db_wardrobe is None:
+        raise HTTPException(status_code=500, detail="Wardrobe DB not initialized")
+    return app_state.async_vector_db_wardrobe
+
+def get_job_queue():
+    if app_state.job_queue is None:
+        raise HTTPException(status_code=500, detail="Job queue not initialized")
+    return app_state.job_queue
+
+def get_cpu_executor():
+    if app_state.cpu_executor is None:
+        raise HTTPException(status_code=500, detail="CPU executor not initialized")
+    return app_state.cpu_executor
+
+def get_io_executor():
+    if app_state.io_executor is None:
+        raise HTTPException(status_code=500, detail="IO executor not initialized")
+    return app_state.io_executor
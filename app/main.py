@@ -1,14 +1,30 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware 
 
 from app.api.routes import router
-from app.services.vector_db import VectorDatabase
-from app.utils.model_loader import load_model
+from app.services.vector_db import VectorDatabase, provision_collection
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.services.qdrant_pool import QdrantSettings, create_client, create_async_client
+from app.services.inference_engine import InferenceEngine
+from app.services.executor import BoundedExecutor
+from app.services.tag_classifier import TagClassifier
+from app.services.dedup import EmbeddingStore
+from app.services.local_index import LocalIndexRegistry
+from app.services.point_cache import PointCache
+from app.services.database import JobQueue
+from app.services.ingestion import IngestionWorkerPool
+from app.utils.embedding_cache import TextEmbeddingCache, model_fingerprint
+from app.utils.inference_backends import load_backend, DEFAULT_ONNX_DIR
+from app.utils.embeddings import warm_up
+from app.utils.model_sharing import get_shared_model
+from app.utils.static_files import CachedStaticFiles
+from app.utils import metrics
 from app.utils.logging import logger
 from app.dependencies import app_state
 
@@ -21,7 +37,45 @@ QDRANT_HOST = os.getenv("QDRANT_HOST")
 QDRANT_API_KEY =os.getenv("QDRANT_THRIFT_API_KEY")
 QDRANT_WARDROBE_COLLECTION = os.getenv('QDRANT_WARDROBE_COLLECTION')
 QDRANT_MARKETPLACE_COLLECTION = os.getenv('QDRANT_MARKETPLACE_COLLECTION')
+QDRANT_TAGS_COLLECTION = os.getenv('QDRANT_TAGS_COLLECTION', 'tags')
+QDRANT_PREFER_GRPC = os.getenv('QDRANT_PREFER_GRPC', 'false').lower() in ('1', 'true', 'yes')
+QDRANT_GRPC_PORT = int(os.getenv('QDRANT_GRPC_PORT', '6334'))
+QDRANT_TIMEOUT = int(os.getenv('QDRANT_TIMEOUT', '10'))
+QDRANT_POOL_SIZE = int(os.getenv('QDRANT_POOL_SIZE', '32'))
+QDRANT_MAX_RETRIES = int(os.getenv('QDRANT_MAX_RETRIES', '3'))
 # CLOTHING_TAGS = os.getenv('CLOTHING_TAGS')
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '16'))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', str(os.cpu_count() or 2)))
+CPU_POOL_MAX_QUEUE = int(os.getenv('CPU_POOL_MAX_QUEUE', '64'))
+IO_POOL_WORKERS = int(os.getenv('IO_POOL_WORKERS', '16'))
+IO_POOL_MAX_QUEUE = int(os.getenv('IO_POOL_MAX_QUEUE', '256'))
+EXECUTOR_RETRY_AFTER_SECONDS = int(os.getenv('EXECUTOR_RETRY_AFTER_SECONDS', '1'))
+TEXT_CACHE_MAX_ENTRIES = int(os.getenv('TEXT_CACHE_MAX_ENTRIES', '1024'))
+TEXT_CACHE_MAX_BYTES = int(os.getenv('TEXT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+TEXT_CACHE_DIR = os.getenv('TEXT_CACHE_DIR')
+EMBEDDING_STORE_MAX_ENTRIES = int(os.getenv('EMBEDDING_STORE_MAX_ENTRIES', '10000'))
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+MAX_ARCHIVE_BYTES = int(os.getenv('MAX_ARCHIVE_BYTES', str(500 * 1024 * 1024)))
+MAX_ARCHIVE_UNCOMPRESSED_BYTES = int(os.getenv('MAX_ARCHIVE_UNCOMPRESSED_BYTES', str(1024 * 1024 * 1024)))
+PERCEPTUAL_HASHING = os.getenv('PERCEPTUAL_HASHING', 'false').lower() in ('1', 'true', 'yes')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', DEFAULT_ONNX_DIR)
+THUMBNAIL_WIDTHS = tuple(int(w) for w in os.getenv('THUMBNAIL_WIDTHS', '256,512,1024').split(',') if w.strip())
+THUMBNAIL_FORMAT = os.getenv('THUMBNAIL_FORMAT', 'webp')
+STATIC_MAX_AGE_SECONDS = int(os.getenv('STATIC_MAX_AGE_SECONDS', '86400'))
+PROVISION_COLLECTIONS = os.getenv('PROVISION_COLLECTIONS', 'true').lower() in ('1', 'true', 'yes')
+REQUIRE_OWNER_ID = os.getenv('REQUIRE_OWNER_ID', 'false').lower() in ('1', 'true', 'yes')
+LOCAL_INDEX_MAX_POINTS = int(os.getenv('LOCAL_INDEX_MAX_POINTS', '2000'))
+LOCAL_INDEX_VERIFY_SECONDS = float(os.getenv('LOCAL_INDEX_VERIFY_SECONDS', '30'))
+POINT_CACHE_MAX_ENTRIES = int(os.getenv('POINT_CACHE_MAX_ENTRIES', '10000'))
+POINT_CACHE_TTL_SECONDS = float(os.getenv('POINT_CACHE_TTL_SECONDS', '60'))
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+INGESTION_DB_PATH = os.getenv('INGESTION_DB_PATH', 'data/ingestion.sqlite3')
+INGESTION_WORKERS = int(os.getenv('INGESTION_WORKERS', '2'))
+INGESTION_BATCH_SIZE = int(os.getenv('INGESTION_BATCH_SIZE', '16'))
+INGESTION_MAX_ATTEMPTS = int(os.getenv('INGESTION_MAX_ATTEMPTS', '3'))
+INGESTION_LEASE_SECONDS = float(os.getenv('INGESTION_LEASE_SECONDS', '300'))
 
 class AppState:
     def __init__(self):
@@ -31,30 +85,260 @@ class AppState:
         self.vector_db_wardrobe = None
 
 
+def _attach_model(processor, model, engine):
+    """Hand the loaded model to every component that embeds images or text"""
+    app_state.processor, app_state.model, app_state.inference_engine = processor, model, engine
+    for vector_db in (
+        app_state.vector_db_marketplace,
+        app_state.vector_db_wardrobe,
+        app_state.async_vector_db_marketplace,
+        app_state.async_vector_db_wardrobe,
+    ):
+        vector_db.processor, vector_db.model, vector_db.engine = processor, model, engine
+
+
+def _provision_collections(vector_size: int):
+    """Create missing collections and payload indexes for the loaded model's vector size"""
+    app_state.vector_db_marketplace.ensure_collection(vector_size)
+    app_state.vector_db_wardrobe.ensure_collection(vector_size)
+    provision_collection(app_state.qdrant_client, QDRANT_TAGS_COLLECTION, vector_size)
+
+
+def _collect_executor_stats():
+    for executor in (app_state.cpu_executor, app_state.io_executor):
+        if executor is not None:
+            stats = executor.stats()
+            yield {"pool": executor.name, "state": "queued"}, stats["queue_length"]
+            yield {"pool": executor.name, "state": "running"}, stats["running"]
+
+
+def _collect_engine_queues():
+    if app_state.inference_engine is not None:
+        for kind, depth in app_state.inference_engine.queue_depths().items():
+            yield {"kind": kind}, depth
+
+
+def _collect_cache_lookups():
+    caches = {"text_embeddings": app_state.text_cache, "image_embeddings": app_state.embedding_store}
+    caches.update({f"points_{name}": cache for name, cache in app_state.point_caches.items()})
+    for name, cache in caches.items():
+        if cache is not None:
+            stats = cache.stats()
+            yield {"cache": name, "result": "hit"}, stats["hits"]
+            yield {"cache": name, "result": "miss"}, stats["misses"]
+
+
+def _collect_ingestion_jobs():
+    if app_state.job_queue is not None:
+        for job_status, count in app_state.job_queue.counts().items():
+            yield {"status": job_status}, count
+
+
+def _register_metrics():
+    """Expose existing queue and cache counters at scrape time, so the hot paths don't pay for them"""
+    metrics.enable()
+    metrics.register_gauges("closet_executor_tasks", "Tasks queued or running per pool", ("pool", "state"), _collect_executor_stats)
+    metrics.register_gauges("closet_inference_queue_depth", "Requests waiting for an inference batch", ("kind",), _collect_engine_queues)
+    metrics.register_gauges(
+        "closet_cache_lookups_total", "Cache lookups by cache and result", ("cache", "result"), _collect_cache_lookups, kind="counter"
+    )
+    metrics.register_gauges("closet_ingestion_jobs", "Upload jobs by status", ("status",), _collect_ingestion_jobs)
+
+
+async def _load_model_in_background():
+    """Load and warm up the model without holding up startup; flips readiness when done"""
+    try:
+        shared = get_shared_model()
+        if shared is not None:
+            # Weights were loaded before fork and are shared with the other workers
+            processor, model = shared
+            logger.info(f"Using '{INFERENCE_BACKEND}' inference backend preloaded by the parent process")
+        else:
+            processor, model = await asyncio.to_thread(load_backend, INFERENCE_BACKEND, ONNX_MODEL_DIR)
+            logger.info(f"Loaded '{INFERENCE_BACKEND}' inference backend")
+        await asyncio.to_thread(warm_up, processor, model)
+
+        # Memoize text embeddings for repeated outfit prompts
+        app_state.text_cache = TextEmbeddingCache(
+            fingerprint=model_fingerprint(model),
+            max_entries=TEXT_CACHE_MAX_ENTRIES,
+            max_bytes=TEXT_CACHE_MAX_BYTES,
+            persist_dir=TEXT_CACHE_DIR
+        )
+
+        # Start the micro-batching inference engine shared by both collections
+        engine = InferenceEngine(
+            processor=processor,
+            model=model,
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+            text_cache=app_state.text_cache
+        )
+        engine.start()
+
+        _attach_model(processor, model, engine)
+
+        if PROVISION_COLLECTIONS:
+            try:
+                await asyncio.to_thread(_provision_collections, model.config.projection_dim)
+            except Exception as e:
+                logger.error(f"Could not provision Qdrant collections: {e}")
+
+        app_state.model_ready = True
+        logger.info("Model loaded and warmed up")
+    except Exception as e:
+        app_state.model_error = str(e)
+        logger.error(f"Model loading failed: {e}")
+
+
+async def _load_tags_in_background():
+    try:
+        await asyncio.to_thread(app_state.tag_classifier.refresh)
+    except Exception as e:
+        logger.warning(f"Could not load tag vocabulary, falling back to remote tag queries: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: only cheap setup happens here so the port binds immediately;
+    # the model and tag vocabulary load in the background
     try:
         logger.info("Starting up...")
+        app_state.max_upload_bytes = MAX_UPLOAD_BYTES
+        app_state.max_archive_bytes = MAX_ARCHIVE_BYTES
+        app_state.max_archive_uncompressed_bytes = MAX_ARCHIVE_UNCOMPRESSED_BYTES
+        app_state.thumbnail_widths = THUMBNAIL_WIDTHS
+        app_state.thumbnail_format = THUMBNAIL_FORMAT
+        app_state.require_owner_id = REQUIRE_OWNER_ID
+
+        # Reuse embeddings and tags for re-uploaded images
+        app_state.embedding_store = EmbeddingStore(max_entries=EMBEDDING_STORE_MAX_ENTRIES)
+
+        # Bounded pools keep blocking inference and Qdrant/disk calls off the event loop
+        app_state.cpu_executor = BoundedExecutor(
+            name="cpu",
+            max_workers=CPU_POOL_WORKERS,
+            max_queue=CPU_POOL_MAX_QUEUE,
+            retry_after=EXECUTOR_RETRY_AFTER_SECONDS
+        )
+        app_state.io_executor = BoundedExecutor(
+            name="io",
+            max_workers=IO_POOL_WORKERS,
+            max_queue=IO_POOL_MAX_QUEUE,
+            retry_after=EXECUTOR_RETRY_AFTER_SECONDS
+        )
+
+        # Initialize Qdrant clients, one pooled connection shared by all collections
+        qdrant_settings = QdrantSettings(
+            host=QDRANT_HOST,
+            api_key=QDRANT_API_KEY,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=QDRANT_TIMEOUT,
+            pool_size=QDRANT_POOL_SIZE,
+            max_retries=QDRANT_MAX_RETRIES
+        )
+        app_state.qdrant_client = create_client(qdrant_settings)
+        app_state.async_qdrant_client = create_async_client(qdrant_settings)
 
-        # Load model
-        app_state.processor, app_state.model = load_model()
+        app_state.tag_classifier = TagClassifier(
+            client=app_state.qdrant_client,
+            collection_name=QDRANT_TAGS_COLLECTION
+        )
+
+        # Model, processor and engine are attached once the background load finishes
+        # In-process mirrors for small collections/owners; 0 sends every search to Qdrant
+        local_indexes = {
+            collection_name: LocalIndexRegistry(
+                app_state.qdrant_client,
+                collection_name,
+                max_points=LOCAL_INDEX_MAX_POINTS,
+                verify_interval=LOCAL_INDEX_VERIFY_SECONDS
+            ) if LOCAL_INDEX_MAX_POINTS > 0 else None
+            for collection_name in (QDRANT_MARKETPLACE_COLLECTION, QDRANT_WARDROBE_COLLECTION)
+        }
+
+        # Item lookups by ID; shared by the sync and async databases so writes invalidate both
+        app_state.point_caches = {
+            collection_name: PointCache(max_entries=POINT_CACHE_MAX_ENTRIES, ttl=POINT_CACHE_TTL_SECONDS)
+            if POINT_CACHE_MAX_ENTRIES > 0 else None
+            for collection_name in (QDRANT_MARKETPLACE_COLLECTION, QDRANT_WARDROBE_COLLECTION)
+        }
 
-        # Initialize Qdrant clients
         app_state.vector_db_marketplace = VectorDatabase(
             host=QDRANT_HOST, 
             api_key=QDRANT_API_KEY, 
             collection_name=QDRANT_MARKETPLACE_COLLECTION,
-            model=app_state.model,
-            processor=app_state.processor
+            model=None,
+            processor=None,
+            tag_classifier=app_state.tag_classifier,
+            tags_collection=QDRANT_TAGS_COLLECTION,
+            client=app_state.qdrant_client,
+            embedding_store=app_state.embedding_store,
+            perceptual_hashing=PERCEPTUAL_HASHING,
+            local_index=local_indexes[QDRANT_MARKETPLACE_COLLECTION],
+            point_cache=app_state.point_caches[QDRANT_MARKETPLACE_COLLECTION]
         )
         app_state.vector_db_wardrobe = VectorDatabase(
             host=QDRANT_HOST, 
             api_key=QDRANT_API_KEY, 
             collection_name=QDRANT_WARDROBE_COLLECTION,
-            model=app_state.model,
-            processor=app_state.processor
+            model=None,
+            processor=None,
+            tag_classifier=app_state.tag_classifier,
+            tags_collection=QDRANT_TAGS_COLLECTION,
+            client=app_state.qdrant_client,
+            embedding_store=app_state.embedding_store,
+            perceptual_hashing=PERCEPTUAL_HASHING,
+            local_index=local_indexes[QDRANT_WARDROBE_COLLECTION],
+            point_cache=app_state.point_caches[QDRANT_WARDROBE_COLLECTION]
+        )
+        app_state.async_vector_db_marketplace = AsyncVectorDatabase(
+            client=app_state.async_qdrant_client,
+            collection_name=QDRANT_MARKETPLACE_COLLECTION,
+            model=None,
+            processor=None,
+            settings=qdrant_settings,
+            local_index=local_indexes[QDRANT_MARKETPLACE_COLLECTION],
+            point_cache=app_state.point_caches[QDRANT_MARKETPLACE_COLLECTION],
+            cpu_executor=app_state.cpu_executor,
+            io_executor=app_state.io_executor
+        )
+        app_state.async_vector_db_wardrobe = AsyncVectorDatabase(
+            client=app_state.async_qdrant_client,
+            collection_name=QDRANT_WARDROBE_COLLECTION,
+            model=None,
+            processor=None,
+            settings=qdrant_settings,
+            local_index=local_indexes[QDRANT_WARDROBE_COLLECTION],
+            point_cache=app_state.point_caches[QDRANT_WARDROBE_COLLECTION],
+            cpu_executor=app_state.cpu_executor,
+            io_executor=app_state.io_executor
         )
+
+        # Durable upload queue shared by every worker process; uploads return once their job is stored
+        app_state.job_queue = JobQueue(
+            INGESTION_DB_PATH,
+            max_attempts=INGESTION_MAX_ATTEMPTS,
+            lease_seconds=INGESTION_LEASE_SECONDS
+        )
+        app_state.ingestion_pool = IngestionWorkerPool(
+            queue=app_state.job_queue,
+            vector_dbs={'wardrobe': app_state.vector_db_wardrobe, 'marketplace': app_state.vector_db_marketplace},
+            cpu_executor=app_state.cpu_executor,
+            io_executor=app_state.io_executor,
+            ready=lambda: app_state.model_ready,
+            thumbnail_widths=THUMBNAIL_WIDTHS,
+            thumbnail_format=THUMBNAIL_FORMAT,
+            workers=INGESTION_WORKERS,
+            batch_size=INGESTION_BATCH_SIZE
+        )
+        app_state.ingestion_pool.start()
+
+        app_state.background_tasks = [
+            asyncio.create_task(_load_model_in_background()),
+            asyncio.create_task(_load_tags_in_background()),
+        ]
         
         logger.info("Startup completed successfully!")
 
@@ -67,13 +351,32 @@ async def lifespan(app: FastAPI):
     # Shutdown
     try:
         logger.info("Shutting down...")
-        # Cleanup resources if needed
+        for task in app_state.background_tasks:
+            task.cancel()
+        if app_state.ingestion_pool is not None:
+            await app_state.ingestion_pool.stop()
+        if app_state.inference_engine is not None:
+            app_state.inference_engine.shutdown()
+        if app_state.text_cache is not None:
+            # Writes queued embeddings to disk before the process exits
+            app_state.text_cache.close()
+        for executor in (app_state.cpu_executor, app_state.io_executor):
+            if executor is not None:
+                executor.shutdown()
+        if app_state.async_qdrant_client is not None:
+            await app_state.async_qdrant_client.close()
+        if app_state.qdrant_client is not None:
+            app_state.qdrant_client.close()
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
 
 app = FastAPI(title="My FastAPI App", lifespan=lifespan)
 
+if METRICS_ENABLED:
+    _register_metrics()
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:8080"], 
@@ -82,10 +385,75 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-app.mount("/static", StaticFiles(directory='app/static'))
+# Derivatives are content-addressed and cached as immutable; originals revalidate
+app.mount("/static", CachedStaticFiles(directory='app/static', max_age=STATIC_MAX_AGE_SECONDS))
 
 app.include_router(router, prefix="/api")
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the FastAPI app!"}
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is serving requests and the model has not failed to load"""
+    if app_state.model_error is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": app_state.model_error})
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the model is loaded and warmed up and Qdrant is reachable"""
+    checks = {"model": app_state.model_ready, "qdrant": False}
+    if app_state.async_qdrant_client is not None:
+        try:
+            await asyncio.wait_for(app_state.async_qdrant_client.get_collections(), timeout=2)
+            checks["qdrant"] = True
+        except Exception as e:
+            logger.warning(f"Readiness check could not reach Qdrant: {e}")
+
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "checks": checks}
+    )
+
+@app.get("/executor-stats")
+def executor_stats():
+    """Queue-length and wait-time gauges for the inference and IO pools"""
+    return {
+        executor.name: executor.stats()
+        for executor in (app_state.cpu_executor, app_state.io_executor)
+        if executor is not None
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, batch sizes, queue depths and cache hits"""
+    if not metrics.registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled; set METRICS_ENABLED=true")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache-stats")
+def cache_stats():
+    """Hit/miss counters for the text embedding cache, the image embedding store and the point caches"""
+    stats = {}
+    if app_state.text_cache is not None:
+        stats["text_embeddings"] = app_state.text_cache.stats()
+    if app_state.embedding_store is not None:
+        stats["image_embeddings"] = app_state.embedding_store.stats()
+    for collection_name, point_cache in app_state.point_caches.items():
+        if point_cache is not None:
+            stats[f"points_{collection_name}"] = point_cache.stats()
+    return stats
+
+@app.post("/refresh-tags")
+def refresh_tags():
+    """Reload the tag vocabulary from the tags collection"""
+    if app_state.tag_classifier is None:
+        raise HTTPException(status_code=500, detail="Tag classifier not initialized")
+    try:
+        return {"tags": app_state.tag_classifier.refresh()}
+    except Exception as e:
+        logger.error(f"Error refreshing tags: {e}")
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
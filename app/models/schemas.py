@@ -1,25 +1,60 @@
 from pydantic import BaseModel
-from typing import List, Literal, Union, Any, Optional
+from typing import Dict, List, Literal, Union, Any, Optional, get_args
+
+Category = Literal['top', 'bottom', 'shoes', 'outerwear', 'accessory']
+CATEGORIES = get_args(Category)
 
 class ClothingItem(BaseModel):
     id: Union[str, Any]
     name: str
     tags: List[str]
-    category: Literal['top', 'bottom']
+    category: Category
 
 class MarketplaceItem(ClothingItem):
     store: str
     price: int
 
+class MatchedItem(ClothingItem):
+    score: float
+    source: Literal['wardrobe', 'marketplace']
+    store: Optional[str] = None
+    price: Optional[int] = None
+
+class CompleteTheLookResponse(BaseModel):
+    source: Literal['wardrobe', 'marketplace']
+    item: ClothingItem
+    target_category: Optional[str]
+    items: List[MatchedItem]
+
 class Outfit(BaseModel):
     score: float
-    top: ClothingItem
-    bottom: ClothingItem
+    top: Optional[ClothingItem] = None
+    bottom: Optional[ClothingItem] = None
+    items: Dict[str, ClothingItem] = {}
     prompt: Union[str, None]
 
 class OutfitRequest(BaseModel):
     query: str
     limit: Optional[int] = 3
+    candidate_pool: Optional[int] = 200
+    categories: Optional[List[Category]] = None
+    category_limits: Optional[Dict[Category, int]] = None
+    beam_width: Optional[int] = None
+    diversity: Optional[float] = None
+    max_item_reuse: Optional[int] = None
 
 class OutfitResponse(BaseModel):
     outfits: List[Outfit]
+
+class BatchOutfitRequest(BaseModel):
+    queries: List[str]
+    limit: Optional[int] = 3
+    candidate_pool: Optional[int] = 200
+    categories: Optional[List[Category]] = None
+    category_limits: Optional[Dict[Category, int]] = None
+    beam_width: Optional[int] = None
+    diversity: Optional[float] = None
+    max_item_reuse: Optional[int] = None
+
+class BatchOutfitResponse(BaseModel):
+    results: Dict[str, List[Outfit]]
@@ -0,0 +1,204 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import QueryRequest
+
+from app.services.executor import BoundedExecutor
+from app.services.inference_engine import InferenceEngine
+from app.services.local_index import LocalIndexRegistry, LocalVectorIndex
+from app.services.point_cache import PointCache, point_key
+from app.services.qdrant_pool import QdrantSettings, with_retry
+from app.services.vector_db import format_point, encode_cursor, decode_cursor, scoped_filter, is_owned_by
+from app.utils.embeddings import embed_text, embed_texts
+from app.utils.logging import logger
+from app.utils.metrics import stage
+
+
+class AsyncVectorDatabase:
+    """
+    Async counterpart of VectorDatabase for read paths.
+
+    Every instance shares one pooled AsyncQdrantClient, so routes can await
+    independent queries concurrently without holding a thread per call.
+    Calls are retried with jittered backoff according to ``settings``.
+    Blocking work (local index loads, embeddings without an engine) runs on
+    the bounded ``io_executor``/``cpu_executor``, so a saturated pool answers
+    503 instead of queueing without limit.
+    """
+
+    def __init__(self, client: AsyncQdrantClient, collection_name: str, model: Any, processor: Any,
+                 engine: Optional[InferenceEngine] = None, settings: Optional[QdrantSettings] = None,
+                 local_index: Optional[LocalIndexRegistry] = None, point_cache: Optional[PointCache] = None,
+                 cpu_executor: Optional[BoundedExecutor] = None, io_executor: Optional[BoundedExecutor] = None):
+        self.client = client
+        self.collection_name = collection_name
+        self.model = model
+        self.processor = processor
+        self.engine = engine
+        self.settings = settings or QdrantSettings(host=None, api_key=None)
+        # Shared with the collection's VectorDatabase, whose writes keep it in sync
+        self.local_index = local_index
+        self.point_cache = point_cache
+        self.cpu_executor = cpu_executor
+        self.io_executor = io_executor
+
+    async def _call(self, method: str, **kwargs):
+        return await with_retry(
+            getattr(self.client, method),
+            max_retries=self.settings.max_retries,
+            base_delay=self.settings.retry_base_delay,
+            max_delay=self.settings.retry_max_delay,
+            **kwargs
+        )
+
+    async def _run(self, executor: Optional[BoundedExecutor], fn: Callable[..., Any], *args) -> Any:
+        if executor is None:
+            return await asyncio.to_thread(fn, *args)
+        return await executor.run(fn, *args)
+
+    async def _local_index_for(self, owner_id: Optional[str], collection_name: Optional[str] = None) -> Optional[LocalVectorIndex]:
+        if self.local_index is None or (collection_name or self.collection_name) != self.collection_name:
+            return None
+        # Loading and version checks use the sync client, so keep them off the event loop
+        return await self._run(self.io_executor, self.local_index.get, owner_id)
+
+    async def embed_text(self, text: str) -> np.ndarray:
+        """Embed a text query without blocking the event loop"""
+        with stage("embed_text", self.collection_name):
+            if self.engine is not None:
+                return await asyncio.wrap_future(self.engine.submit_text(text))
+            return await self._run(self.cpu_executor, embed_text, text, self.processor, self.model)
+
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed many text queries at once
+
+        Submitted together, they land in the same engine batch (one tokenizer
+        and model pass) and still go through its text cache.
+        """
+        with stage("embed_text", self.collection_name):
+            if self.engine is not None:
+                futures = [asyncio.wrap_future(self.engine.submit_text(text)) for text in texts]
+                return np.stack(await asyncio.gather(*futures))
+            return await self._run(self.cpu_executor, embed_texts, texts, self.processor, self.model)
+
+    async def get_items_by_category(self, category: str, query_embedding: np.ndarray, limit: int = 5, collection_name: str = None,
+                                    owner_id: Optional[str] = None):
+        """Get items by category with similarity search, optionally limited to one owner's items"""
+        try:
+            index = await self._local_index_for(owner_id, collection_name)
+            if index is not None:
+                with stage("local_query", self.collection_name):
+                    return index.search(query_embedding, limit, category)
+
+            if isinstance(query_embedding, np.ndarray):
+                query_vector = query_embedding.tolist()
+            else:
+                query_vector = query_embedding
+
+            with stage("query", collection_name or self.collection_name):
+                response = await self._call(
+                    "query_points",
+                    collection_name=collection_name or self.collection_name,
+                    query=query_vector,
+                    query_filter=scoped_filter(owner_id, category=category),
+                    with_vectors=True,
+                    with_payload=True,
+                    limit=limit
+                )
+            return response.points
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise Exception(f"Error querying items: {str(e)}")
+
+    async def get_items_by_category_batch(self, searches: Sequence[Tuple[str, np.ndarray]], limit: int = 5,
+                                          owner_id: Optional[str] = None) -> List[list]:
+        """
+        Run many category-filtered similarity searches in one request
+
+        Args:
+            searches: (category, query embedding) pairs
+            limit: Maximum number of items per search
+            owner_id: Only search this owner's items, None for the whole collection
+
+        Returns:
+            The matching points for each search, in order
+        """
+        if not searches:
+            return []
+        try:
+            index = await self._local_index_for(owner_id)
+            if index is not None:
+                with stage("local_query", self.collection_name):
+                    return [index.search(query_embedding, limit, category) for category, query_embedding in searches]
+
+            with stage("query_batch", self.collection_name):
+                responses = await self._call(
+                    "query_batch_points",
+                    collection_name=self.collection_name,
+                    requests=[
+                        QueryRequest(
+                            query=np.asarray(query_embedding).tolist(),
+                            filter=scoped_filter(owner_id, category=category),
+                            with_vector=True,
+                            with_payload=True,
+                            limit=limit
+                        )
+                        for category, query_embedding in searches
+                    ]
+                )
+            return [response.points for response in responses]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise Exception(f"Error querying items: {str(e)}")
+
+    async def get_items_by_id(self, item_id: str, owner_id: Optional[str] = None):
+        """Retrieve a specific item by its ID, or None if it does not exist or belongs to another owner"""
+        try:
+            return (await self.get_items_by_ids([item_id], owner_id))[0]
+        except Exception as e:
+            logger.warning(f"Error retrieving item with ID {item_id}: {str(e)}")
+            return None
+
+    async def get_items_by_ids(self, item_ids: List[str], owner_id: Optional[str] = None) -> List[Any]:
+        """Retrieve many items; see VectorDatabase.get_items_by_ids"""
+        if self.point_cache is not None:
+            found, missing = self.point_cache.get_many(item_ids)
+        else:
+            found, missing = {}, list(item_ids)
+
+        if missing:
+            with stage("retrieve", self.collection_name):
+                fetched = await self._call(
+                    "retrieve",
+                    collection_name=self.collection_name,
+                    ids=missing,
+                    with_payload=True,
+                    with_vectors=True
+                )
+            for point in fetched:
+                found[point_key(point.id)] = point
+                if self.point_cache is not None:
+                    self.point_cache.put(point)
+
+        points = [found.get(point_key(item_id)) for item_id in item_ids]
+        return [point if point is not None and is_owned_by(point, owner_id) else None for point in points]
+
+    async def retrieve_page(self, page_size: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                            owner_id: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Retrieve one page of items; see VectorDatabase.retrieve_page"""
+        points, next_offset = await self._call(
+            "scroll",
+            collection_name=self.collection_name,
+            scroll_filter=scoped_filter(owner_id),
+            limit=page_size,
+            offset=decode_cursor(cursor),
+            with_payload=fields if fields is not None else True,
+            with_vectors=False,
+        )
+        return [format_point(point, fields) for point in points], encode_cursor(next_offset)
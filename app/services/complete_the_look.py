@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.async_vector_db import AsyncVectorDatabase
+
+
+COMPLEMENTARY_CATEGORIES = {
+    "top": "bottom",
+    "bottom": "top",
+    "shoes": "bottom",
+    "outerwear": "top",
+    "accessory": "top",
+}
+
+DEFAULT_SOURCE_LIMIT = 5
+MAX_SOURCE_LIMIT = 100
+
+
+def complementary_category(category: str) -> Optional[str]:
+    """The category that completes an outfit with ``category``, or None if there is none"""
+    return COMPLEMENTARY_CATEGORIES.get((category or "").lower())
+
+
+async def find_source_item(
+    wardrobe_db: AsyncVectorDatabase,
+    marketplace_db: AsyncVectorDatabase,
+    item_id: str,
+    owner_id: Optional[str] = None
+) -> Tuple[Optional[str], Any]:
+    """
+    Look an item up in both collections at once, returning (collection, point)
+
+    Without ``owner_id`` only the marketplace is looked at, since a wardrobe
+    item can't be told apart from another owner's.
+    """
+    if owner_id is None:
+        wardrobe_item, marketplace_item = None, await marketplace_db.get_items_by_id(item_id)
+    else:
+        wardrobe_item, marketplace_item = await asyncio.gather(
+            wardrobe_db.get_items_by_id(item_id, owner_id=owner_id),
+            marketplace_db.get_items_by_id(item_id)
+        )
+    if wardrobe_item is not None:
+        return "wardrobe", wardrobe_item
+    if marketplace_item is not None:
+        return "marketplace", marketplace_item
+    return None, None
+
+
+async def complete_the_look(
+    wardrobe_db: AsyncVectorDatabase,
+    marketplace_db: AsyncVectorDatabase,
+    item_id: str,
+    wardrobe_limit: int = DEFAULT_SOURCE_LIMIT,
+    marketplace_limit: int = DEFAULT_SOURCE_LIMIT,
+    limit: Optional[int] = None,
+    owner_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Find items that complete the look of an item from either collection.
+
+    The complementary category is searched in the wardrobe (scoped to
+    ``owner_id``, and skipped without one, so no one is shown other owners'
+    items) and the marketplace concurrently. Both searches score
+    against the same item vector, so their cosine scores are comparable and
+    the results are merged into one ranking; an image stored in both
+    collections is kept once, preferring the wardrobe copy.
+
+    Returns:
+        None if the item doesn't exist, otherwise the source item and the
+        ranked matches (at most ``limit``, default all of them)
+    """
+    collection, item = await find_source_item(wardrobe_db, marketplace_db, item_id, owner_id)
+    if item is None:
+        return None
+
+    target_category = complementary_category(item.payload.get("category"))
+    if target_category is None:
+        return {"source": collection, "item": item, "target_category": None, "matches": []}
+
+    searches = []
+    if wardrobe_limit > 0 and owner_id is not None:
+        searches.append(("wardrobe", wardrobe_db.get_items_by_category(
+            target_category, item.vector, limit=wardrobe_limit, owner_id=owner_id
+        )))
+    if marketplace_limit > 0:
+        searches.append(("marketplace", marketplace_db.get_items_by_category(
+            target_category, item.vector, limit=marketplace_limit
+        )))
+    results = await asyncio.gather(*(search for _, search in searches))
+
+    matches = _merge_matches(
+        [(source, point) for (source, _), points in zip(searches, results) for point in points],
+        exclude_id=item.id
+    )
+    if limit is not None:
+        matches = matches[:limit]
+
+    return {"source": collection, "item": item, "target_category": target_category, "matches": matches}
+
+
+def _merge_matches(candidates: List[Tuple[str, Any]], exclude_id: Any) -> List[Tuple[str, Any]]:
+    # Wardrobe first so its copy wins ties on content hash
+    candidates = sorted(candidates, key=lambda candidate: (-candidate[1].score, candidate[0] != "wardrobe"))
+    seen_hashes = set()
+    merged = []
+    for source, point in candidates:
+        if point.id == exclude_id:
+            continue
+        image_hash = (point.payload or {}).get("content_hash")
+        if image_hash is not None:
+            if image_hash in seen_hashes:
+                continue
+            seen_hashes.add(image_hash)
+        merged.append((source, point))
+    return merged
@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    collection: str
+    status: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    created_at: float
+    updated_at: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class JobQueue:
+    """
+    Durable job queue in a SQLite database in WAL mode.
+
+    Every worker process opens the same file, so a job enqueued by one
+    process can be claimed by any other and its status read from all of
+    them. Claiming is a single ``BEGIN IMMEDIATE`` transaction, so a job is
+    handed to one worker at a time. A claimed job holds a lease; if its
+    worker dies, the job becomes claimable again once the lease expires.
+    Failures are retried with exponential backoff until ``max_attempts``.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 300.0,
+                 retry_backoff: float = 2.0, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def enqueue(self, collection: str, payload: Dict[str, Any], job_id: Optional[str] = None,
+                idempotency_key: Optional[str] = None) -> Tuple[Job, bool]:
+        """
+        Add a job, returning (job, created).
+
+        A repeated ``idempotency_key`` returns the job it first created
+        instead of adding another, with ``created`` False.
+        """
+        now = time.time()
+        job_id = job_id or str(uuid.uuid4())
+        connection = self._connection()
+        try:
+            connection.execute(
+                "INSERT INTO jobs (id, collection, idempotency_key, status, payload, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, collection, idempotency_key, QUEUED, json.dumps(payload), self.max_attempts, now, now, now)
+            )
+        except sqlite3.IntegrityError:
+            if idempotency_key is None:
+                raise
+            return self.find_by_idempotency_key(idempotency_key), False
+        return self.get(job_id), True
+
+    def claim(self, limit: int) -> List[Job]:
+        """
+        Lease up to ``limit`` due jobs, oldest first, counting an attempt for each.
+
+        A job whose lease expired after its last allowed attempt (its worker
+        kept dying on it) is never handed out again; ``fail_expired`` marks
+        it failed.
+        """
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT id FROM jobs"
+                " WHERE (status = ? AND available_at <= ?)"
+                " OR (status = ? AND lease_expires_at <= ? AND attempts < max_attempts)"
+                " ORDER BY created_at LIMIT ?",
+                (QUEUED, now, PROCESSING, now, limit)
+            ).fetchall()
+            job_ids = [row["id"] for row in rows]
+            connection.executemany(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                [(PROCESSING, now + self.lease_seconds, now, job_id) for job_id in job_ids]
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return self._get_many(job_ids)
+
+    def fail_expired(self) -> List[Job]:
+        """Mark jobs whose lease expired on their last allowed attempt as failed, returning them"""
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT id FROM jobs WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (PROCESSING, now)
+            ).fetchall()
+            job_ids = [row["id"] for row in rows]
+            connection.executemany(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, ?), lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                [(FAILED, "Lease expired on the last attempt", now, job_id) for job_id in job_ids]
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return self._get_many(job_ids)
+
+    def complete(self, job_id: str, result: Dict[str, Any], status: str = COMPLETED):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt; the job is retried after a backoff unless attempts are used up.
+
+        Returns the job's new status (``QUEUED`` or ``FAILED``), None if it doesn't exist.
+        """
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        if retry and row["attempts"] < row["max_attempts"]:
+            delay = self.retry_backoff ** row["attempts"]
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (QUEUED, error, now + delay, now, job_id)
+            )
+            return QUEUED
+        connection.execute(
+            "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+            (FAILED, error, now, job_id)
+        )
+        return FAILED
+
+    def release(self, job_ids: Iterable[str]):
+        """Hand claimed jobs back without counting the attempt, e.g. when the worker is overloaded"""
+        now = time.time()
+        self._connection().executemany(
+            "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_expires_at = NULL, updated_at = ?"
+            " WHERE id = ? AND status = ?",
+            [(QUEUED, now, job_id, PROCESSING) for job_id in job_ids]
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_job(row) if row is not None else None
+
+    def find_by_idempotency_key(self, idempotency_key: str) -> Optional[Job]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return _to_job(row) if row is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        rows = self._connection().execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, PROCESSING, COMPLETED, DUPLICATE, FAILED)}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than ``older_than`` seconds ago"""
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?",
+            (COMPLETED, DUPLICATE, FAILED, time.time() - older_than)
+        )
+        return cursor.rowcount
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _get_many(self, job_ids: List[str]) -> List[Job]:
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._connection().execute(
+            f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY created_at", job_ids
+        ).fetchall()
+        return [_to_job(row) for row in rows]
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; each pool thread gets its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.connection = connection
+        return connection
+
+
+def _to_job(row: sqlite3.Row) -> Job:
+    return Job(
+        id=row["id"],
+        collection=row["collection"],
+        status=row["status"],
+        payload=json.loads(row["payload"]),
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        result=json.loads(row["result"]) if row["result"] else None,
+        error=row["error"],
+    )
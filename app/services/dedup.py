@@ -0,0 +1,74 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of the raw upload bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8) -> str:
+    """
+    64-bit difference hash (dHash) of an image as a hex string.
+
+    Visually identical images re-encoded or resized hash to the same or a
+    nearby value, unlike the byte-level content hash.
+    """
+    grayscale = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(grayscale, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    value = int("".join("1" if bit else "0" for bit in bits), 2)
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+class EmbeddingStore:
+    """
+    LRU of image embeddings and tags keyed by content hash.
+
+    Shared by every collection: an identical image has the same embedding
+    wherever it is uploaded, so a hit skips inference and tagging entirely.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[np.ndarray, List[str]]]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Optional[str], embedding: Any, tags: List[str]):
+        if key is None:
+            return
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = (embedding, list(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
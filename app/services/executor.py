@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+
+
+class ExecutorSaturatedError(HTTPException):
+    """Raised when an executor's queue is full; rendered as 503 with Retry-After"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server is busy ({name} queue full). Please retry shortly.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded queue for running blocking work off the event loop.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue`` more may
+    wait; anything beyond that is rejected immediately with ExecutorSaturatedError
+    instead of piling up behind slow requests.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` in the pool and await its result, rejecting if saturated"""
+        with self._lock:
+            if self._pending + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(self.name, self.retry_after)
+            self._pending += 1
+
+        submitted_at = time.monotonic()
+        # Carry the caller's context (e.g. the metrics route label) into the pool thread
+        context = contextvars.copy_context()
+
+        def task():
+            started_at = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+                self._running += 1
+                wait = started_at - submitted_at
+                self._last_wait = wait
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._pool, task)
+        except RuntimeError:
+            # Pool has been shut down
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_length": self._pending,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "last_wait_seconds": self._last_wait,
+                "avg_wait_seconds": self._total_wait / started if started else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
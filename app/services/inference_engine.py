@@ -0,0 +1,184 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.embeddings import embed_images, embed_texts
+from app.utils.preprocessing import PreprocessConfig, preprocess_image
+from app.utils.embedding_cache import TextEmbeddingCache
+from app.utils.logging import logger
+from app.utils.metrics import BATCH_SIZE, stage
+
+
+_STOP = object()
+
+
+@dataclass
+class _EmbeddingRequest:
+    data: Any
+    future: Future
+
+
+class InferenceEngine:
+    """
+    Dynamic micro-batching engine for CLIP image and text embeddings.
+
+    Concurrent callers submit single inputs; a worker thread per modality
+    drains its queue into batches of up to ``max_batch_size`` items, waiting
+    at most ``max_wait_ms`` after the first request for the batch to fill,
+    then runs one forward pass and resolves each caller's future. Text
+    requests are served from ``text_cache`` when one is attached.
+    """
+
+    def __init__(self, processor: Any, model: Any, max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 text_cache: Optional[TextEmbeddingCache] = None):
+        self.processor = processor
+        self.model = model
+        self.text_cache = text_cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._preprocess_config = PreprocessConfig.from_processor(processor)
+
+        self._batch_fns: Dict[str, Callable[[List[Any]], np.ndarray]] = {
+            "image": lambda items: embed_images(items, self.processor, self.model),
+            "text": lambda items: embed_texts(items, self.processor, self.model),
+        }
+        self._queues: Dict[str, queue.Queue] = {kind: queue.Queue() for kind in self._batch_fns}
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Stop the workers, failing every request they didn't get to.
+
+        New submissions are rejected from here on. Requests queued before the
+        stop are still served unless the workers miss the join ``timeout``;
+        whatever is left in the queues then gets an exception, so no caller
+        waits forever on its future.
+        """
+        with self._lock:
+            self._stopped = True
+            workers, self._workers = self._workers, []
+        for kind in self._queues:
+            self._queues[kind].put(_STOP)
+        for worker in workers:
+            worker.join(timeout=timeout)
+
+        for requests in self._queues.values():
+            while True:
+                try:
+                    request = requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not _STOP and request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(RuntimeError("Inference engine shut down before the request ran"))
+
+    def submit_image(self, image_data: bytes) -> Future:
+        # Decode and preprocess on the caller's thread so the batch worker only runs the model
+        with stage("preprocess"):
+            pixel_values = preprocess_image(image_data, self.processor, self._preprocess_config)
+        return self._submit("image", pixel_values)
+
+    def submit_text(self, text: str) -> Future:
+        if self.text_cache is None:
+            return self._submit("text", text)
+
+        cached = self.text_cache.get(text)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        future = self._submit("text", text)
+        future.add_done_callback(lambda done: self._cache_text(text, done))
+        return future
+
+    def embed_image(self, image_data: bytes) -> np.ndarray:
+        return self.submit_image(image_data).result()
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.submit_text(text).result()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Requests waiting for a batch, per modality"""
+        return {kind: requests.qsize() for kind, requests in self._queues.items()}
+
+    def _cache_text(self, text: str, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.text_cache.put(text, future.result())
+
+    def _submit(self, kind: str, data: Any) -> Future:
+        future = Future()
+        # Queued under the lock, so shutdown either sees the request when it drains or rejects it here
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Inference engine is shut down")
+            self._start_locked()
+            self._queues[kind].put(_EmbeddingRequest(data=data, future=future))
+        return future
+
+    def _start_locked(self):
+        if self._workers or self._stopped:
+            return
+        for kind in self._batch_fns:
+            worker = threading.Thread(target=self._run, args=(kind,), name=f"inference-{kind}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Inference engine started (max_batch_size={self.max_batch_size}, max_wait={self.max_wait * 1000:.1f}ms)")
+
+    def _run(self, kind: str):
+        requests = self._queues[kind]
+        stopping = False
+        while not stopping:
+            first = requests.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(kind, batch)
+
+    def _process(self, kind: str, batch: List[_EmbeddingRequest]):
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        BATCH_SIZE.observe(len(batch), kind=kind)
+        try:
+            with stage(f"{kind}_forward"):
+                embeddings = self._batch_fns[kind]([request.data for request in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # Isolate the failing input so one bad request doesn't fail the whole batch
+            logger.warning(f"Batched {kind} embedding failed, retrying individually: {e}")
+            for request in batch:
+                try:
+                    request.future.set_result(self._batch_fns[kind]([request.data])[0])
+                except Exception as item_error:
+                    request.future.set_exception(item_error)
+            return
+
+        for request, embedding in zip(batch, embeddings):
+            request.future.set_result(embedding)
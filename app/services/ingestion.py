@@ -0,0 +1,184 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.database import JobQueue, Job, COMPLETED, DUPLICATE, FAILED
+from app.services.executor import BoundedExecutor, ExecutorSaturatedError
+from app.services.vector_db import VectorDatabase
+from app.utils.thumbnails import generate_derivatives
+from app.utils.logging import logger
+
+
+# (result, error, retryable) per job
+Outcome = Tuple[Optional[Dict[str, Any]], Optional[str], bool]
+
+
+class IngestionWorkerPool:
+    """
+    Background workers that drain the upload job queue.
+
+    Each worker claims a batch of jobs, then embeds, tags and upserts them
+    with one ``upload_batch`` call per collection on the inference pool.
+    Jobs are keyed by their point id, so a retried or re-claimed job
+    overwrites the same point instead of creating a copy. Workers in every
+    process share the queue, and no job is claimed until ``ready()``
+    (the model is loaded).
+    """
+
+    def __init__(self, queue: JobQueue, vector_dbs: Dict[str, VectorDatabase], cpu_executor: BoundedExecutor,
+                 io_executor: BoundedExecutor, ready: Callable[[], bool], thumbnail_widths=(256, 512, 1024),
+                 thumbnail_format: str = "webp", workers: int = 2, batch_size: int = 16, poll_interval: float = 0.5):
+        self.queue = queue
+        self.vector_dbs = vector_dbs
+        self.cpu_executor = cpu_executor
+        self.io_executor = io_executor
+        self.ready = ready
+        self.thumbnail_widths = thumbnail_widths
+        self.thumbnail_format = thumbnail_format
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                if not self.ready():
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self.io_executor.run(self._fail_expired)
+                jobs = await self.io_executor.run(self.queue.claim, self.batch_size)
+                if not jobs:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._run_batch(jobs)
+            except asyncio.CancelledError:
+                raise
+            except ExecutorSaturatedError:
+                await asyncio.sleep(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Ingestion worker {index} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run_batch(self, jobs: List[Job]):
+        by_collection: Dict[str, List[Job]] = {}
+        for job in jobs:
+            by_collection.setdefault(job.collection, []).append(job)
+
+        for collection, collection_jobs in by_collection.items():
+            vector_db = self.vector_dbs.get(collection)
+            if vector_db is None:
+                outcomes = [(None, f"Unknown collection '{collection}'", False)] * len(collection_jobs)
+            else:
+                try:
+                    outcomes = await self.cpu_executor.run(
+                        process_jobs, vector_db, collection_jobs, self.thumbnail_widths, self.thumbnail_format
+                    )
+                except ExecutorSaturatedError:
+                    # Not the jobs' fault; let them be claimed again without using up an attempt
+                    await self.io_executor.run(self.queue.release, [job.id for job in collection_jobs])
+                    raise
+                except Exception as e:
+                    outcomes = [(None, str(e), True)] * len(collection_jobs)
+
+            await self.io_executor.run(self._record, collection_jobs, outcomes)
+
+    def _record(self, jobs: List[Job], outcomes: List[Outcome]):
+        for job, (result, error, retryable) in zip(jobs, outcomes):
+            if error is None:
+                self.queue.complete(job.id, result, status=result.get("status", COMPLETED))
+            else:
+                logger.warning(f"Ingestion job {job.id} failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+                if self.queue.fail(job.id, error, retry=retryable) == FAILED:
+                    discard_original(job)
+
+    def _fail_expired(self):
+        for job in self.queue.fail_expired():
+            logger.warning(f"Ingestion job {job.id} failed: lease expired on its last attempt")
+            discard_original(job)
+
+
+def discard_original(job: Job):
+    """Delete the stored image of a job that will never complete"""
+    image_path = job.payload.get("image_path")
+    if image_path and os.path.exists(image_path):
+        os.remove(image_path)
+
+
+def process_jobs(vector_db: VectorDatabase, jobs: List[Job], thumbnail_widths=(256, 512, 1024),
+                 thumbnail_format: str = "webp") -> List[Outcome]:
+    """
+    Embed, tag and upsert a batch of upload jobs, returning an outcome per job.
+
+    Each job's payload holds the stored ``image_path`` and ``content_hash``,
+    the item fields and ``reuse_existing``. With ``reuse_existing``, an
+    identical image the owner already has completes the job as a duplicate
+    and the stored copy is removed. Thumbnails are only generated once a
+    job's point is stored, so failed jobs leave none behind.
+    """
+    outcomes: List[Optional[Outcome]] = [None] * len(jobs)
+    batch = []
+    for index, job in enumerate(jobs):
+        payload = dict(job.payload)
+        image_path = payload.pop("image_path")
+        image_hash = payload.pop("content_hash")
+        reuse_existing = payload.pop("reuse_existing", False)
+        try:
+            with open(image_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            outcomes[index] = (None, f"Stored image is missing: {e}", False)
+            continue
+
+        if reuse_existing:
+            existing = vector_db.find_by_content_hash(image_hash, owner_id=payload.get("owner_id"))
+            # A retry of a job whose upsert already landed finds its own point; just redo it
+            if existing is not None and str(existing.id) != job.id:
+                os.remove(image_path)
+                outcomes[index] = ({"status": DUPLICATE, "vector_id": str(existing.id)}, None, False)
+                continue
+
+        batch.append((index, data, image_hash, payload))
+
+    if batch:
+        errors = vector_db.upload_batch(
+            images=[data for _, data, _, _ in batch],
+            payloads=[payload for _, _, _, payload in batch],
+            point_ids=[jobs[index].id for index, _, _, _ in batch],
+            # Hashed while the upload streamed to disk
+            hashes=[image_hash for _, _, image_hash, _ in batch]
+        )
+        thumbnails: Dict[str, Dict[str, str]] = {}
+        for (index, data, image_hash, _), error in zip(batch, errors):
+            job = jobs[index]
+            if error is not None:
+                # An image that can't be decoded will never succeed
+                outcomes[index] = (None, error, not error.startswith("Could not decode"))
+                continue
+            try:
+                thumbnails[job.id] = generate_derivatives(data, image_hash, job.collection, thumbnail_widths, thumbnail_format)
+            except Exception as e:
+                # The item is stored either way; the lazy endpoint covers missing thumbnails
+                logger.warning(f"Could not generate thumbnails for job {job.id}: {e}")
+            outcomes[index] = ({
+                "status": COMPLETED,
+                "vector_id": job.id,
+                "thumbnails": thumbnails.get(job.id, {}),
+            }, None, False)
+
+        try:
+            # One request for the whole batch rather than a second write per job
+            vector_db.update_payloads({job_id: {"thumbnails": urls} for job_id, urls in thumbnails.items()})
+        except Exception as e:
+            logger.warning(f"Could not store thumbnail URLs: {e}")
+
+    return outcomes
@@ -0,0 +1,306 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+from app.services.point_cache import point_key
+from app.utils.logging import logger
+from app.utils.vector_ops import normalize_rows, top_k_indices
+
+
+# Payload field every write stamps with its time, so rewrites that keep the point count are detectable
+VERSION_FIELD = "updated_at"
+
+
+@dataclass
+class LocalPoint:
+    """Search result with the attributes routes read from Qdrant's ScoredPoint"""
+    id: Any
+    score: float
+    payload: Dict[str, Any]
+    vector: np.ndarray
+    version: int = 0
+
+
+class LocalVectorIndex:
+    """
+    In-memory mirror of a small collection, or of one owner's slice of it.
+
+    Vectors live in a contiguous, L2-normalized float32 matrix that grows by
+    doubling; each row's category is kept as an integer code so a category
+    filter is a boolean mask. A category-filtered top-k is one masked matmul
+    plus ``argpartition``, with the same cosine scores Qdrant would return.
+    Rows are keyed by ``point_key``, so a UUID or its string form find the
+    same point.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((max(1, capacity), dim), dtype=np.float32)
+        self._category_codes = np.full(max(1, capacity), -1, dtype=np.int32)
+        self._categories: Dict[str, int] = {}
+        self._ids: List[Any] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, point_id: Any, vector: Any, payload: Dict[str, Any]):
+        """Insert or replace a point"""
+        vector = normalize_rows(np.asarray(vector, dtype=np.float32).ravel())
+        with self._lock:
+            code = self._categories.setdefault(payload.get("category"), len(self._categories))
+            row = self._rows.get(point_key(point_id))
+            if row is None:
+                row = len(self._ids)
+                self._grow(row + 1)
+                self._ids.append(point_id)
+                self._payloads.append(payload)
+                self._rows[point_key(point_id)] = row
+            else:
+                self._payloads[row] = payload
+            self._matrix[row] = vector
+            self._category_codes[row] = code
+
+    def update_payload(self, point_id: Any, payload: Dict[str, Any]):
+        """Merge payload fields into a point, like Qdrant's set_payload"""
+        with self._lock:
+            row = self._rows.get(point_key(point_id))
+            if row is None:
+                return
+            self._payloads[row] = {**self._payloads[row], **payload}
+            if "category" in payload:
+                self._category_codes[row] = self._categories.setdefault(payload["category"], len(self._categories))
+
+    def remove(self, point_id: Any, owner_id: Optional[str] = None) -> bool:
+        """Remove a point (only if ``owner_id`` owns it, when given) by moving the last row into its slot"""
+        with self._lock:
+            row = self._rows.get(point_key(point_id))
+            if row is None or (owner_id is not None and self._payloads[row].get("owner_id") != owner_id):
+                return False
+            del self._rows[point_key(point_id)]
+            last = len(self._ids) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._category_codes[row] = self._category_codes[last]
+                self._ids[row] = self._ids[last]
+                self._payloads[row] = self._payloads[last]
+                self._rows[point_key(self._ids[row])] = row
+            self._ids.pop()
+            self._payloads.pop()
+            return True
+
+    def versions(self) -> Dict[str, Any]:
+        """Each point's ``VERSION_FIELD``, keyed by canonical point id"""
+        with self._lock:
+            return {point_key(point_id): payload.get(VERSION_FIELD) for point_id, payload in zip(self._ids, self._payloads)}
+
+    def search(self, query_vector: Any, limit: int, category: Optional[str] = None) -> List[LocalPoint]:
+        """Top ``limit`` points by cosine similarity, optionally within one category"""
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).ravel())
+        with self._lock:
+            size = len(self._ids)
+            if category is None:
+                rows = np.arange(size)
+            else:
+                code = self._categories.get(category)
+                if code is None:
+                    return []
+                rows = np.flatnonzero(self._category_codes[:size] == code)
+            if rows.size == 0:
+                return []
+
+            # Score every row in place and mask afterwards, rather than copying the category's rows out
+            scores = (self._matrix[:size] @ query)[rows]
+            return [
+                LocalPoint(self._ids[rows[i]], float(scores[i]), self._payloads[rows[i]], self._matrix[rows[i]].copy())
+                for i in top_k_indices(scores, limit)
+            ]
+
+    def _grow(self, size: int):
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        codes = np.full(capacity, -1, dtype=np.int32)
+        codes[:len(self._ids)] = self._category_codes[:len(self._ids)]
+        self._matrix, self._category_codes = matrix, codes
+
+
+@dataclass
+class _IndexEntry:
+    index: Optional[LocalVectorIndex]
+    verified_at: float
+
+
+class LocalIndexRegistry:
+    """
+    Lazily loaded local indexes for one collection, one per owner.
+
+    An owner's index is bulk-loaded with scroll the first time it is needed
+    and kept in sync by the write hooks ``on_upsert``, ``on_delete`` and
+    ``on_payload``. Writes from other processes are caught by a version check
+    every ``verify_interval`` seconds: the point count in Qdrant is compared
+    with the index and, if it matches, each point's ``VERSION_FIELD`` stamp
+    too, so a delete plus insert or a rewrite of an existing point is seen
+    as well. The index is reloaded on any mismatch. Writes that arrive while
+    an index is being scrolled in are buffered and replayed onto it before it
+    is published. Owners with more than ``max_points`` items get no index,
+    and their searches go to Qdrant.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str, max_points: int = 2000,
+                 max_owners: int = 256, verify_interval: float = 30.0):
+        self.client = client
+        self.collection_name = collection_name
+        self.max_points = max_points
+        self.max_owners = max_owners
+        self.verify_interval = verify_interval
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Optional[str], threading.Lock] = {}
+        self._entries: "OrderedDict[Optional[str], _IndexEntry]" = OrderedDict()
+        # Write events seen while an owner's index is loading: (LocalVectorIndex method, args)
+        self._pending: Dict[Optional[str], List[Tuple[str, tuple]]] = {}
+
+    def get(self, owner_id: Optional[str] = None) -> Optional[LocalVectorIndex]:
+        """The owner's index, loading or re-verifying it if due; None means use Qdrant"""
+        with self._lock:
+            entry = self._entries.get(owner_id)
+            if entry is not None:
+                self._entries.move_to_end(owner_id)
+                if time.monotonic() - entry.verified_at < self.verify_interval:
+                    return entry.index
+            load_lock = self._load_locks.setdefault(owner_id, threading.Lock())
+
+        with load_lock:
+            # Another request may have refreshed the entry while we waited
+            with self._lock:
+                entry = self._entries.get(owner_id)
+            if entry is not None and time.monotonic() - entry.verified_at < self.verify_interval:
+                return entry.index
+
+            count = self._count(owner_id)
+            if (entry is not None and entry.index is not None and count == len(entry.index)
+                    and self._versions(owner_id) == entry.index.versions()):
+                entry.verified_at = time.monotonic()
+                return entry.index
+
+            with self._lock:
+                self._pending[owner_id] = []
+            try:
+                index = self._load(owner_id) if count <= self.max_points else None
+            except BaseException:
+                with self._lock:
+                    self._pending.pop(owner_id, None)
+                raise
+            with self._lock:
+                # Under the lock, so no write lands between the replay and the publish
+                for method, args in self._pending.pop(owner_id):
+                    if index is not None:
+                        getattr(index, method)(*args)
+                self._entries[owner_id] = _IndexEntry(index, time.monotonic())
+                self._entries.move_to_end(owner_id)
+                while len(self._entries) > self.max_owners:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._load_locks.pop(evicted, None)
+            return index
+
+    def on_upsert(self, points: Iterable[Dict[str, Any]]):
+        """Mirror upserted points into the indexes they belong to"""
+        for point in points:
+            payload = point["payload"]
+            event = ("upsert", (point["id"], point["vector"], payload))
+            for index in self._loaded(payload.get("owner_id"), event):
+                index.upsert(point["id"], point["vector"], payload)
+
+    def on_payload(self, point_id: Any, payload: Dict[str, Any]):
+        for index in self._loaded_all(("update_payload", (point_id, payload))):
+            index.update_payload(point_id, payload)
+
+    def on_delete(self, point_id: Any, owner_id: Optional[str] = None):
+        for index in self._loaded_all(("remove", (point_id, owner_id))):
+            index.remove(point_id, owner_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _loaded(self, owner_id: Optional[str], event: Tuple[str, tuple]) -> List[LocalVectorIndex]:
+        # The point shows up in its owner's index and in the unscoped one
+        owners = [owner_id, None] if owner_id is not None else [None]
+        with self._lock:
+            for owner in owners:
+                if owner in self._pending:
+                    self._pending[owner].append(event)
+            entries = [self._entries.get(owner) for owner in owners]
+        return [entry.index for entry in entries if entry is not None and entry.index is not None]
+
+    def _loaded_all(self, event: Tuple[str, tuple]) -> List[LocalVectorIndex]:
+        with self._lock:
+            for events in self._pending.values():
+                events.append(event)
+            return [entry.index for entry in self._entries.values() if entry.index is not None]
+
+    def _count(self, owner_id: Optional[str]) -> int:
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=_owner_filter(owner_id),
+            exact=True
+        ).count
+
+    def _versions(self, owner_id: Optional[str]) -> Dict[str, Any]:
+        versions = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=_owner_filter(owner_id),
+                limit=1024,
+                offset=offset,
+                with_payload=[VERSION_FIELD],
+                with_vectors=False
+            )
+            for point in points:
+                versions[point_key(point.id)] = (point.payload or {}).get(VERSION_FIELD)
+            if offset is None:
+                return versions
+
+    def _load(self, owner_id: Optional[str]) -> Optional[LocalVectorIndex]:
+        index = None
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=_owner_filter(owner_id),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            for point in points:
+                if index is None:
+                    index = LocalVectorIndex(dim=len(point.vector), capacity=len(points))
+                index.upsert(point.id, point.vector, point.payload or {})
+            if index is not None and len(index) > self.max_points:
+                # Grew past the threshold while loading
+                return None
+            if offset is None:
+                break
+
+        logger.info(f"Loaded local index for '{self.collection_name}' (owner {owner_id}): {len(index) if index else 0} points")
+        return index
+
+
+def _owner_filter(owner_id: Optional[str]) -> Optional[Filter]:
+    if owner_id is None:
+        return None
+    return Filter(must=[FieldCondition(key="owner_id", match=MatchValue(value=owner_id))])
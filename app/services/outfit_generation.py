@@ -1,75 +1,147 @@
-import numpy as np
+import asyncio
+from typing import Dict, List, Optional, Sequence
 
-from app.services.vector_db import VectorDatabase
-from app.utils.embeddings import embed_text
+from app.services.async_vector_db import AsyncVectorDatabase
 from app.models.schemas import ClothingItem, Outfit
+from app.services.outfit_search import (
+    beam_search_outfits, mmr_rerank, DEFAULT_BEAM_WIDTH, DEFAULT_DIVERSITY, DEFAULT_RERANK_POOL
+)
+from app.utils.vector_ops import stack_vectors, normalize_rows
+from app.utils.metrics import stage
 
-def generate_outfit(query: str, vector_db: VectorDatabase, limit: int = 3):
-    query_embedding = embed_text(query, vector_db.processor, vector_db.model)
-    
-    # Get top candidates
-    tops = vector_db.get_items_by_category("top", query_embedding, limit)
-    # Get bottom candidates
-    bottoms = vector_db.get_items_by_category("bottom", query_embedding, limit)
-    
-    if not tops or not bottoms:
+DEFAULT_CANDIDATE_POOL = 200
+# Bounds the routes enforce; candidates are fetched and scored as dense matrices
+MAX_CANDIDATE_POOL = 1000
+MAX_OUTFIT_LIMIT = 50
+DEFAULT_CATEGORIES = ("top", "bottom")
+
+async def generate_outfit_async(query: str, vector_db: AsyncVectorDatabase, limit: int = 3, candidate_pool: int = DEFAULT_CANDIDATE_POOL,
+                                owner_id: Optional[str] = None, categories: Optional[Sequence[str]] = None,
+                                category_limits: Optional[Dict[str, int]] = None, beam_width: Optional[int] = None,
+                                diversity: Optional[float] = None, max_item_reuse: Optional[int] = None):
+    """
+    Generate the top ``limit`` outfits for a query.
+
+    An outfit has one item from each of ``categories`` (top and bottom by
+    default). ``candidate_pool`` controls how many items per category are
+    retrieved and scored against each other, independently of how many
+    outfits are returned; ``category_limits`` overrides it per category, and
+    every category's candidates are fetched concurrently. With ``owner_id``,
+    only that owner's items are considered. ``diversity`` and
+    ``max_item_reuse`` control the re-ranking that keeps results from
+    repeating the same items.
+    """
+    categories = _resolve_categories(categories)
+    pools = _candidate_pools(categories, limit, candidate_pool, category_limits)
+    query_embedding = await vector_db.embed_text(query)
+
+    candidates = await asyncio.gather(*(
+        vector_db.get_items_by_category(category, query_embedding, pool, owner_id=owner_id)
+        for category, pool in zip(categories, pools)
+    ))
+    if not all(candidates):
         return []
-    
-    # Score and get outfit pairs
-    return _score_outfit_combinations(query_embedding, tops, bottoms, query, limit)
-
-def _score_outfit_combinations(query_embedding, tops, bottoms, query, limit: int = 3, ):
-    """Score outfit combinations based on coherence and query relevance"""
-    pair_scores = []
-    for top in tops:
-        for bottom in bottoms:
-            top_vector = np.array(top.vector)
-            bottom_vector = np.array(bottom.vector)
-            
-            coherence = _cosine_similarity(top_vector, bottom_vector)
-            query_relevance = (
-                _cosine_similarity(query_embedding, top_vector) +
-                _cosine_similarity(query_embedding, bottom_vector)
-            ) / 2
-            
-            # Prepare payload with item IDs
-            top_payload = top.payload.copy() if hasattr(top, 'payload') else {}
-            bottom_payload = bottom.payload.copy() if hasattr(bottom, 'payload') else {}
-            top_payload['id'] = top.id
-            bottom_payload['id'] = bottom.id
-            
-            score = 0.5 * query_relevance + 0.5 * coherence
-            
-            # Create proper ClothingItem objects
-            top_item = ClothingItem(
-                id=top.id,
-                name=top_payload.get('name', f"Item {top.id}"),
-                tags=top_payload.get('tags', []),
-                category='top'
-            )
-            
-            bottom_item = ClothingItem(
-                id=bottom.id,
-                name=bottom_payload.get('name', f"Item {bottom.id}"),
-                tags=bottom_payload.get('tags', []),
-                category='bottom'
-            )
-            
-            # Create Outfit object
-            outfit = Outfit(
-                score=score,
-                top=top_item,
-                bottom=bottom_item,
-                prompt=query
+
+    return _score_outfits(query_embedding, categories, candidates, query, limit, beam_width, diversity, max_item_reuse)
+
+async def generate_outfits_batch_async(queries: List[str], vector_db: AsyncVectorDatabase, limit: int = 3,
+                                       candidate_pool: int = DEFAULT_CANDIDATE_POOL,
+                                       owner_id: Optional[str] = None, categories: Optional[Sequence[str]] = None,
+                                       category_limits: Optional[Dict[str, int]] = None,
+                                       beam_width: Optional[int] = None, diversity: Optional[float] = None,
+                                       max_item_reuse: Optional[int] = None) -> Dict[str, List[Outfit]]:
+    """
+    Generate outfits for many queries at once, keyed by query.
+
+    All queries are embedded in one pass and all of their category searches
+    go to Qdrant as a single batch request; only the outfit search runs per
+    query.
+    """
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return {}
+    categories = _resolve_categories(categories)
+    pools = _candidate_pools(categories, limit, candidate_pool, category_limits)
+
+    query_embeddings = await vector_db.embed_texts(queries)
+    searches = [
+        (category, query_embedding)
+        for query_embedding in query_embeddings
+        for category in categories
+    ]
+    # One limit per batch request; categories with a smaller pool are trimmed below
+    found = await vector_db.get_items_by_category_batch(searches, max(pools), owner_id=owner_id)
+
+    results = {}
+    for index, (query, query_embedding) in enumerate(zip(queries, query_embeddings)):
+        offset = index * len(categories)
+        candidates = [found[offset + i][:pool] for i, pool in enumerate(pools)]
+        if not all(candidates):
+            results[query] = []
+        else:
+            results[query] = _score_outfits(
+                query_embedding, categories, candidates, query, limit, beam_width, diversity, max_item_reuse
             )
-            
-            pair_scores.append(outfit)
+    return results
+
+def _resolve_categories(categories: Optional[Sequence[str]]) -> List[str]:
+    # Keep the caller's order, which sets the order the beam search adds categories in
+    return list(dict.fromkeys(categories)) if categories else list(DEFAULT_CATEGORIES)
+
+def _candidate_pools(categories: List[str], limit: int, candidate_pool: Optional[int],
+                     category_limits: Optional[Dict[str, int]]) -> List[int]:
+    default = candidate_pool or DEFAULT_CANDIDATE_POOL
+    return [max((category_limits or {}).get(category) or default, limit, 1) for category in categories]
+
+def _score_outfits(query_embedding, categories: List[str], candidates: List[list], query: str, limit: int = 3,
+                   beam_width: Optional[int] = None, diversity: Optional[float] = None,
+                   max_item_reuse: Optional[int] = None) -> List[Outfit]:
+    """
+    Score outfits on coherence and query relevance.
+
+    Candidates are scored as whole matrices and combined with a beam search,
+    so cost grows linearly with the number of categories; for top and bottom
+    every pair is scored. When ``diversity`` is above 0 or there is a reuse
+    cap, the best ``DEFAULT_RERANK_POOL`` outfits are re-ranked with MMR so
+    the results don't all share one item; otherwise they are in score
+    order. Response objects are only built for the ``limit`` winning
+    outfits.
+    """
+    diversity = DEFAULT_DIVERSITY if diversity is None else diversity
+    rerank = diversity > 0 or bool(max_item_reuse)
 
-    pair_scores.sort(key=lambda x: x.score, reverse=True)
-    return pair_scores[:limit]
+    with stage("score"):
+        query_vector = normalize_rows(query_embedding)
+        matrices = [normalize_rows(stack_vectors(point.vector for point in points)) for points in candidates]
+        relevance = [matrix @ query_vector for matrix in matrices]
+        pool = max(limit, DEFAULT_RERANK_POOL) if rerank else limit
+        scores, combos = beam_search_outfits(matrices, relevance, pool, beam_width or DEFAULT_BEAM_WIDTH)
 
-def _cosine_similarity(vec1, vec2):
-    """Calculate cosine similarity between two vectors"""
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    if rerank:
+        with stage("rerank"):
+            order = mmr_rerank(scores, combos, matrices, limit, diversity, max_item_reuse)
+            scores, combos = scores[order], combos[order]
 
+    outfits = []
+    for score, combo in zip(scores, combos):
+        items = {
+            category: _to_clothing_item(points[index], category)
+            for category, points, index in zip(categories, candidates, combo)
+        }
+        outfits.append(Outfit(
+            score=float(score),
+            top=items.get('top'),
+            bottom=items.get('bottom'),
+            items=items,
+            prompt=query
+        ))
+    return outfits
 
+def _to_clothing_item(point, category: str) -> ClothingItem:
+    payload = getattr(point, 'payload', None) or {}
+    return ClothingItem(
+        id=point.id,
+        name=payload.get('name', f"Item {point.id}"),
+        tags=payload.get('tags', []),
+        category=category
+    )
@@ -0,0 +1,152 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.vector_ops import top_k_indices
+
+
+DEFAULT_BEAM_WIDTH = 256
+MAX_BEAM_WIDTH = 4096
+# Re-ranking is opt-in, so by default outfits come back in score order
+DEFAULT_DIVERSITY = 0.0
+# Outfits the beam search hands to the diversity re-ranking
+DEFAULT_RERANK_POOL = 500
+
+
+def beam_search_outfits(
+    matrices: Sequence[np.ndarray],
+    relevance: Sequence[np.ndarray],
+    limit: int,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    relevance_weight: float = 0.5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the best-scoring outfits with one item from each category.
+
+    An outfit's score is ``relevance_weight`` times the mean query relevance
+    of its items plus the rest times the mean pairwise cosine coherence. For
+    two categories this is the usual top/bottom pair score.
+
+    Categories are added one at a time, keeping the ``beam_width`` best
+    partial outfits. Each state carries the sum of its chosen item vectors.
+    By linearity, a candidate's coherence with all items chosen so far is
+    one dot product with that sum, so each step is a single
+    (beam x dim) @ (dim x candidates) matmul whatever the depth. The first
+    category is kept whole, so two categories are scored exhaustively.
+
+    Args:
+        matrices: L2-normalized (N_i, D) candidate vectors per category
+        relevance: (N_i,) query relevance of each candidate
+        limit: Number of outfits to return
+        beam_width: Partial outfits kept between categories
+
+    Returns:
+        Scores (K,) best first and the chosen candidate index per category (K, len(matrices))
+    """
+    k = len(matrices)
+    if k == 0 or any(len(scores) == 0 for scores in relevance):
+        return np.empty(0, dtype=np.float32), np.empty((0, k), dtype=np.intp)
+
+    relevance_scale = relevance_weight / k
+    pairs = k * (k - 1) // 2
+    coherence_scale = (1 - relevance_weight) / pairs if pairs else 0.0
+    beam_width = max(beam_width, limit)
+
+    # Every candidate of the first category starts a partial outfit
+    beam = np.arange(len(relevance[0]), dtype=np.intp)[:, None]
+    totals = relevance_scale * np.asarray(relevance[0], dtype=np.float32)
+    context = np.asarray(matrices[0], dtype=np.float32)
+
+    for depth in range(1, k):
+        # (B, N): score of extending each partial outfit with each candidate
+        extension = context @ matrices[depth].T
+        extension *= coherence_scale
+        extension += totals[:, None]
+        extension += relevance_scale * relevance[depth][None, :]
+
+        width = beam_width if depth < k - 1 else limit
+        winners = top_k_indices(extension.ravel(), width)
+        parents, children = np.unravel_index(winners, extension.shape)
+        beam = np.column_stack([beam[parents], children])
+        totals = extension[parents, children]
+        context = context[parents] + matrices[depth][children]
+
+    order = top_k_indices(totals, limit)
+    return totals[order], beam[order]
+
+
+def mmr_rerank(
+    scores: np.ndarray,
+    combos: np.ndarray,
+    matrices: Sequence[np.ndarray],
+    limit: int,
+    diversity: float = DEFAULT_DIVERSITY,
+    max_item_reuse: Optional[int] = None
+) -> np.ndarray:
+    """
+    Pick ``limit`` outfits by maximal marginal relevance.
+
+    Each pick maximizes ``(1 - diversity) * score - diversity * max_sim``,
+    where ``max_sim`` is the candidate's highest similarity to an outfit
+    already picked. Outfit similarity is the mean cosine similarity of
+    their items, category by category, read from per-category item
+    similarity matrices computed once up front. After each pick, ``max_sim``
+    is updated for every candidate with one vectorized row gather per
+    category, so a pick costs O(candidates x categories) and no Python loop
+    runs over candidates. With ``max_item_reuse``, an item already used
+    that many times rules out every remaining candidate containing it.
+
+    Args:
+        scores: (M,) outfit scores
+        combos: (M, K) candidate index per category, as from ``beam_search_outfits``
+        matrices: L2-normalized (N_i, D) candidate vectors per category
+        limit: Number of outfits to pick
+        diversity: 0 ranks by score alone, 1 by novelty alone
+
+    Returns:
+        Indices into ``scores``/``combos`` in pick order
+    """
+    count, k = combos.shape
+    if count == 0 or limit <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Item similarities among just the items that appear in some candidate
+    codes = []
+    similarities = []
+    for category in range(k):
+        items, inverse = np.unique(combos[:, category], return_inverse=True)
+        vectors = matrices[category][items]
+        codes.append(inverse.ravel())
+        similarities.append(vectors @ vectors.T)
+
+    relevance = (1 - diversity) * np.asarray(scores, dtype=np.float32)
+    # Cosine is at least -1, so this is neutral until the first pick
+    max_similarity = np.full(count, -1.0, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    reuse = [np.zeros(len(similarity), dtype=np.intp) for similarity in similarities]
+    picked = []
+
+    for _ in range(min(limit, count)):
+        marginal = relevance - diversity * max_similarity
+        marginal[~available] = -np.inf
+        best = int(np.argmax(marginal))
+        if not available[best]:
+            break
+        picked.append(best)
+        available[best] = False
+
+        similarity = np.zeros(count, dtype=np.float32)
+        for category in range(k):
+            # Similarity matrices are symmetric, so read the picked item's row
+            similarity += similarities[category][codes[category][best]][codes[category]]
+        similarity /= k
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+        if max_item_reuse:
+            for category in range(k):
+                item = codes[category][best]
+                reuse[category][item] += 1
+                if reuse[category][item] >= max_item_reuse:
+                    available &= codes[category] != item
+
+    return np.asarray(picked, dtype=np.intp)
@@ -0,0 +1,84 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class PointCache:
+    """
+    LRU of retrieved points with a time-to-live.
+
+    Writes in this process invalidate the points they touch; the TTL bounds
+    how long a write made by another worker can go unnoticed.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, point_id: Any) -> Optional[Any]:
+        key = point_key(point_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_many(self, point_ids: Iterable[Any]) -> Tuple[Dict[str, Any], List[Any]]:
+        """Split ids into cached points (by key) and the ids that need fetching"""
+        found = {}
+        missing = []
+        for point_id in point_ids:
+            point = self.get(point_id)
+            if point is None:
+                missing.append(point_id)
+            else:
+                found[point_key(point_id)] = point
+        return found, missing
+
+    def put(self, point: Any):
+        key = point_key(point.id)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), point)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, point_ids: Iterable[Any]):
+        with self._lock:
+            for point_id in point_ids:
+                self._entries.pop(point_key(point_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def point_key(point_id: Any) -> str:
+    """Canonical cache key, so '1B4E...' and '1b4e...' refer to the same UUID point"""
+    if isinstance(point_id, int):
+        return str(point_id)
+    try:
+        return str(uuid.UUID(str(point_id)))
+    except ValueError:
+        return str(point_id)
@@ -0,0 +1,86 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from app.utils.logging import logger
+
+
+@dataclass
+class QdrantSettings:
+    host: Optional[str]
+    api_key: Optional[str]
+    prefer_grpc: bool = False
+    grpc_port: int = 6334
+    timeout: int = 10
+    pool_size: int = 32
+    max_retries: int = 3
+    retry_base_delay: float = 0.1
+    retry_max_delay: float = 2.0
+
+
+def _client_kwargs(settings: QdrantSettings) -> dict:
+    return {
+        "url": settings.host,
+        "api_key": settings.api_key,
+        "prefer_grpc": settings.prefer_grpc,
+        "grpc_port": settings.grpc_port,
+        "timeout": settings.timeout,
+        # Passed through to the underlying httpx client for REST calls
+        "limits": httpx.Limits(
+            max_connections=settings.pool_size,
+            max_keepalive_connections=settings.pool_size
+        ),
+    }
+
+
+def create_client(settings: QdrantSettings) -> QdrantClient:
+    """Create a synchronous client whose connection pool is shared by every collection"""
+    return QdrantClient(**_client_kwargs(settings))
+
+
+def create_async_client(settings: QdrantSettings) -> AsyncQdrantClient:
+    """Create an async client whose connection pool is shared by every collection"""
+    return AsyncQdrantClient(**_client_kwargs(settings))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport errors, 429s and 5xx responses are worth retrying"""
+    if isinstance(error, (ResponseHandlingException, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 429 or error.status_code >= 500
+
+    try:
+        import grpc
+    except ImportError:
+        return False
+    if isinstance(error, grpc.RpcError):
+        return error.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+    return False
+
+
+async def with_retry(
+    fn: Callable[..., Awaitable[Any]],
+    *args,
+    max_retries: int = 3,
+    base_delay: float = 0.1,
+    max_delay: float = 2.0,
+    **kwargs
+) -> Any:
+    """Await ``fn`` and retry retryable failures with full-jitter exponential backoff"""
+    attempt = 0
+    while True:
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            logger.warning(f"Qdrant call {getattr(fn, '__name__', fn)} failed ({e}); retry {attempt}/{max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,85 @@
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.utils.logging import logger
+from app.utils.vector_ops import normalize_rows, top_k_indices
+
+
+class TagClassifier:
+    """
+    In-process tag scorer backed by a snapshot of the tags collection.
+
+    The tag vocabulary is loaded once into a contiguous, L2-normalized float32
+    matrix; tagging is a single matmul plus ``argpartition`` instead of a
+    Qdrant round-trip per upload. Call ``refresh`` to reload the vocabulary.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str = "tags", top_k: int = 5):
+        self.client = client
+        self.collection_name = collection_name
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._matrix is not None
+
+    def refresh(self) -> int:
+        """Reload the tag vocabulary from Qdrant and return the number of tags"""
+        labels = []
+        vectors = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            for point in points:
+                labels.append(point.payload['tag'])
+                vectors.append(point.vector)
+            if offset is None:
+                break
+
+        if not vectors:
+            logger.warning(f"Tags collection '{self.collection_name}' is empty")
+        matrix = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1 if vectors else 0))
+
+        # Swap atomically so concurrent taggers see either the old or new snapshot
+        with self._lock:
+            self._matrix = matrix
+            self._labels = labels
+
+        logger.info(f"Loaded {len(labels)} tags from '{self.collection_name}'")
+        return len(labels)
+
+    def tag(self, image_embedding: np.ndarray, k: Optional[int] = None) -> List[str]:
+        """Return the top-k tags for a single image embedding"""
+        return self.tag_batch(np.asarray(image_embedding)[None, :], k)[0]
+
+    def tag_batch(self, image_embeddings: np.ndarray, k: Optional[int] = None) -> List[List[str]]:
+        """Return the top-k tags for each row of an (N, D) embedding matrix"""
+        matrix, labels = self._snapshot()
+        embeddings = np.asarray(image_embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[None, :]
+        k = min(k or self.top_k, len(labels))
+        if k == 0:
+            return [[] for _ in range(len(embeddings))]
+
+        scores = embeddings @ matrix.T
+        top_indices = top_k_indices(scores, k)
+        return [[labels[i] for i in row] for row in top_indices]
+
+    def _snapshot(self) -> Tuple[np.ndarray, List[str]]:
+        with self._lock:
+            if self._matrix is None:
+                raise RuntimeError("Tag vocabulary not loaded")
+            return self._matrix, self._labels
@@ -1,174 +1,491 @@
 from qdrant_client import QdrantClient
-from fastapi import APIRouter, UploadFile, File, Request
-from qdrant_client.models import Filter, FieldCondition, MatchValue, PointStruct
+from fastapi import UploadFile
+from qdrant_client.models import (
+    Distance, Filter, FieldCondition, FilterSelector, HasIdCondition, MatchValue, PayloadSchemaType, PointStruct, SetPayload,
+    SetPayloadOperation, VectorParams
+)
 
-from typing import Literal, Any
+from typing import Any, Optional, List, Tuple, Iterator, Iterable, Dict, Union
+import base64
+import json
+import time
 import numpy as np  
 
-from app.utils.embeddings import embed_image
+from app.utils.embeddings import embed_image, embed_text, embed_images
+from app.utils.preprocessing import PreprocessConfig, decode_image, preprocess_image
+from app.services.inference_engine import InferenceEngine
+from app.services.tag_classifier import TagClassifier
+from app.services.dedup import EmbeddingStore, content_hash, perceptual_hash
+from app.services.local_index import LocalIndexRegistry, VERSION_FIELD
+from app.services.point_cache import PointCache, point_key
+from app.utils.thumbnails import pick_thumbnail
+from app.models.schemas import Category
+from app.utils.logging import logger
+from app.utils.metrics import stage
+
+
+# Payload fields that filtered queries use; indexed so filters stay fast as collections grow
+PAYLOAD_INDEXES = {
+    "category": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "store": PayloadSchemaType.KEYWORD,
+    "price": PayloadSchemaType.INTEGER,
+    "owner_id": PayloadSchemaType.KEYWORD,
+    "content_hash": PayloadSchemaType.KEYWORD,
+}
 
 
 class VectorDatabase:
-    def __init__(self, host: str, api_key: str, collection_name: str, model: Any, processor: Any):
-        self.client = QdrantClient(url=host, api_key=api_key)
+    def __init__(self, host: str, api_key: str, collection_name: str, model: Any, processor: Any,
+                 engine: Optional[InferenceEngine] = None, tag_classifier: Optional[TagClassifier] = None,
+                 tags_collection: str = 'tags', client: Optional[QdrantClient] = None,
+                 embedding_store: Optional[EmbeddingStore] = None, perceptual_hashing: bool = False,
+                 local_index: Optional[LocalIndexRegistry] = None, point_cache: Optional[PointCache] = None):
+        # Pass a shared client so every collection uses the same connection pool
+        self.client = client if client is not None else QdrantClient(url=host, api_key=api_key)
         self.collection_name = collection_name
         self.model = model
         self.processor = processor
+        self.engine = engine
+        self.tag_classifier = tag_classifier
+        self.tags_collection = tags_collection
+        self.embedding_store = embedding_store
+        self.perceptual_hashing = perceptual_hashing
+        # Answers small category searches in-process; kept in sync by the write methods below
+        self.local_index = local_index
+        # Retrieved points, invalidated by every write to this collection
+        self.point_cache = point_cache
 
-    def upload_clothing(self, file: UploadFile, name: str, category: Literal['top', 'bottom'], point_id: str) -> int:
-        """Upload clothing and returns point id"""
-        # Check if we're dealing with a standard file object or an UploadFile
-        if hasattr(file, 'file'):
-            # It's an UploadFile from FastAPI
-            image = file.file.read()
-        else:
-            # It's a standard file object (like from open())
-            image = file.read()
-        
-        image_embedding = embed_image(image, self.processor, self.model)
-        tags = self._get_tags(image_embedding)
+    def embed_image(self, image: bytes) -> np.ndarray:
+        """Embed an image, batching with concurrent requests when an inference engine is attached"""
+        if self.engine is not None:
+            return self.engine.embed_image(image)
+        return embed_image(image, self.processor, self.model)
 
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[
-                {
-                    "id": point_id,
-                    'vector': image_embedding.tolist(),
-                    "payload": {
-                    "name": name,
-                    "category": category,
-                    "tags": tags,
-                    }
-                },
-            ]
+    def embed_images(self, images: List[Any]) -> np.ndarray:
+        """Embed many images; with an engine attached they are grouped into its batches"""
+        if self.engine is not None:
+            futures = [self.engine.submit_image(image) for image in images]
+            return np.stack([future.result() for future in futures])
+        return embed_images(images, self.processor, self.model)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """Embed a text query, batching with concurrent requests when an inference engine is attached"""
+        if self.engine is not None:
+            return self.engine.embed_text(text)
+        return embed_text(text, self.processor, self.model)
+
+    def ensure_collection(self, vector_size: int, payload_indexes: Optional[Dict[str, PayloadSchemaType]] = None):
+        """Create this collection and its payload indexes if they don't exist yet"""
+        provision_collection(
+            self.client, self.collection_name, vector_size,
+            PAYLOAD_INDEXES if payload_indexes is None else payload_indexes
         )
-        return point_id
+
+    def upload_clothing(self, file: Union[UploadFile, bytes], name: str, category: Category, point_id: str,
+                        image_hash: Optional[str] = None, reuse_existing: bool = False,
+                        extra_payload: Optional[Dict[str, Any]] = None, owner_id: Optional[str] = None) -> int:
+        """Upload clothing and returns point id (the existing point's id if reuse_existing matched a duplicate)"""
+        image = _read_image(file)
+        payload = {
+            **(extra_payload or {}),
+            "name": name,
+            "category": category,
+        }
+        if owner_id is not None:
+            payload["owner_id"] = owner_id
+        return self._upload_point(image, payload, point_id, image_hash, reuse_existing)
     
-    def upload_marketplace_clothing(self, file: UploadFile, name: str, category: Literal['top', 'bottom'], point_id: str, price: int, store: str) -> int:
-        """Upload clothing and returns point id"""
-        # Check if we're dealing with a standard file object or an UploadFile
-        if hasattr(file, 'file'):
-            # It's an UploadFile from FastAPI
-            image = file.file.read()
+    def upload_marketplace_clothing(self, file: Union[UploadFile, bytes], name: str, category: Category, point_id: str, price: int, store: str,
+                                    image_hash: Optional[str] = None, reuse_existing: bool = False,
+                                    extra_payload: Optional[Dict[str, Any]] = None) -> int:
+        """Upload clothing and returns point id (the existing point's id if reuse_existing matched a duplicate)"""
+        image = _read_image(file)
+        payload = {
+            **(extra_payload or {}),
+            "name": name,
+            "category": category,
+            "price": price,
+            "store": store,
+        }
+        return self._upload_point(image, payload, point_id, image_hash, reuse_existing)
+
+    def _upload_point(self, image: bytes, payload: Dict[str, Any], point_id: str,
+                      image_hash: Optional[str] = None, reuse_existing: bool = False) -> str:
+        """
+        Embed, tag and upsert a single image, skipping inference for duplicates
+
+        Uploads are keyed by the SHA-256 of their bytes. A hash already in the
+        embedding store reuses that embedding and tags; the store is the only
+        place looked at, so a new image costs no extra Qdrant round trip. With
+        reuse_existing, an identical image already in this collection is
+        returned instead of creating a copy.
+        """
+        image_hash = image_hash or content_hash(image)
+
+        if reuse_existing:
+            # Scoped to the uploader, so reuse_existing never hands back another owner's item
+            with stage("dedup_lookup", self.collection_name):
+                existing = self.find_by_content_hash(image_hash, owner_id=payload.get("owner_id"))
+            if existing is not None:
+                return existing.id
+
+        cached = self.embedding_store.get(image_hash) if self.embedding_store is not None else None
+        if cached is not None:
+            image_embedding, tags = cached
         else:
-            # It's a standard file object (like from open())
-            image = file.read()
-        
-        image_embedding = embed_image(image, self.processor, self.model)
-        tags = self._get_tags(image_embedding)
+            with stage("embed_image", self.collection_name):
+                image_embedding = self.embed_image(image)
+            with stage("tag", self.collection_name):
+                tags = self._get_tags(image_embedding)
 
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=[
-                {
-                    "id": point_id,
-                    'vector': image_embedding.tolist(),
-                    "payload": {
-                    "name": name,
-                    "category": category,
-                    "tags": tags,
-                    "price": price,
-                    "store": store,
-                    }
-                },
-            ]
-        )
+        if self.embedding_store is not None:
+            self.embedding_store.put(image_hash, image_embedding, tags)
+
+        payload = {**payload, "tags": tags, "content_hash": image_hash, VERSION_FIELD: time.time()}
+        if self.perceptual_hashing:
+            # The same draft-decoded, EXIF-transposed image upload_batch hashes
+            payload["perceptual_hash"] = perceptual_hash(decode_image(image, self._decode_size()))
+
+        with stage("upsert", self.collection_name):
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    PointStruct(
+                        id=point_id,
+                        vector=image_embedding.tolist(),
+                        payload=payload
+                    ),
+                ]
+            )
+        self._on_write([point_id])
+        if self.local_index is not None:
+            self.local_index.on_upsert([{"id": point_id, "vector": image_embedding, "payload": payload}])
         return point_id
+
+    def find_by_content_hash(self, image_hash: str, with_vectors: bool = False, owner_id: Optional[str] = None):
+        """Return a point in this collection whose image has the given content hash, or None"""
+        try:
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scoped_filter(owner_id, content_hash=image_hash),
+                limit=1,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            return points[0] if points else None
+        except Exception as e:
+            logger.warning(f"Error looking up content hash {image_hash}: {str(e)}")
+            return None
     
-    def retrieve_collection(self) -> list:
-        """Returns array of items in the collection"""
-        points = self.client.scroll(
+    def upload_batch(self, images: List[bytes], payloads: List[Dict[str, Any]], point_ids: List[str],
+                     upsert_chunk_size: int = 64, hashes: Optional[List[str]] = None) -> List[Optional[str]]:
+        """
+        Embed, tag and upsert many items at once
+
+        Images already in the embedding store skip inference, and identical
+        images within the batch are decoded and embedded once; the rest are
+        decoded, embedded and tagged in batches. Decoding runs in the calling
+        thread, which is already a slot on the bounded CPU pool. Points are
+        written with chunked multi-point upserts.
+
+        Args:
+            images: Raw image bytes, one per item
+            payloads: Payload for each item (tags are added here)
+            point_ids: Point ID for each item
+            upsert_chunk_size: Maximum number of points per upsert call
+            hashes: Content hash of each image if already known (e.g. computed while streaming it to disk)
+
+        Returns:
+            One entry per item: None on success, otherwise the error message
+        """
+        errors: List[Optional[str]] = [None] * len(images)
+        if hashes is None:
+            hashes = [content_hash(image) for image in images]
+        results: Dict[int, Tuple[np.ndarray, List[str]]] = {}
+
+        pending = []
+        # Index of each later copy of an image -> the first copy, whose results it shares
+        first_seen: Dict[str, int] = {}
+        copies: Dict[int, int] = {}
+        for index, image_hash in enumerate(hashes):
+            cached = self.embedding_store.get(image_hash) if self.embedding_store is not None else None
+            if cached is not None:
+                results[index] = cached
+            elif image_hash in first_seen:
+                copies[index] = first_seen[image_hash]
+            else:
+                first_seen[image_hash] = index
+                pending.append(index)
+
+        preprocess_config = PreprocessConfig.from_processor(self.processor)
+        min_size = self._decode_size(preprocess_config)
+
+        def decode(image):
+            # Decode once; the pixel array feeds the model and the PIL image the perceptual hash
+            try:
+                decoded_image = decode_image(image, min_size)
+                pixels = preprocess_image(decoded_image, self.processor, preprocess_config)
+                image_phash = perceptual_hash(decoded_image) if self.perceptual_hashing else None
+                return (pixels, image_phash), None
+            except Exception as e:
+                return None, f"Could not decode image: {e}"
+
+        with stage("decode", self.collection_name):
+            decoded = {index: decode(images[index]) for index in pending}
+
+        ready = []
+        for index in pending:
+            image, error = decoded[index]
+            if error is not None:
+                errors[index] = error
+            else:
+                ready.append(index)
+
+        if ready:
+            try:
+                with stage("embed_image", self.collection_name):
+                    embeddings = self.embed_images([decoded[i][0][0] for i in ready])
+                with stage("tag", self.collection_name):
+                    tags = self._get_tags_batch(embeddings)
+            except Exception as e:
+                for index in ready:
+                    errors[index] = f"Embedding failed: {e}"
+            else:
+                for index, embedding, item_tags in zip(ready, embeddings, tags):
+                    results[index] = (embedding, item_tags)
+                    if self.embedding_store is not None:
+                        self.embedding_store.put(hashes[index], embedding, item_tags)
+
+        for index, first in copies.items():
+            if first in results:
+                results[index] = results[first]
+            else:
+                errors[index] = errors[first]
+
+        points = []
+        point_indices = []
+        updated_at = time.time()
+        for index in sorted(results):
+            embedding, item_tags = results[index]
+            payload = {**payloads[index], "tags": item_tags, "content_hash": hashes[index], VERSION_FIELD: updated_at}
+            decoded_index = copies.get(index, index)
+            if self.perceptual_hashing and decoded_index in decoded:
+                payload["perceptual_hash"] = decoded[decoded_index][0][1]
+            points.append({
+                "id": point_ids[index],
+                "vector": np.asarray(embedding).tolist(),
+                "payload": payload,
+            })
+            point_indices.append(index)
+
+        for start in range(0, len(points), upsert_chunk_size):
+            try:
+                with stage("upsert", self.collection_name):
+                    self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=[PointStruct(**point) for point in points[start:start + upsert_chunk_size]]
+                    )
+            except Exception as e:
+                for index in point_indices[start:start + upsert_chunk_size]:
+                    errors[index] = f"Upsert failed: {e}"
+            else:
+                self._on_write(point["id"] for point in points[start:start + upsert_chunk_size])
+                if self.local_index is not None:
+                    self.local_index.on_upsert(points[start:start + upsert_chunk_size])
+
+        return errors
+
+    def _decode_size(self, preprocess_config: Optional[PreprocessConfig] = None) -> int:
+        """Shortest edge images are decoded at, so both upload paths hash the same pixels"""
+        preprocess_config = preprocess_config or PreprocessConfig.from_processor(self.processor)
+        return preprocess_config.shortest_edge if preprocess_config is not None else 0
+
+    def retrieve_collection(self, owner_id: Optional[str] = None) -> list:
+        """Returns array of all items in the collection"""
+        return list(self.iter_collection(owner_id=owner_id))
+
+    def retrieve_page(self, page_size: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None,
+                      owner_id: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """
+        Retrieve one page of items using Qdrant scroll offsets
+
+        Args:
+            page_size: Maximum number of items to return
+            cursor: Opaque token from a previous page, None for the first page
+            fields: Payload fields to include, None for the default listing fields
+            owner_id: Only list this owner's items, None for the whole collection
+
+        Returns:
+            The page of items and the cursor for the next page (None when exhausted)
+        """
+        points, next_offset = self.client.scroll(
             collection_name=self.collection_name,
-            limit=100,
-        )[0]
-
-        wardrobe_items = []
-
-        for point in points:
-            item = {
-                "id": point.id,
-                "name": point.payload.get("name", "Unnamed Item"),
-                "category": point.payload.get("category", "uncategorized"),
-                "tags": point.payload.get("tags", [])
-            }
-            wardrobe_items.append(item)
-        
-        return wardrobe_items
+            scroll_filter=scoped_filter(owner_id),
+            limit=page_size,
+            offset=decode_cursor(cursor),
+            with_payload=fields if fields is not None else True,
+            with_vectors=False,
+        )
+        items = [format_point(point, fields) for point in points]
+        return items, encode_cursor(next_offset)
+
+    def iter_collection(self, fields: Optional[List[str]] = None, page_size: int = 256, owner_id: Optional[str] = None) -> Iterator[dict]:
+        """Yield every item in the collection, scrolling one page at a time"""
+        cursor = None
+        while True:
+            items, cursor = self.retrieve_page(page_size, cursor, fields, owner_id)
+            yield from items
+            if cursor is None:
+                break
 
-    def get_items_by_category(self, category: str, query_embedding: np.ndarray, limit: int = 5, collection_name: str = None):
-        """Get items by category with similarity search"""
+    def get_items_by_category(self, category: str, query_embedding: np.ndarray, limit: int = 5, collection_name: str = None,
+                              owner_id: Optional[str] = None):
+        """Get items by category with similarity search, optionally limited to one owner's items"""
         try:
             if collection_name == None:
                 collection_name = self.collection_name
 
+            if self.local_index is not None and collection_name == self.collection_name:
+                index = self.local_index.get(owner_id)
+                if index is not None:
+                    with stage("local_query", collection_name):
+                        return index.search(query_embedding, limit, category)
+
             if isinstance(query_embedding, np.ndarray):
                 query_vector = query_embedding.tolist()
             else:
                 query_vector = query_embedding
 
-            
-            
-            return self.client.query_points(
-                collection_name=collection_name,
-                query=query_vector,
-                query_filter=Filter(
-                    must=[FieldCondition(key="category", match=MatchValue(value=category))]
-                ),
-                with_vectors=True,
-                with_payload=True,
-                limit=limit
-            ).points
+            with stage("query", collection_name):
+                return self.client.query_points(
+                    collection_name=collection_name,
+                    query=query_vector,
+                    query_filter=scoped_filter(owner_id, category=category),
+                    with_vectors=True,
+                    with_payload=True,
+                    limit=limit
+                ).points
         except Exception as e:
             raise Exception(f"Error querying items: {str(e)}")
         
-    def get_items_by_id(self, item_id: str):
+    def get_items_by_id(self, item_id: str, owner_id: Optional[str] = None):
         """
         Retrieve a specific clothing item from the collection by its ID
         
         Args:
             item_id: The ID of the point/clothing item to retrieve
+            owner_id: If given, items belonging to anyone else are treated as missing
             
         Returns:
             The clothing item if found, None otherwise
         """
         try:
-            result = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=[item_id],
-                with_payload=True,
-                with_vectors=True
-            )
-            
-            if result and len(result) > 0:
-                return result[0]
-            return None
+            return self.get_items_by_ids([item_id], owner_id)[0]
         except Exception as e:
-            print(f"Error retrieving item with ID {item_id}: {str(e)}")
+            logger.warning(f"Error retrieving item with ID {item_id}: {str(e)}")
             return None
 
-    def delete_clothing(self, point_id: str) -> bool:
+    def get_items_by_ids(self, item_ids: List[str], owner_id: Optional[str] = None) -> List[Any]:
+        """
+        Retrieve many items, serving cached points and fetching the rest in one call
+
+        Returns:
+            One entry per requested ID, None where the item doesn't exist
+            (or belongs to another owner)
+        """
+        if self.point_cache is not None:
+            found, missing = self.point_cache.get_many(item_ids)
+        else:
+            found, missing = {}, list(item_ids)
+
+        if missing:
+            with stage("retrieve", self.collection_name):
+                fetched = self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=missing,
+                    with_payload=True,
+                    with_vectors=True
+                )
+            for point in fetched:
+                found[point_key(point.id)] = point
+                if self.point_cache is not None:
+                    self.point_cache.put(point)
+
+        points = [found.get(point_key(item_id)) for item_id in item_ids]
+        return [point if point is not None and is_owned_by(point, owner_id) else None for point in points]
+
+    def update_payload(self, point_id: str, payload: Dict[str, Any]):
+        """Merge ``payload`` into an existing point's payload"""
+        payload = {**payload, VERSION_FIELD: time.time()}
+        self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=[point_id]
+        )
+        self._on_write([point_id])
+        if self.local_index is not None:
+            self.local_index.on_payload(point_id, payload)
+
+    def update_payloads(self, payloads: Dict[str, Dict[str, Any]]):
+        """Merge a payload into each of many points with one batched request"""
+        if not payloads:
+            return
+        stamped = {point_id: {**payload, VERSION_FIELD: time.time()} for point_id, payload in payloads.items()}
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in stamped.items()
+            ]
+        )
+        self._on_write(stamped)
+        if self.local_index is not None:
+            for point_id, payload in stamped.items():
+                self.local_index.on_payload(point_id, payload)
+
+    def delete_clothing(self, point_id: str, owner_id: Optional[str] = None) -> bool:
         """
         Delete a clothing item from the collection by its ID
         
         Args:
             point_id: The ID of the point/clothing item to delete
+            owner_id: If given, only delete the item if it belongs to this owner
             
         Returns:
-            bool: True if deletion was successful, False otherwise
+            bool: True if the item was deleted, False if it doesn't exist (or belongs to another owner)
         """
-        try:
-            self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=[point_id]
-            )
-            return True
-        except Exception as e:
-            print(f"Error deleting point {point_id}: {str(e)}")
+        # Read past the point cache; a delete must see the current owner
+        existing = self.client.retrieve(collection_name=self.collection_name, ids=[point_id], with_payload=["owner_id"])
+        if not existing or not is_owned_by(existing[0], owner_id):
             return False
 
+        if owner_id is None:
+            selector = [point_id]
+        else:
+            selector = FilterSelector(filter=Filter(must=[
+                HasIdCondition(has_id=[point_id]),
+                FieldCondition(key="owner_id", match=MatchValue(value=owner_id)),
+            ]))
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=selector
+        )
+        self._on_write([point_id])
+        if self.local_index is not None:
+            self.local_index.on_delete(point_id, owner_id)
+        return True
+
+    def _on_write(self, point_ids: Iterable[Any]):
+        if self.point_cache is not None:
+            self.point_cache.invalidate(point_ids)
+
     def _get_tags(self, image_embedding) -> list:
+        if self.tag_classifier is not None and self.tag_classifier.loaded:
+            return self.tag_classifier.tag(image_embedding)
+
         result = self.client.query_points(
-            collection_name='tags',
+            collection_name=self.tags_collection,
             query=image_embedding,
             with_payload=True,
             limit=5
@@ -176,5 +493,102 @@ class VectorDatabase:
         item_tags = [tag.payload['tag'] for tag in result]
         return item_tags
 
+    def _get_tags_batch(self, image_embeddings: np.ndarray) -> List[list]:
+        """Tag N image embeddings at once"""
+        if self.tag_classifier is not None and self.tag_classifier.loaded:
+            return self.tag_classifier.tag_batch(image_embeddings)
+        return [self._get_tags(embedding) for embedding in image_embeddings]
+
+
+def provision_collection(client: QdrantClient, collection_name: str, vector_size: int,
+                         payload_indexes: Optional[Dict[str, PayloadSchemaType]] = None):
+    """
+    Idempotently create a cosine collection and its payload indexes
+
+    Existing collections are left as they are apart from adding missing
+    indexes; a vector size that doesn't match the model raises ValueError.
+    """
+    if not client.collection_exists(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+        )
+        logger.info(f"Created collection '{collection_name}' ({vector_size} dimensions)")
+
+    info = client.get_collection(collection_name)
+    existing_size = getattr(info.config.params.vectors, "size", None)
+    if existing_size is not None and existing_size != vector_size:
+        raise ValueError(
+            f"Collection '{collection_name}' stores {existing_size}-dimensional vectors but the model produces {vector_size}"
+        )
+
+    indexed = info.payload_schema or {}
+    for field_name, field_schema in (payload_indexes or {}).items():
+        if field_name not in indexed:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+            logger.info(f"Created '{field_name}' payload index on '{collection_name}'")
+
+
+def scoped_filter(owner_id: Optional[str] = None, **matches: Any) -> Optional[Filter]:
+    """Build a filter matching every ``field=value`` given, plus ``owner_id`` when set"""
+    if owner_id is not None:
+        matches["owner_id"] = owner_id
+    if not matches:
+        return None
+    return Filter(must=[FieldCondition(key=key, match=MatchValue(value=value)) for key, value in matches.items()])
+
+
+def is_owned_by(point, owner_id: Optional[str]) -> bool:
+    """Whether a point is visible to ``owner_id`` (always true for unscoped requests)"""
+    return owner_id is None or (point.payload or {}).get("owner_id") == owner_id
+
+
+def _read_image(file) -> bytes:
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        # Already-buffered image bytes (e.g. from stream_upload_file)
+        return file
+    # Check if we're dealing with a standard file object or an UploadFile
+    if hasattr(file, 'file'):
+        # It's an UploadFile from FastAPI
+        return file.file.read()
+    # It's a standard file object (like from open())
+    return file.read()
+
+LISTING_FIELDS = {
+    "name": "Unnamed Item",
+    "category": "uncategorized",
+    "tags": [],
+}
+
+def format_point(point, fields: Optional[List[str]] = None) -> dict:
+    """Format a scrolled point as a listing item, projected to ``fields`` if given"""
+    payload = point.payload or {}
+    item = {"id": point.id}
+    for field in (fields if fields is not None else LISTING_FIELDS):
+        item[field] = payload.get(field, LISTING_FIELDS.get(field))
+    if fields is None:
+        # Grid views should load the smallest derivative, never the original
+        item["thumbnail_url"] = pick_thumbnail(payload.get("thumbnails"))
+    return item
 
+def encode_cursor(offset) -> Optional[str]:
+    """Encode a Qdrant scroll offset as an opaque URL-safe cursor"""
+    if offset is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(offset).encode("utf-8")).decode("ascii")
 
+def decode_cursor(cursor: Optional[str]):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    if not cursor:
+        return None
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(offset, (int, str)):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
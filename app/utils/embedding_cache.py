@@ -0,0 +1,311 @@
+import fcntl
+import hashlib
+import os
+import queue
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.logging import logger
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different prompts share a cache entry"""
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def model_fingerprint(model: Any) -> str:
+    """
+    Fingerprint a model so cached embeddings are never reused across models.
+
+    Inference backends provide their own ``fingerprint``; for plain models
+    this hashes the config plus the text projection weights when available.
+    """
+    fingerprint = getattr(model, "fingerprint", None)
+    if isinstance(fingerprint, str):
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+    digest = hashlib.sha256()
+    config = getattr(model, "config", None)
+    if config is not None and hasattr(config, "to_json_string"):
+        digest.update(config.to_json_string().encode("utf-8"))
+    else:
+        digest.update(type(model).__name__.encode("utf-8"))
+
+    projection = getattr(model, "text_projection", None)
+    weight = getattr(projection, "weight", None)
+    if weight is not None:
+        digest.update(weight.detach().cpu().numpy().tobytes())
+
+    return digest.hexdigest()[:16]
+
+
+class _DiskStore:
+    """
+    Append-only embedding log shared by every process on the host.
+
+    The file is a small header (magic, dimension) followed by fixed-size
+    records of key digest plus float32 vector, so nothing is ever rewritten.
+    Appends happen under an exclusive ``fcntl`` lock, so workers can share
+    one file; each process tails the log on a miss to pick up entries the
+    others wrote. Vectors are read with ``pread`` rather than memory-mapped,
+    and the thread lock only guards the index, never a read. ``put`` only
+    queues the entry: a background thread does the disk writes, so the
+    inference thread never waits on I/O.
+    """
+
+    _MAGIC = b"CLTE0001"
+    _HEADER = struct.Struct("<8sI")
+    _KEY_BYTES = 32
+
+    def __init__(self, directory: str, fingerprint: str, capacity: int, max_pending: int = 1024):
+        self.capacity = capacity
+        self.path = os.path.join(directory, f"text-embeddings-{fingerprint}.log")
+        self.index: Dict[bytes, int] = {}
+        self.dim: Optional[int] = None
+        self._lock = threading.Lock()
+        self._read_offset = 0
+        self._pending: "queue.Queue[Optional[Tuple[bytes, np.ndarray]]]" = queue.Queue(maxsize=max_pending)
+        self._full_logged = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable text embedding cache at {self.path}: {e}")
+            self.index = {}
+        if self.index:
+            logger.info(f"Loaded {len(self.index)} cached text embeddings from {self.path}")
+
+        self._writer = threading.Thread(target=self._write_loop, name="text-cache-writer", daemon=True)
+        self._writer.start()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        digest = bytes.fromhex(key)
+        offset = self.index.get(digest)
+        if offset is None:
+            # Another worker may have written it since we last looked
+            self._tail()
+            offset = self.index.get(digest)
+        if offset is None:
+            return None
+        # Records are never rewritten, so an indexed offset can be read without the lock
+        data = os.pread(self._fd, self.dim * 4, offset)
+        # Read-only, since it's a view of immutable bytes
+        return np.frombuffer(data, dtype=np.float32)
+
+    def put(self, key: str, embedding: np.ndarray):
+        """Queue an embedding for the writer thread; dropped if the queue is full"""
+        digest = bytes.fromhex(key)
+        if digest in self.index:
+            return
+        try:
+            self._pending.put_nowait((digest, embedding))
+        except queue.Full:
+            pass
+
+    def flush(self):
+        """Block until every queued embedding is on disk"""
+        self._pending.join()
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join()
+        os.close(self._fd)
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            batch = [item]
+            # Coalesce whatever else is queued into one locked append
+            while item is not None and len(batch) < 256:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            try:
+                self._append([entry for entry in batch if entry is not None])
+            except Exception as e:
+                logger.warning(f"Failed to persist text embeddings: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+            if batch[-1] is None:
+                return
+
+    def _append(self, entries: List[Tuple[bytes, np.ndarray]]):
+        if not entries:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            with self._lock:
+                self._refresh(repair=True)
+                if self.dim is None:
+                    self.dim = entries[0][1].shape[0]
+                    os.write(self._fd, self._HEADER.pack(self._MAGIC, self.dim))
+                    self._read_offset = self._HEADER.size
+
+                records = []
+                seen = set()
+                for digest, embedding in entries:
+                    if digest in self.index or digest in seen or embedding.shape[0] != self.dim:
+                        continue
+                    if len(self.index) + len(records) >= self.capacity:
+                        if not self._full_logged:
+                            logger.warning(f"Text embedding disk cache is full ({self.capacity} entries); new entries stay in memory only")
+                            self._full_logged = True
+                        break
+                    seen.add(digest)
+                    records.append(digest + np.ascontiguousarray(embedding, dtype=np.float32).tobytes())
+                if records:
+                    # O_APPEND plus the lock: one contiguous write after every other process's records
+                    os.write(self._fd, b"".join(records))
+                    self._refresh()
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _tail(self):
+        """Index records appended since the last read, reading them outside the lock"""
+        with self._lock:
+            if self.dim is None:
+                # Only the header is missing; nothing to read yet
+                self._refresh()
+                return
+            start = self._read_offset
+        record_size = self._KEY_BYTES + self.dim * 4
+        size = os.fstat(self._fd).st_size
+        complete = start + (size - start) // record_size * record_size
+        if complete <= start:
+            return
+
+        data = os.pread(self._fd, complete - start, start)
+        with self._lock:
+            # Skip whatever another thread indexed while we were reading
+            for offset in range(max(self._read_offset, start), complete, record_size):
+                position = offset - start
+                self.index.setdefault(data[position:position + self._KEY_BYTES], offset + self._KEY_BYTES)
+            self._read_offset = max(self._read_offset, complete)
+
+    def _refresh(self, repair: bool = False):
+        """Index records appended since the last read; with ``repair`` (lock held), drop a torn tail"""
+        size = os.fstat(self._fd).st_size
+        if self.dim is None:
+            if size < self._HEADER.size:
+                if repair and size:
+                    os.ftruncate(self._fd, 0)
+                return
+            magic, dim = self._HEADER.unpack(os.pread(self._fd, self._HEADER.size, 0))
+            if magic != self._MAGIC:
+                raise ValueError("not a text embedding cache")
+            self.dim = dim
+            self._read_offset = self._HEADER.size
+
+        record_size = self._KEY_BYTES + self.dim * 4
+        complete = self._read_offset + (size - self._read_offset) // record_size * record_size
+        if repair and complete < size:
+            # A writer died mid-record; cut it off so later records stay aligned
+            os.ftruncate(self._fd, complete)
+        if complete <= self._read_offset:
+            return
+
+        data = os.pread(self._fd, complete - self._read_offset, self._read_offset)
+        for start in range(0, len(data), record_size):
+            self.index.setdefault(data[start:start + self._KEY_BYTES], self._read_offset + start + self._KEY_BYTES)
+        self._read_offset = complete
+
+
+class TextEmbeddingCache:
+    """
+    Memoizes text embeddings keyed by normalized query text and model fingerprint.
+
+    Entries live in an in-memory LRU bounded by entry count and bytes. When
+    ``persist_dir`` is set, every embedding is also appended, in the
+    background, to an on-disk log shared by all workers, so a restarted
+    process starts warm.
+    """
+
+    def __init__(self, fingerprint: str, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 persist_dir: Optional[str] = None, disk_capacity: int = 65536):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = _DiskStore(persist_dir, fingerprint, disk_capacity) if persist_dir else None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+        # Probe the disk without the lock, so other lookups don't queue behind the I/O
+        embedding = self._disk.get(key) if self._disk is not None else None
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._insert(key, embedding)
+            return embedding
+
+    def put(self, text: str, embedding: np.ndarray):
+        key = self.key(text)
+        embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        with self._lock:
+            self._insert(key, embedding)
+            if self._disk is not None:
+                self._disk.put(key, embedding)
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+            }
+
+    def _insert(self, key: str, embedding: np.ndarray):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = embedding
+        self._bytes += embedding.nbytes
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
@@ -1,28 +1,75 @@
 from PIL import Image
-import torch
 import numpy as np
 from io import BytesIO
+from contextlib import nullcontext
+from typing import List, Union
+
+from app.utils.preprocessing import preprocess_images
+
+def load_image(image_data: Union[bytes, Image.Image]) -> Image.Image:
+    """Decode raw image bytes into an RGB PIL image"""
+    if isinstance(image_data, Image.Image):
+        image = image_data
+    else:
+        image = Image.open(BytesIO(image_data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
 
 def embed_image(image_data: bytes, processor, model):
-    
-    image = Image.open(BytesIO(image_data))
-    inputs = processor(images=image, return_tensors="pt")
-    
-    with torch.no_grad():
-        outputs = model.get_image_features(**inputs)
-    
-    embeddings = outputs.numpy()
-    embeddings = embeddings / np.linalg.norm(embeddings)
-    
-    return embeddings[0]
+    return embed_images([image_data], processor, model)[0]
 
 def embed_text(text, processor, model):
-    inputs = processor(text=text, return_tensors="pt", padding=True)
-    
-    with torch.no_grad():
+    return embed_texts([text], processor, model)[0]
+
+def embed_images(images: List[Union[bytes, Image.Image, np.ndarray]], processor, model) -> np.ndarray:
+    """
+    Embed a batch of images with a single forward pass, one normalized row per image
+
+    Images may be raw bytes, PIL images, or arrays already produced by
+    ``preprocess_image``.
+    """
+    return embed_pixel_values(preprocess_images(images, processor), model)
+
+def embed_pixel_values(pixel_values: np.ndarray, model) -> np.ndarray:
+    """Run the vision tower on a preprocessed (N, 3, H, W) batch"""
+    if _tensor_type(model) == "pt":
+        import torch
+        pixel_values = torch.from_numpy(np.ascontiguousarray(pixel_values))
+
+    with _inference_mode(model):
+        outputs = model.get_image_features(pixel_values=pixel_values)
+
+    return _normalize(_to_numpy(outputs))
+
+def embed_texts(texts: List[str], processor, model) -> np.ndarray:
+    """Embed a batch of texts with a single forward pass, one normalized row per text"""
+    inputs = processor(text=list(texts), return_tensors=_tensor_type(model), padding=True)
+
+    with _inference_mode(model):
         outputs = model.get_text_features(**inputs)
-    
-    embeddings = outputs.numpy()
-    embeddings = embeddings / np.linalg.norm(embeddings)
-    
-    return embeddings[0]
\ No newline at end of file
+
+    return _normalize(_to_numpy(outputs))
+
+def warm_up(processor, model, image_size: int = 224):
+    """Run one dummy image and text pass so the first real request doesn't pay for lazy initialization"""
+    embed_images([Image.new("RGB", (image_size, image_size))], processor, model)
+    embed_texts(["warm up"], processor, model)
+
+def _tensor_type(model) -> str:
+    # Inference backends declare the tensor type they consume; HF models take torch tensors
+    return getattr(model, "tensor_type", "pt")
+
+def _inference_mode(model):
+    if _tensor_type(model) != "pt":
+        return nullcontext()
+    import torch
+    return torch.no_grad()
+
+def _to_numpy(outputs) -> np.ndarray:
+    if isinstance(outputs, np.ndarray):
+        return outputs
+    return outputs.numpy()
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
@@ -1,35 +1,208 @@
+import hashlib
+import io
 import os
+import tarfile
+import zipfile
 import aiofiles
-from fastapi import UploadFile
-from typing import Literal
+from dataclasses import dataclass
+from fastapi import HTTPException, UploadFile, status
+from typing import Literal, List, Optional, Tuple
 
 
-async def save_upload_file(upload_file: UploadFile, point_id: str, collection: Literal['wardrobe', 'marketplace']) -> str:
+DEFAULT_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(HTTPException):
+    """Raised as soon as an upload exceeds the configured size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum upload size of {max_bytes} bytes"
+        )
+
+
+class ArchiveTooLargeError(HTTPException):
+    """Raised as soon as the images extracted from an archive exceed the uncompressed budget"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Archive expands to more than {max_bytes} bytes"
+        )
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    content_hash: str
+    data: bytearray
+    size: int
+
+
+async def stream_upload_file(
+    upload_file: UploadFile,
+    point_id: str,
+    collection: Literal['wardrobe', 'marketplace'],
+    max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> StoredUpload:
     """
-    Save an uploaded file to the static directory
-    
+    Stream an upload to the static directory in a single pass
+
+    Each chunk is written to disk, fed to the SHA-256 digest and appended to
+    the in-memory buffer that is later decoded, so the image is never read
+    back from disk. Uploads over ``max_bytes`` are rejected as soon as the
+    limit is crossed and the partial file is removed.
+
     Args:
         upload_file: The uploaded file
         point_id: The point ID to use as filename
-    
+        collection: The collection subdirectory
+        max_bytes: Maximum accepted upload size
+        chunk_size: Bytes read per chunk
+
     Returns:
-        The relative path to the saved file
+        The saved path, content hash, image bytes and size
     """
-    # Reset file pointer to beginning
+    if getattr(upload_file, "size", None) is not None and upload_file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
     await upload_file.seek(0)
-    
-    # Create file path
-    file_extension = os.path.splitext(upload_file.filename)[1]
-    directory = "app/static/images-qdrant"
-    file_path = f"{directory}/{collection}/{point_id}{file_extension}"
-    
-    # Ensure directory exists
+
+    file_extension = os.path.splitext(upload_file.filename or "")[1]
+    directory = f"app/static/images-qdrant/{collection}"
+    file_path = f"{directory}/{point_id}{file_extension}"
     os.makedirs(directory, exist_ok=True)
-    
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await upload_file.read()
-        await out_file.write(content)
-    
-    # Return relative path for storage/retrieval
-    return f"app/static/images-qdrant/{collection}/{point_id}{file_extension}"
\ No newline at end of file
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    try:
+        async with aiofiles.open(file_path, 'wb') as out_file:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+                if len(buffer) + len(chunk) > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                buffer.extend(chunk)
+                await out_file.write(chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return StoredUpload(path=file_path, content_hash=digest.hexdigest(), data=buffer, size=len(buffer))
+
+
+async def read_upload_limited(upload_file: UploadFile, max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+                              chunk_size: int = UPLOAD_CHUNK_SIZE) -> bytes:
+    """Read an upload into memory, rejecting it as soon as it exceeds ``max_bytes``"""
+    if getattr(upload_file, "size", None) is not None and upload_file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    buffer = bytearray()
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}
+
+
+def save_image_bytes(data: bytes, point_id: str, collection: Literal['wardrobe', 'marketplace'], filename: str) -> str:
+    """
+    Save raw image bytes to the static directory
+
+    Args:
+        data: The image bytes
+        point_id: The point ID to use as filename
+        collection: The collection subdirectory
+        filename: The original filename, used for its extension
+
+    Returns:
+        The relative path to the saved file
+    """
+    file_extension = os.path.splitext(filename)[1]
+    directory = f"app/static/images-qdrant/{collection}"
+    os.makedirs(directory, exist_ok=True)
+
+    file_path = f"{directory}/{point_id}{file_extension}"
+    with open(file_path, 'wb') as out_file:
+        out_file.write(data)
+    return file_path
+
+
+def extract_archive(data: bytes, filename: str, max_member_bytes: int = 50 * 1024 * 1024,
+                    max_members: Optional[int] = None, max_total_bytes: Optional[int] = None) -> List[Tuple[str, bytes]]:
+    """
+    Extract image files from a zip or tar archive
+
+    Members are read in chunks against a running uncompressed total, so a
+    decompression bomb is stopped once it crosses the budget rather than
+    after it has been inflated, whatever sizes its headers claim.
+
+    Args:
+        data: The archive bytes
+        filename: The archive filename, used to detect the format
+        max_member_bytes: Members larger than this are rejected
+        max_members: Archives with more images than this are rejected
+        max_total_bytes: Budget for the images' combined uncompressed size (ArchiveTooLargeError, 413)
+
+    Returns:
+        (basename, bytes) pairs for each image in the archive
+    """
+    images = []
+    total = 0
+    lower = filename.lower()
+
+    def extract(name: str, declared_size: int, open_member) -> None:
+        nonlocal total
+        if max_members is not None and len(images) >= max_members:
+            raise ValueError(f"Archive contains more than {max_members} images")
+        if declared_size > max_member_bytes:
+            raise ValueError(f"Archive member {name} is too large")
+        if max_total_bytes is not None and total + declared_size > max_total_bytes:
+            raise ArchiveTooLargeError(max_total_bytes)
+
+        content = bytearray()
+        with open_member() as member_file:
+            while True:
+                chunk = member_file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                content.extend(chunk)
+                total += len(chunk)
+                if len(content) > max_member_bytes:
+                    raise ValueError(f"Archive member {name} is too large")
+                if max_total_bytes is not None and total > max_total_bytes:
+                    raise ArchiveTooLargeError(max_total_bytes)
+        images.append((os.path.basename(name), bytes(content)))
+
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not _is_image(member.filename):
+                    continue
+                extract(member.filename, member.file_size, lambda: archive.open(member))
+    elif lower.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+            for member in archive:
+                if not member.isfile() or not _is_image(member.name):
+                    continue
+                extract(member.name, member.size, lambda: archive.extractfile(member))
+    else:
+        raise ValueError(f"Unsupported archive format: {filename}")
+
+    return images
+
+
+def _is_image(name: str) -> bool:
+    basename = os.path.basename(name)
+    return not basename.startswith(".") and os.path.splitext(basename)[1].lower() in IMAGE_EXTENSIONS
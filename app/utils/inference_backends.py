@@ -0,0 +1,259 @@
+"""
+Pluggable CPU inference backends for the CLIP vision and text towers.
+
+Every backend exposes the subset of the HF CLIP model interface used by
+``app.utils.embeddings`` (``get_image_features``/``get_text_features``), so
+it can be passed anywhere a model is expected.
+
+Offline tooling:
+
+    python -m app.utils.inference_backends export --output app/model/onnx
+    python -m app.utils.inference_backends parity --backend onnx --images app/static/images-source/wardrobe
+"""
+import argparse
+import hashlib
+import json
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.model_loader import load_model, load_processor, MODEL_DIR
+
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+DEFAULT_ONNX_DIR = os.path.join(MODEL_DIR, "onnx")
+
+
+class TorchBackend:
+    """Eager PyTorch model, the reference backend"""
+
+    name = "torch"
+    tensor_type = "pt"
+
+    def __init__(self, model: Any):
+        self.model = model.eval()
+        self.config = model.config
+
+    @property
+    def fingerprint(self) -> str:
+        from app.utils.embedding_cache import model_fingerprint
+        return f"{self.name}-{model_fingerprint(self.model)}"
+
+    def get_image_features(self, **inputs):
+        return self.model.get_image_features(**inputs)
+
+    def get_text_features(self, **inputs):
+        return self.model.get_text_features(**inputs)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with Linear layers dynamically quantized to int8"""
+
+    name = "torch-int8"
+
+    def __init__(self, model: Any):
+        import torch
+
+        source_fingerprint = TorchBackend(model).fingerprint
+        super().__init__(torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8))
+        self._fingerprint = f"{self.name}-{source_fingerprint}"
+
+    @property
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+
+class OnnxBackend:
+    """ONNX Runtime sessions for towers exported with ``export_onnx``"""
+
+    name = "onnx"
+    tensor_type = "np"
+
+    def __init__(self, onnx_dir: str = DEFAULT_ONNX_DIR, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        vision_path = os.path.join(onnx_dir, "vision.onnx")
+        text_path = os.path.join(onnx_dir, "text.onnx")
+        providers = ["CPUExecutionProvider"]
+        self.vision_session = ort.InferenceSession(vision_path, options, providers=providers)
+        self.text_session = ort.InferenceSession(text_path, options, providers=providers)
+
+        with open(os.path.join(onnx_dir, "config.json")) as f:
+            self.config = SimpleNamespace(**json.load(f))
+
+        digest = hashlib.sha256()
+        for path in (vision_path, text_path):
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        self._fingerprint = f"{self.name}-{digest.hexdigest()[:16]}"
+
+    @property
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    def get_image_features(self, pixel_values, **_):
+        return self.vision_session.run(
+            ["image_embeds"], {"pixel_values": np.asarray(pixel_values, dtype=np.float32)}
+        )[0]
+
+    def get_text_features(self, input_ids, attention_mask=None, **_):
+        input_ids = np.asarray(input_ids, dtype=np.int64)
+        if attention_mask is None:
+            attention_mask = np.ones_like(input_ids)
+        return self.text_session.run(
+            ["text_embeds"],
+            {"input_ids": input_ids, "attention_mask": np.asarray(attention_mask, dtype=np.int64)}
+        )[0]
+
+
+def load_backend(name: str = "torch", onnx_dir: str = DEFAULT_ONNX_DIR) -> Tuple[Any, Any]:
+    """Load the processor and the named inference backend"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+    if name == "onnx":
+        return load_processor(), OnnxBackend(onnx_dir)
+
+    processor, model = load_model()
+    if name == "torch-int8":
+        return processor, QuantizedTorchBackend(model)
+    return processor, TorchBackend(model)
+
+
+def export_onnx(model: Any, processor: Any, output_dir: str = DEFAULT_ONNX_DIR, opset: int = 17):
+    """Export the vision and text towers to ONNX with a dynamic batch axis"""
+    import torch
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, pixel_values):
+            return self.clip.get_image_features(pixel_values=pixel_values)
+
+    class TextTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, input_ids, attention_mask):
+            return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = model.eval()
+
+    from PIL import Image
+    image_inputs = processor(images=[Image.new("RGB", (224, 224))], return_tensors="pt")
+    text_inputs = processor(text=["a photo of a shirt"], return_tensors="pt", padding=True)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            VisionTower(model),
+            (image_inputs["pixel_values"],),
+            os.path.join(output_dir, "vision.onnx"),
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=opset
+        )
+        torch.onnx.export(
+            TextTower(model),
+            (text_inputs["input_ids"], text_inputs["attention_mask"]),
+            os.path.join(output_dir, "text.onnx"),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["text_embeds"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "text_embeds": {0: "batch"},
+            },
+            opset_version=opset
+        )
+
+    model.config.save_pretrained(output_dir)
+    processor.save_pretrained(output_dir)
+
+
+def parity_check(reference: Any, candidate: Any, processor: Any, images: List[Any], texts: List[str]) -> Dict[str, Any]:
+    """
+    Compare a candidate backend against the reference on the same inputs.
+
+    Reports the cosine similarity between reference and candidate embeddings;
+    drift is ``1 - cosine``.
+    """
+    from app.utils.embeddings import embed_images, embed_texts
+
+    report = {}
+    for kind, embed, inputs in (("image", embed_images, images), ("text", embed_texts, texts)):
+        if not inputs:
+            continue
+        expected = embed(inputs, processor, reference)
+        actual = embed(inputs, processor, candidate)
+        cosine = np.sum(expected * actual, axis=1)
+        report[kind] = {
+            "count": len(inputs),
+            "min_cosine": float(cosine.min()),
+            "mean_cosine": float(cosine.mean()),
+            "max_drift": float(1 - cosine.min()),
+        }
+    return report
+
+
+def _load_images(directory: Optional[str], limit: int) -> List[Any]:
+    from PIL import Image
+
+    if not directory:
+        rng = np.random.default_rng(0)
+        return [Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8)) for _ in range(limit)]
+
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in (".png", ".jpg", ".jpeg", ".webp")
+    )[:limit]
+    return [Image.open(path).convert("RGB") for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and validate CPU inference backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the vision and text towers to ONNX")
+    export_parser.add_argument("--output", default=DEFAULT_ONNX_DIR)
+    export_parser.add_argument("--opset", type=int, default=17)
+
+    parity_parser = subparsers.add_parser("parity", help="Report cosine drift against the eager torch backend")
+    parity_parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], required=True)
+    parity_parser.add_argument("--onnx-dir", default=DEFAULT_ONNX_DIR)
+    parity_parser.add_argument("--images", help="Directory of sample images (random images if omitted)")
+    parity_parser.add_argument("--limit", type=int, default=16)
+    parity_parser.add_argument("--max-drift", type=float, default=0.01, help="Exit non-zero above this drift")
+
+    args = parser.parse_args()
+    processor, model = load_model()
+
+    if args.command == "export":
+        export_onnx(model, processor, args.output, args.opset)
+        print(f"Exported ONNX towers to {args.output}")
+        return
+
+    reference = TorchBackend(model)
+    candidate = OnnxBackend(args.onnx_dir) if args.backend == "onnx" else QuantizedTorchBackend(model)
+    texts = ["casual summer outfit", "office wear", "black pleated trousers", "white tee shirt"]
+    report = parity_check(reference, candidate, processor, _load_images(args.images, args.limit), texts)
+    print(json.dumps(report, indent=2))
+
+    worst = max(entry["max_drift"] for entry in report.values())
+    if worst > args.max_drift:
+        raise SystemExit(f"Cosine drift {worst:.5f} exceeds {args.max_drift}")
+
+
+if __name__ == "__main__":
+    main()
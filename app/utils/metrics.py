@@ -0,0 +1,225 @@
+"""
+Minimal Prometheus metrics: histograms plus gauges and counters read at scrape time.
+
+Everything is a no-op until ``enable()`` is called, so instrumented code
+costs one attribute check when metrics are off. Stage timings carry the
+route of the request they run under (set by ``MetricsMiddleware``) and the
+collection they touch.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="")
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: observations per bucket (+Inf last), and their sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        if not registry.enabled:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[bucket] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class GaugeCollector:
+    """Gauges read at scrape time from a callback returning (labels, value) pairs"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+                 kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect():
+            key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {float(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = False
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "closet_stage_duration_seconds",
+    "Time spent in each processing stage",
+    ("stage", "route", "collection")
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "closet_http_request_duration_seconds",
+    "HTTP request latency",
+    ("route", "method", "status")
+))
+BATCH_SIZE = registry.register(Histogram(
+    "closet_inference_batch_size",
+    "Inputs per inference engine forward pass",
+    ("kind",),
+    buckets=BATCH_SIZE_BUCKETS
+))
+
+
+class _Timer:
+    __slots__ = ("stage", "collection", "started")
+
+    def __init__(self, stage: str, collection: str):
+        self.stage = stage
+        self.collection = collection
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(
+            time.perf_counter() - self.started,
+            stage=self.stage, route=current_route.get(), collection=self.collection
+        )
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def stage(name: str, collection: Optional[str] = None):
+    """Context manager timing a stage into ``closet_stage_duration_seconds``"""
+    if not registry.enabled:
+        return _NOOP_TIMER
+    return _Timer(name, collection or "")
+
+
+def enable():
+    registry.enabled = True
+
+
+def register_gauges(name: str, help: str, labelnames: Sequence[str],
+                    collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]], kind: str = "gauge"):
+    """Expose values computed at scrape time, e.g. queue depths or existing hit counters"""
+    return registry.register(GaugeCollector(name, help, labelnames, collect, kind))
+
+
+def render() -> str:
+    return registry.render()
+
+
+class MetricsMiddleware:
+    """
+    Times each request and tags the stages it runs with its route template.
+
+    The route is resolved against the app's routes up front so stage labels
+    use ``/get-item/{item_id}`` rather than the raw path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope)
+        token = current_route.set(route)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                route=route, method=scope.get("method", ""), status=str(status_code)
+            )
+            current_route.reset(token)
+
+
+def _route_template(scope: Scope) -> str:
+    for route in getattr(scope.get("app"), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "")
+    return "unmatched"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
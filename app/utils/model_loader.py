@@ -1,12 +1,26 @@
-from transformers import AutoProcessor, AutoModelForZeroShotImageClassification
 import os
 
 
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../model"))
+
+
 def load_model():
+    # Imported lazily: transformers/torch take seconds to import and are only
+    # needed once the model is actually loaded
+    from transformers import AutoProcessor, AutoModelForZeroShotImageClassification
+
     try:
-        model_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../model"))
-        processor = AutoProcessor.from_pretrained(model_dir)
-        model = AutoModelForZeroShotImageClassification.from_pretrained(model_dir)
+        processor = AutoProcessor.from_pretrained(MODEL_DIR)
+        model = AutoModelForZeroShotImageClassification.from_pretrained(MODEL_DIR)
         return processor, model
     except Exception as e:
-        raise RuntimeError(f"Error loading model: {str(e)}") from e
\ No newline at end of file
+        raise RuntimeError(f"Error loading model: {str(e)}") from e
+
+
+def load_processor():
+    from transformers import AutoProcessor
+
+    try:
+        return AutoProcessor.from_pretrained(MODEL_DIR)
+    except Exception as e:
+        raise RuntimeError(f"Error loading processor: {str(e)}") from e
@@ -0,0 +1,55 @@
+import gc
+import os
+from typing import Any, Optional, Tuple
+
+from app.utils.logging import logger
+
+
+# Populated in the gunicorn master before workers are forked
+_shared_model: Optional[Tuple[Any, Any]] = None
+
+
+def preload_shared_model(backend: str = "torch", onnx_dir: Optional[str] = None):
+    """
+    Load the model once in the parent process so forked workers share its weights.
+
+    Tensor storage lives in its own allocations that workers only read, so
+    pages stay shared copy-on-write. Parameters are frozen and the GC is told
+    to ignore everything allocated so far, so neither autograd nor collector
+    passes dirty the shared pages. No forward pass runs here: thread pools
+    started before fork are not safe to use in the children, so each worker
+    warms up on its own.
+    """
+    global _shared_model
+
+    if backend == "onnx":
+        # ONNX Runtime sessions are not fork-safe; each worker creates its own
+        logger.warning("Shared model preloading is not supported for the onnx backend; loading per worker")
+        return
+
+    from app.utils.inference_backends import load_backend, DEFAULT_ONNX_DIR
+
+    processor, model = load_backend(backend, onnx_dir or DEFAULT_ONNX_DIR)
+    for parameter in model.model.parameters():
+        parameter.requires_grad_(False)
+
+    _shared_model = (processor, model)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded '{backend}' model for sharing across workers (pid {os.getpid()})")
+
+
+def get_shared_model() -> Optional[Tuple[Any, Any]]:
+    """The (processor, model) preloaded by the parent process, if any"""
+    return _shared_model
+
+
+def configure_worker(workers: int, threads_per_worker: Optional[int] = None):
+    """Split CPU threads between workers so they don't oversubscribe the cores"""
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // max(1, workers))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    logger.info(f"Worker {os.getpid()} using {threads} inference threads")
@@ -0,0 +1,195 @@
+"""
+Fast CLIP image preprocessing.
+
+Decodes JPEGs at reduced resolution with Pillow's draft mode, applies the
+EXIF orientation, and produces the normalized pixel tensor with NumPy,
+following the resize/center-crop/normalize steps of ``CLIPImageProcessor``.
+Processors it does not recognise fall back to the processor itself.
+
+Check parity with the processor's own preprocessing:
+
+    python -m app.utils.preprocessing --images app/static/images-source/wardrobe
+"""
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+ImageInput = Union[bytes, bytearray, Image.Image, np.ndarray]
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """The subset of a CLIP image processor's settings the fast path reproduces"""
+    shortest_edge: int
+    crop_size: Tuple[int, int]
+    mean: np.ndarray
+    std: np.ndarray
+    resample: int = Image.BICUBIC
+    rescale_factor: float = 1 / 255
+
+    @classmethod
+    def from_processor(cls, processor: Any) -> Optional["PreprocessConfig"]:
+        """Read the settings from a CLIP processor, or None if the fast path can't reproduce it"""
+        image_processor = getattr(processor, "image_processor", processor)
+        try:
+            if not (image_processor.do_resize and image_processor.do_center_crop
+                    and image_processor.do_rescale and image_processor.do_normalize):
+                return None
+            shortest_edge = image_processor.size["shortest_edge"]
+            crop = image_processor.crop_size
+            return cls(
+                shortest_edge=int(shortest_edge),
+                crop_size=(int(crop["height"]), int(crop["width"])),
+                mean=np.asarray(image_processor.image_mean, dtype=np.float32).reshape(3, 1, 1),
+                std=np.asarray(image_processor.image_std, dtype=np.float32).reshape(3, 1, 1),
+                resample=int(getattr(image_processor, "resample", Image.BICUBIC)),
+                rescale_factor=float(image_processor.rescale_factor),
+            )
+        except (AttributeError, KeyError, TypeError):
+            return None
+
+
+def decode_image(image_data: Union[bytes, bytearray, Image.Image], min_size: int) -> Image.Image:
+    """
+    Decode an image no smaller than ``min_size`` on its shortest edge.
+
+    For JPEGs, draft mode lets libjpeg scale down by 2x, 4x or 8x while
+    decoding, so a 12-megapixel photo never materializes at full size.
+    """
+    if isinstance(image_data, Image.Image):
+        image = image_data
+    else:
+        image = Image.open(BytesIO(image_data))
+        if min_size > 0:
+            # Draft mode keeps both sides at or above the requested size
+            image.draft("RGB", (min_size, min_size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+
+def preprocess_image(image_data: ImageInput, processor: Any, config: Optional[PreprocessConfig] = None) -> np.ndarray:
+    """Turn one image into a normalized (3, H, W) float32 array ready for the vision tower"""
+    if isinstance(image_data, np.ndarray):
+        return image_data
+
+    config = config or PreprocessConfig.from_processor(processor)
+    if config is None:
+        image = decode_image(image_data, 0)
+        return processor(images=[image], return_tensors="np")["pixel_values"][0]
+
+    image = decode_image(image_data, config.shortest_edge)
+    image = _resize_shortest_edge(image, config.shortest_edge, config.resample)
+    image = _center_crop(image, config.crop_size)
+
+    pixels = np.asarray(image, dtype=np.float32).transpose(2, 0, 1)
+    pixels *= config.rescale_factor
+    pixels -= config.mean
+    pixels /= config.std
+    return pixels
+
+
+def preprocess_images(images: Sequence[ImageInput], processor: Any) -> np.ndarray:
+    """Preprocess a batch of images into one (N, 3, H, W) float32 array"""
+    config = PreprocessConfig.from_processor(processor)
+    return np.stack([preprocess_image(image, processor, config) for image in images])
+
+
+def verify_preprocessing(processor: Any, model: Any, images: List[bytes]) -> Dict[str, Any]:
+    """
+    Compare embeddings from the fast path against the processor's preprocessing.
+
+    Both sides see the same EXIF-oriented image; only the decode (draft mode)
+    and the resize/normalize implementation differ.
+    """
+    from app.utils.embeddings import embed_pixel_values
+
+    reference_images = [ImageOps.exif_transpose(Image.open(BytesIO(data))).convert("RGB") for data in images]
+    reference_pixels = processor(images=reference_images, return_tensors="np")["pixel_values"]
+    fast_pixels = preprocess_images(images, processor)
+
+    expected = embed_pixel_values(reference_pixels, model)
+    actual = embed_pixel_values(fast_pixels, model)
+    cosine = np.sum(expected * actual, axis=1)
+    return {
+        "count": len(images),
+        "fast_path": PreprocessConfig.from_processor(processor) is not None,
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_pixel_error": float(np.abs(reference_pixels - fast_pixels).max()),
+    }
+
+
+def _resize_shortest_edge(image: Image.Image, size: int, resample: int) -> Image.Image:
+    width, height = image.size
+    short, long = (width, height) if width <= height else (height, width)
+    if short == size:
+        return image
+    new_short, new_long = size, int(size * long / short)
+    new_size = (new_short, new_long) if width <= height else (new_long, new_short)
+    return image.resize(new_size, resample)
+
+
+def _center_crop(image: Image.Image, crop_size: Tuple[int, int]) -> Image.Image:
+    crop_height, crop_width = crop_size
+    width, height = image.size
+    if width < crop_width or height < crop_height:
+        # Pad like the HF processor does for images smaller than the crop
+        padded = Image.new("RGB", (max(width, crop_width), max(height, crop_height)))
+        padded.paste(image, ((padded.width - width) // 2, (padded.height - height) // 2))
+        image, width, height = padded, padded.width, padded.height
+    top = (height - crop_height) // 2
+    left = (width - crop_width) // 2
+    return image.crop((left, top, left + crop_width, top + crop_height))
+
+
+def _load_image_bytes(directory: Optional[str], limit: int) -> List[bytes]:
+    if not directory:
+        # Large random JPEGs so draft mode actually kicks in
+        rng = np.random.default_rng(0)
+        images = []
+        for _ in range(limit):
+            buffer = BytesIO()
+            noise = rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+            Image.fromarray(noise).resize((4032, 3024), Image.BICUBIC).save(buffer, format="JPEG", quality=90)
+            images.append(buffer.getvalue())
+        return images
+
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in (".png", ".jpg", ".jpeg", ".webp")
+    )[:limit]
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check fast preprocessing against the CLIP processor")
+    parser.add_argument("--images", help="Directory of sample images (random JPEGs if omitted)")
+    parser.add_argument("--limit", type=int, default=16)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Exit non-zero below this cosine")
+    args = parser.parse_args()
+
+    from app.utils.model_loader import load_model
+
+    processor, model = load_model()
+    report = verify_preprocessing(processor, model, _load_image_bytes(args.images, args.limit))
+    print(json.dumps(report, indent=2))
+
+    if report["min_cosine"] < args.min_cosine:
+        raise SystemExit(f"Cosine {report['min_cosine']:.5f} is below {args.min_cosine}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from typing import Sequence
+
+from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with Cache-Control headers.
+
+    Paths under ``immutable_prefixes`` are content-addressed, so browsers and
+    CDNs may cache them for a year without revalidating. Everything else gets
+    a shorter max-age; Starlette's ETag/Last-Modified handling answers
+    conditional GETs with 304.
+    """
+
+    def __init__(self, *args, immutable_prefixes: Sequence[str] = ("derivatives/",), max_age: int = 86400, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        self.max_age = max_age
+
+    async def get_response(self, path: str, scope: Scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            if path.startswith(self.immutable_prefixes):
+                response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            else:
+                response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
@@ -0,0 +1,117 @@
+import os
+import tempfile
+from io import BytesIO
+from typing import Dict, Iterable, Optional, Union
+
+from PIL import Image, ImageOps
+
+
+DERIVATIVES_DIR = "app/static/derivatives"
+DERIVATIVES_URL = "/static/derivatives"
+DEFAULT_WIDTHS = (256, 512, 1024)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def derivative_name(content_hash: str, width: int, fmt: str = "webp") -> str:
+    """Content-hashed filename, so a derivative's URL never changes meaning and can be cached forever"""
+    return f"{content_hash[:24]}-{width}.{FORMATS[fmt][1]}"
+
+
+def generate_derivatives(
+    image_data: Union[bytes, bytearray],
+    content_hash: str,
+    collection: str,
+    widths: Iterable[int] = DEFAULT_WIDTHS,
+    fmt: str = "webp"
+) -> Dict[str, str]:
+    """
+    Write resized derivatives of an image at fixed widths
+
+    The image is decoded once (with JPEG draft mode when possible), its EXIF
+    orientation applied, then downscaled to each width. Widths larger than the
+    original are skipped, and derivatives that already exist are reused.
+
+    Args:
+        image_data: The original image bytes
+        content_hash: SHA-256 of the original bytes, used in the filenames
+        collection: The collection subdirectory
+        widths: Target widths in pixels
+        fmt: Output format, 'webp' or 'jpeg'
+
+    Returns:
+        Mapping of width (as a string) to the derivative's static URL
+    """
+    pil_format, extension, save_options = FORMATS[fmt]
+    widths = sorted(set(widths))
+    directory = os.path.join(DERIVATIVES_DIR, collection)
+    os.makedirs(directory, exist_ok=True)
+
+    urls = {}
+    pending = []
+    for width in widths:
+        name = derivative_name(content_hash, width, fmt)
+        if os.path.exists(os.path.join(directory, name)):
+            urls[str(width)] = f"{DERIVATIVES_URL}/{collection}/{name}"
+        else:
+            pending.append(width)
+    if not pending:
+        return urls
+
+    image = Image.open(BytesIO(image_data))
+    # Let the JPEG decoder scale down by up to 8x while decoding
+    image.draft("RGB", (max(pending), max(pending)))
+    image = ImageOps.exif_transpose(image)
+    image = _convert_mode(image, fmt)
+
+    for width in pending:
+        # Never upscale; only the smallest width is kept (at original size) for tiny images
+        if width > image.width and width != widths[0]:
+            continue
+        target_width = min(width, image.width)
+        height = max(1, round(image.height * target_width / image.width))
+        resized = image.resize((target_width, height), Image.LANCZOS)
+
+        name = derivative_name(content_hash, width, fmt)
+        path = os.path.join(directory, name)
+        # A unique temp file per writer, so concurrent workers never write into the same one
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{name}.", delete=False) as tmp:
+            try:
+                resized.save(tmp, format=pil_format, **save_options)
+            except BaseException:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+        # mkstemp creates files readable by the owner only
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, path)
+        urls[str(width)] = f"{DERIVATIVES_URL}/{collection}/{name}"
+
+    return urls
+
+
+def pick_thumbnail(thumbnails: Optional[Dict[str, str]], width: Optional[int] = None) -> Optional[str]:
+    """The smallest derivative at least ``width`` wide, or the smallest one if no width is given"""
+    if not thumbnails:
+        return None
+    available = sorted((int(w), url) for w, url in thumbnails.items())
+    if width is not None:
+        for available_width, url in available:
+            if available_width >= width:
+                return url
+        return available[-1][1]
+    return available[0][1]
+
+
+def _convert_mode(image: Image.Image, fmt: str) -> Image.Image:
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if has_alpha and fmt == "webp":
+        return image.convert("RGBA")
+    if has_alpha:
+        # JPEG has no alpha channel; flatten onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image.convert("RGBA"), mask=image.convert("RGBA").split()[-1])
+        return background
+    return image.convert("RGB")
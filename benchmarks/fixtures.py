@@ -0,0 +1,233 @@
+"""
+Offline stand-ins for the model and Qdrant, plus synthetic data.
+
+Nothing here touches the network: the CLIP model is a randomly initialised
+tiny config, its tokenizer is a byte-level vocabulary with no merges, and
+Qdrant runs in local in-memory mode. Everything is seeded so two runs with
+the same arguments see the same vectors, payloads and images.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import uuid
+from io import BytesIO
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+
+CATEGORIES = ("top", "bottom")
+TAGS = (
+    "casual", "formal", "denim", "cotton", "linen", "striped", "floral", "black", "white", "blue",
+    "red", "green", "vintage", "sporty", "summer", "winter", "oversized", "slim", "leather", "knit",
+)
+QUERIES = (
+    "casual summer outfit", "black tie evening", "office smart casual", "weekend brunch",
+    "rainy day layers", "vintage denim look", "sporty gym outfit", "beach holiday",
+)
+STORES = ("thrift-a", "thrift-b", "thrift-c")
+
+_START, _END = "<|startoftext|>", "<|endoftext|>"
+
+
+def bytes_to_unicode() -> Dict[int, str]:
+    """GPT-2/CLIP byte-to-character table, so the byte-level vocabulary covers any input"""
+    printable = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    chars = printable[:]
+    extra = 0
+    for byte in range(256):
+        if byte not in printable:
+            printable.append(byte)
+            chars.append(256 + extra)
+            extra += 1
+    return dict(zip(printable, (chr(c) for c in chars)))
+
+
+def build_processor(directory: str):
+    """A CLIP processor with a generated byte-level tokenizer and the stock image settings"""
+    from transformers import CLIPImageProcessor, CLIPProcessor, CLIPTokenizer
+
+    symbols = list(bytes_to_unicode().values())
+    vocab = {token: i for i, token in enumerate(symbols + [s + "</w>" for s in symbols] + [_START, _END])}
+    vocab_file = os.path.join(directory, "vocab.json")
+    merges_file = os.path.join(directory, "merges.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    with open(merges_file, "w", encoding="utf-8") as f:
+        f.write("#version: 0.2\n")
+
+    tokenizer = CLIPTokenizer(vocab_file, merges_file, bos_token=_START, eos_token=_END, pad_token=_END)
+    return CLIPProcessor(image_processor=CLIPImageProcessor(), tokenizer=tokenizer)
+
+
+def build_model(processor, projection_dim: int = 64, hidden_size: int = 64, layers: int = 2, seed: int = 0):
+    """A randomly initialised CLIP small enough to run on any CPU, wrapped as the torch backend"""
+    import torch
+    from transformers import CLIPConfig, CLIPModel
+
+    from app.utils.inference_backends import TorchBackend
+
+    tokenizer = processor.tokenizer
+    text_config = {
+        "vocab_size": len(tokenizer.get_vocab()),
+        "hidden_size": hidden_size,
+        "intermediate_size": hidden_size * 2,
+        "num_hidden_layers": layers,
+        "num_attention_heads": 2,
+        "max_position_embeddings": tokenizer.model_max_length,
+        "bos_token_id": tokenizer.bos_token_id,
+        "eos_token_id": tokenizer.eos_token_id,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    vision_config = {
+        "hidden_size": hidden_size,
+        "intermediate_size": hidden_size * 2,
+        "num_hidden_layers": layers,
+        "num_attention_heads": 2,
+        "image_size": processor.image_processor.crop_size["height"],
+        "patch_size": 32,
+    }
+    torch.manual_seed(seed)
+    config = CLIPConfig(text_config=text_config, vision_config=vision_config, projection_dim=projection_dim)
+    return TorchBackend(CLIPModel(config))
+
+
+class LockedClient:
+    """
+    Serializes calls into a local-mode QdrantClient.
+
+    Local mode keeps collections in plain dicts and isn't safe to call from
+    the app's thread pools concurrently.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+class AsyncClientAdapter:
+    """
+    AsyncQdrantClient interface over the same in-memory store as the sync client.
+
+    Two ``:memory:`` clients never share data, so async calls run the sync
+    client's methods on a worker thread instead.
+    """
+
+    def __init__(self, client: LockedClient):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+
+def create_memory_clients() -> Tuple[LockedClient, AsyncClientAdapter]:
+    client = LockedClient(QdrantClient(location=":memory:"))
+    return client, AsyncClientAdapter(client)
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def seed_collections(
+    client: Any,
+    vector_size: int,
+    wardrobe_collection: str,
+    marketplace_collection: str,
+    tags_collection: str,
+    wardrobe_size: int,
+    marketplace_size: int,
+    owners: int,
+    seed: int = 0,
+    batch_size: int = 256,
+) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Create the collections and fill them with random items.
+
+    Wardrobe items are spread round-robin over ``owners`` owner ids
+    (``owner-0`` ...). Returns the seeded ``(id, payload)`` pairs per
+    collection so scenarios can pick existing items.
+    """
+    from app.services.vector_db import provision_collection
+
+    rng = np.random.default_rng(seed)
+    for name in (wardrobe_collection, marketplace_collection, tags_collection):
+        provision_collection(client, name, vector_size)
+
+    tag_vectors = random_unit_vectors(rng, len(TAGS), vector_size)
+    client.upsert(collection_name=tags_collection, points=[
+        PointStruct(id=i, vector=vector.tolist(), payload={"tag": tag})
+        for i, (tag, vector) in enumerate(zip(TAGS, tag_vectors))
+    ])
+
+    seeded = {}
+    for collection, size, marketplace in (
+        (wardrobe_collection, wardrobe_size, False),
+        (marketplace_collection, marketplace_size, True),
+    ):
+        items = []
+        for start in range(0, size, batch_size):
+            count = min(batch_size, size - start)
+            vectors = random_unit_vectors(rng, count, vector_size)
+            points = []
+            for offset, vector in enumerate(vectors):
+                index = start + offset
+                point_id = str(uuid.UUID(bytes=rng.bytes(16)))
+                payload = _item_payload(rng, index, marketplace, owners)
+                points.append(PointStruct(id=point_id, vector=vector.tolist(), payload=payload))
+                items.append((point_id, payload))
+            client.upsert(collection_name=collection, points=points)
+        seeded[collection] = items
+    return seeded
+
+
+def _item_payload(rng: np.random.Generator, index: int, marketplace: bool, owners: int) -> Dict[str, Any]:
+    category = CATEGORIES[index % len(CATEGORIES)]
+    payload = {
+        "name": f"{category}-{index}",
+        "category": category,
+        "tags": sorted(rng.choice(TAGS, size=3, replace=False).tolist()),
+        "content_hash": hashlib.sha256(f"{marketplace}-{index}".encode()).hexdigest(),
+    }
+    if marketplace:
+        payload["price"] = int(rng.integers(5, 200))
+        payload["store"] = STORES[index % len(STORES)]
+    else:
+        payload["owner_id"] = f"owner-{index % owners}"
+    return payload
+
+
+def synthetic_images(count: int, size: Tuple[int, int] = (1024, 768), seed: int = 0) -> List[bytes]:
+    """Distinct JPEGs (upscaled noise), so uploads don't hit the content-hash dedup"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        buffer = BytesIO()
+        noise = rng.integers(0, 256, (24, 32, 3), dtype=np.uint8)
+        Image.fromarray(noise).resize(size, Image.BICUBIC).save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def pick(items: Sequence[Any], index: int) -> Any:
+    return items[index % len(items)]
@@ -0,0 +1,344 @@
+"""
+Offline benchmark and load test for the HTTP API.
+
+Boots the FastAPI app in-process against an in-memory Qdrant and a tiny
+randomly initialised CLIP model, seeds synthetic wardrobes and a
+marketplace, then drives each scenario at several concurrency levels and
+writes throughput and latency percentiles as JSON:
+
+    python -m benchmarks.run --wardrobe-size 2000 --marketplace-size 5000 \
+        --concurrency 1,8,32 --requests 200 --output benchmark.json
+
+The app's own environment variables (``LOCAL_INDEX_MAX_POINTS``,
+``INFERENCE_MAX_BATCH_SIZE``, ...) are honoured, so configurations can be
+compared by running the suite twice. Absolute numbers reflect the tiny
+model and the single-threaded in-memory store; compare runs against each
+other, not against production.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("upload", "listing", "get_item", "matching", "generate_outfit")
+
+RequestSpec = Tuple[str, str, Dict[str, Any]]
+# Awaited after a successful response; returns a failure message or None once the work it started is done
+FollowUp = Callable[[Any, Any, Dict[str, Any]], Awaitable[Optional[str]]]
+
+# Job statuses after which an upload is no longer being worked on
+FINISHED_UPLOAD_STATUSES = {"completed", "duplicate", "failed"}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline API benchmark against an in-memory Qdrant")
+    parser.add_argument("--wardrobe-size", type=int, default=1000, help="Seeded wardrobe items across all owners")
+    parser.add_argument("--marketplace-size", type=int, default=2000, help="Seeded marketplace items")
+    parser.add_argument("--owners", type=int, default=10, help="Owners the wardrobe items are spread over")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--projection-dim", type=int, default=64, help="Embedding size of the random CLIP model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    """Throughput over the wall time plus latency percentiles of the successful requests, in ms"""
+    completed = len(latencies)
+    summary = {
+        "requests": completed + errors,
+        "errors": errors,
+        "wall_seconds": round(wall, 4),
+        "throughput_rps": round(completed / wall, 2) if wall > 0 else 0.0,
+    }
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary["latency_ms"] = {
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "mean": round(float(values.mean()), 3),
+            "max": round(float(values.max()), 3),
+        }
+    return summary
+
+
+async def run_load(client, make_request: Callable[[int], RequestSpec], total: int, concurrency: int,
+                   offset: int = 0, follow_up: Optional[FollowUp] = None) -> Dict[str, Any]:
+    """
+    Send ``total`` requests from ``concurrency`` workers pulling from a shared counter.
+
+    With ``follow_up``, a request's latency runs until the follow-up
+    returns, e.g. until a queued upload has been processed.
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+    error_samples: List[str] = []
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            method, url, kwargs = make_request(offset + i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failure = None if response.status_code < 400 else f"{response.status_code}: {response.text[:200]}"
+                if failure is None and follow_up is not None:
+                    failure = await follow_up(client, response, kwargs)
+            except Exception as e:
+                failure = repr(e)
+            elapsed = time.perf_counter() - started
+            if failure is None:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+                if len(error_samples) < 3:
+                    error_samples.append(failure)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, errors, time.perf_counter() - started)
+    if error_samples:
+        summary["error_samples"] = error_samples
+    return summary
+
+
+def build_scenarios(seeded: Dict[str, List], collections: Dict[str, str], images: List[bytes],
+                    seed: int) -> Dict[str, Callable[[int], RequestSpec]]:
+    """Request factories per scenario; request ``i`` is deterministic for a given seed"""
+    from benchmarks.fixtures import CATEGORIES, QUERIES, pick
+
+    wardrobe = seeded[collections["wardrobe"]]
+    marketplace = seeded[collections["marketplace"]]
+    owners = sorted({payload["owner_id"] for _, payload in wardrobe})
+    # Fixed permutations so concurrent workers don't all hit the same few points
+    rng = np.random.default_rng(seed)
+    wardrobe_order = rng.permutation(len(wardrobe))
+    marketplace_order = rng.permutation(len(marketplace))
+
+    def owner_header(owner_id: str) -> Dict[str, Any]:
+        return {"headers": {"X-Owner-Id": owner_id}}
+
+    def upload(i: int) -> RequestSpec:
+        return "POST", "/api/wardrobe/upload-clothing", {
+            "data": {"name": f"upload-{i}", "category": pick(CATEGORIES, i)},
+            "files": {"file": (f"upload-{i}.jpg", images[i % len(images)], "image/jpeg")},
+            **owner_header(pick(owners, i)),
+        }
+
+    def listing(i: int) -> RequestSpec:
+        return "GET", "/api/wardrobe/wardrobe", {"params": {"page_size": 50}, **owner_header(pick(owners, i))}
+
+    def get_item(i: int) -> RequestSpec:
+        item_id, _ = marketplace[pick(marketplace_order, i)]
+        return "GET", f"/api/marketplace/get-item/{item_id}", {}
+
+    def matching(i: int) -> RequestSpec:
+        item_id, payload = wardrobe[pick(wardrobe_order, i)]
+        return "GET", f"/api/outfit/complete-the-look/{item_id}", owner_header(payload["owner_id"])
+
+    def generate_outfit(i: int) -> RequestSpec:
+        return "POST", "/api/outfit/generate-outfit", {
+            "json": {"query": pick(QUERIES, i), "limit": 3},
+            **owner_header(pick(owners, i)),
+        }
+
+    return {
+        "upload": upload,
+        "listing": listing,
+        "get_item": get_item,
+        "matching": matching,
+        "generate_outfit": generate_outfit,
+    }
+
+
+async def wait_for_upload(client, response, kwargs: Dict[str, Any], poll_interval: float = 0.01,
+                          timeout: float = 120.0) -> Optional[str]:
+    """Poll a queued upload's status until it is processed, so upload latency covers embedding and upsert"""
+    status_url = response.json()["status_url"]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = await client.get(status_url, headers=kwargs.get("headers"))
+        if status.status_code >= 400:
+            return f"{status.status_code}: {status.text[:200]}"
+        job = status.json()
+        if job["status"] in FINISHED_UPLOAD_STATUSES:
+            return f"Upload {job['status']}: {job.get('error')}" if job["status"] == "failed" else None
+        await asyncio.sleep(poll_interval)
+    return f"Upload not processed within {timeout}s"
+
+
+FOLLOW_UPS: Dict[str, FollowUp] = {"upload": wait_for_upload}
+
+
+async def wait_until_ready(client, timeout: float = 300.0):
+    from app.dependencies import app_state
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if app_state.model_error:
+            raise RuntimeError(f"Model failed to load: {app_state.model_error}")
+        response = await client.get("/readyz")
+        if response.status_code == 200 and app_state.tag_classifier.loaded:
+            return
+        await asyncio.sleep(0.1)
+    raise TimeoutError("App did not become ready")
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+
+def prepare_app(workdir: str, args: argparse.Namespace):
+    """
+    Import the app with Qdrant and the model replaced by offline stand-ins.
+
+    Runs from ``workdir`` so uploads and thumbnails land in a scratch
+    ``app/static`` rather than the checkout.
+    """
+    os.makedirs(os.path.join(workdir, "app", "static"), exist_ok=True)
+    os.chdir(workdir)
+    os.environ.setdefault("QDRANT_HOST", ":memory:")
+    os.environ.setdefault("QDRANT_WARDROBE_COLLECTION", "wardrobe")
+    os.environ.setdefault("QDRANT_MARKETPLACE_COLLECTION", "marketplace")
+    os.environ.setdefault("QDRANT_TAGS_COLLECTION", "tags")
+    os.environ.setdefault("INFERENCE_BACKEND", "torch")
+
+    import app.main as main
+    from benchmarks import fixtures
+
+    processor = fixtures.build_processor(workdir)
+    model = fixtures.build_model(processor, projection_dim=args.projection_dim, seed=args.seed)
+    client, async_client = fixtures.create_memory_clients()
+
+    main.load_backend = lambda backend, onnx_dir: (processor, model)
+    main.create_client = lambda settings: client
+    main.create_async_client = lambda settings: async_client
+    main.get_shared_model = lambda: None
+
+    collections = {
+        "wardrobe": main.QDRANT_WARDROBE_COLLECTION,
+        "marketplace": main.QDRANT_MARKETPLACE_COLLECTION,
+        "tags": main.QDRANT_TAGS_COLLECTION,
+    }
+    return main.app, client, collections
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    from benchmarks import fixtures
+
+    with tempfile.TemporaryDirectory(prefix="closet-bench-") as workdir:
+        cwd = os.getcwd()
+        try:
+            app, client, collections = prepare_app(workdir, args)
+
+            seed_started = time.perf_counter()
+            seeded = await asyncio.to_thread(
+                fixtures.seed_collections, client, args.projection_dim,
+                collections["wardrobe"], collections["marketplace"], collections["tags"],
+                args.wardrobe_size, args.marketplace_size, args.owners, args.seed
+            )
+            seed_seconds = time.perf_counter() - seed_started
+
+            uploads = (args.warmup + args.requests) * len(args.concurrency) if "upload" in args.scenarios else 0
+            images = fixtures.synthetic_images(uploads, seed=args.seed)
+            scenarios = build_scenarios(seeded, collections, images, args.seed)
+
+            results = []
+            transport = httpx.ASGITransport(app=app)
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as http:
+                    ready_started = time.perf_counter()
+                    await wait_until_ready(http)
+                    startup_seconds = time.perf_counter() - ready_started
+
+                    for name in args.scenarios:
+                        # Request indexes aren't reused within a scenario, so uploads never repeat an image
+                        offset = 0
+                        for concurrency in args.concurrency:
+                            follow_up = FOLLOW_UPS.get(name)
+                            await run_load(http, scenarios[name], args.warmup, concurrency, offset, follow_up)
+                            offset += args.warmup
+                            summary = await run_load(http, scenarios[name], args.requests, concurrency, offset, follow_up)
+                            offset += args.requests
+                            results.append({"scenario": name, "concurrency": concurrency, **summary})
+                            print(f"{name:16s} c={concurrency:<4d} {summary['throughput_rps']:>9.1f} req/s "
+                                  f"p50={summary.get('latency_ms', {}).get('p50')} ms errors={summary['errors']}",
+                                  file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "config": {
+            "wardrobe_size": args.wardrobe_size,
+            "marketplace_size": args.marketplace_size,
+            "owners": args.owners,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "projection_dim": args.projection_dim,
+            "seed": args.seed,
+        },
+        "environment": environment(),
+        "setup": {"seed_seconds": round(seed_seconds, 3), "startup_seconds": round(startup_seconds, 3)},
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if REPO_ROOT not in sys.path:
+        # The benchmark chdirs into a scratch directory before importing the app
+        sys.path.insert(0, REPO_ROOT)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
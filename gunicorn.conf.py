@@ -0,0 +1,27 @@
+import os
+
+from dotenv import load_dotenv
+
+# Multi-worker deployment: gunicorn -c gunicorn.conf.py app.main:app
+load_dotenv()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app in the master so the model loaded in on_starting is
+# inherited by every forked worker instead of loaded once per worker
+preload_app = True
+
+
+def on_starting(server):
+    from app.utils.model_sharing import preload_shared_model
+
+    preload_shared_model(os.getenv("INFERENCE_BACKEND", "torch"), os.getenv("ONNX_MODEL_DIR"))
+
+
+def post_fork(server, worker):
+    from app.utils.model_sharing import configure_worker
+
+    threads = os.getenv("TORCH_THREADS_PER_WORKER")
+    configure_worker(workers, int(threads) if threads else None)
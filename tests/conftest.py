@@ -0,0 +1,78 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+from transformers import CLIPImageProcessor
+
+from app.services.tag_classifier import TagClassifier
+from app.services.vector_db import VectorDatabase, provision_collection
+
+
+EMBEDDING_DIM = 16
+
+
+class FakeModel:
+    """Deterministic stand-in for the CLIP vision tower that runs on NumPy inputs"""
+    tensor_type = "np"
+
+    def __init__(self, dim: int = EMBEDDING_DIM, seed: int = 0):
+        self.projection = np.random.default_rng(seed).standard_normal((3, dim)).astype(np.float32)
+
+    def get_image_features(self, pixel_values):
+        # Mean colour per channel, projected; distinct images get distinct embeddings
+        return np.asarray(pixel_values).mean(axis=(2, 3)) @ self.projection
+
+
+def jpeg_bytes(seed: int, size=(320, 240)) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).resize(size, Image.BICUBIC).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def processor():
+    return CLIPImageProcessor()
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def tag_classifier(client):
+    provision_collection(client, "tags", EMBEDDING_DIM, {})
+    rng = np.random.default_rng(1)
+    client.upsert(collection_name="tags", points=[
+        PointStruct(id=i, vector=rng.standard_normal(EMBEDDING_DIM).tolist(), payload={"tag": f"tag-{i}"})
+        for i in range(8)
+    ])
+    classifier = TagClassifier(client, "tags", top_k=3)
+    classifier.refresh()
+    return classifier
+
+
+@pytest.fixture
+def vector_db(client, processor, tag_classifier):
+    db = VectorDatabase(
+        host=None, api_key=None, collection_name="wardrobe", model=FakeModel(), processor=processor,
+        tag_classifier=tag_classifier, client=client, perceptual_hashing=True
+    )
+    db.ensure_collection(EMBEDDING_DIM)
+    return db
+
+
+@pytest.fixture
+def executor():
+    from app.services.executor import BoundedExecutor
+
+    pool = BoundedExecutor("test", max_workers=2, max_queue=8)
+    yield pool
+    pool.shutdown()
@@ -0,0 +1,56 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app.utils.file_utils import ArchiveTooLargeError, extract_archive
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("build, filename", [(_zip, "items.zip"), (_tar, "items.tar.gz")])
+def test_extracts_only_images(build, filename):
+    data = build([("a.jpg", b"a"), ("nested/b.png", b"bb"), ("notes.txt", b"x"), (".hidden.jpg", b"x")])
+
+    assert extract_archive(data, filename) == [("a.jpg", b"a"), ("b.png", b"bb")]
+
+
+@pytest.mark.parametrize("build, filename", [(_zip, "items.zip"), (_tar, "items.tar.gz")])
+def test_rejects_too_many_members(build, filename):
+    data = build([(f"{i}.jpg", b"x") for i in range(4)])
+
+    assert len(extract_archive(data, filename, max_members=4)) == 4
+    with pytest.raises(ValueError, match="more than 3 images"):
+        extract_archive(data, filename, max_members=3)
+
+
+@pytest.mark.parametrize("build, filename", [(_zip, "items.zip"), (_tar, "items.tar.gz")])
+def test_enforces_uncompressed_budget(build, filename):
+    # Highly compressible, so the archive itself stays tiny
+    data = build([(f"{i}.jpg", bytes(4 * 1024 * 1024)) for i in range(3)])
+
+    with pytest.raises(ArchiveTooLargeError) as raised:
+        extract_archive(data, filename, max_total_bytes=10 * 1024 * 1024)
+    assert raised.value.status_code == 413
+
+
+def test_rejects_oversized_member():
+    with pytest.raises(ValueError, match="too large"):
+        extract_archive(_zip([("big.jpg", bytes(2048))]), "items.zip", max_member_bytes=1024)
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+
+import httpx
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.services.qdrant_pool import QdrantSettings, with_retry
+
+from tests.conftest import EMBEDDING_DIM
+
+
+def test_retries_transient_errors_with_backoff():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection refused")
+        return "ok"
+
+    assert asyncio.run(with_retry(flaky, max_retries=3, base_delay=0.001)) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_on_permanent_errors():
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    async def down():
+        calls.append(1)
+        raise httpx.ConnectError("connection refused")
+
+    with pytest.raises(ValueError):
+        asyncio.run(with_retry(broken, max_retries=3, base_delay=0.001))
+    assert len(calls) == 1
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(with_retry(down, max_retries=2, base_delay=0.001))
+    assert len(calls) == 4
+
+
+def test_batched_and_single_searches_agree():
+    rng = np.random.default_rng(0)
+    owners = ["alice", "bob"]
+    points = [
+        PointStruct(id=str(uuid.uuid4()), vector=rng.standard_normal(EMBEDDING_DIM).tolist(),
+                    payload={"category": category, "owner_id": owners[i % 2]})
+        for i, category in enumerate(["top", "bottom"] * 10)
+    ]
+    queries = [("top", rng.standard_normal(EMBEDDING_DIM)), ("bottom", rng.standard_normal(EMBEDDING_DIM))]
+
+    async def scenario():
+        client = AsyncQdrantClient(":memory:")
+        await client.create_collection("wardrobe", vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+        await client.upsert("wardrobe", points)
+        db = AsyncVectorDatabase(client, "wardrobe", model=None, processor=None,
+                                 settings=QdrantSettings(host=None, api_key=None))
+        batched = await db.get_items_by_category_batch(queries, limit=3, owner_id="alice")
+        single = [await db.get_items_by_category(category, vector, limit=3, owner_id="alice") for category, vector in queries]
+        found = await db.get_items_by_ids([points[0].id, str(uuid.uuid4()), points[1].id], owner_id="alice")
+        await client.close()
+        return batched, single, found
+
+    batched, single, found = asyncio.run(scenario())
+
+    assert [[point.id for point in result] for result in batched] == [[point.id for point in result] for result in single]
+    assert all(point.payload["owner_id"] == "alice" for result in batched for point in result)
+    # Order is kept; missing items and other owners' items come back as None
+    assert [point.id if point else None for point in found] == [points[0].id, None, None]
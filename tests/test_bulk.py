@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import bulk
+from app.api.bulk import _process_bulk
+from app.dependencies import app_state
+from app.utils.thumbnails import DERIVATIVES_DIR
+
+from tests.conftest import jpeg_bytes
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Originals and derivatives are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_state, "thumbnail_widths", (256,))
+    monkeypatch.setattr(app_state, "thumbnail_format", "jpeg")
+
+
+def _accepted(images):
+    return [
+        ({"filename": f"{i}.jpg", "id": f"00000000-0000-0000-0000-00000000000{i}"}, data, {"name": f"item-{i}", "category": "top"})
+        for i, data in enumerate(images)
+    ]
+
+
+def test_only_stored_items_keep_originals_and_thumbnails(vector_db, client):
+    accepted = _accepted([jpeg_bytes(0, (640, 480)), b"not an image"])
+
+    errors = _process_bulk(vector_db, "wardrobe", accepted)
+
+    assert errors[0] is None and errors[1].startswith("Could not decode")
+    (stored, _, payload), (failed, _, _) = accepted
+    assert os.path.exists(stored["image_path"]) and "image_path" not in failed
+    assert os.listdir("app/static/images-qdrant/wardrobe") == ["00000000-0000-0000-0000-000000000000.jpg"]
+    assert len(os.listdir(os.path.join(DERIVATIVES_DIR, "wardrobe"))) == 1
+    point = client.retrieve("wardrobe", ids=[stored["id"]], with_payload=True)[0]
+    assert point.payload["thumbnails"] == payload["thumbnails"] != {}
+
+
+class _Unread:
+    filename = "item.jpg"
+
+    async def read(self, *args):
+        raise AssertionError("file was read")
+
+
+def test_too_many_files_are_rejected_before_reading(executor, monkeypatch):
+    monkeypatch.setattr(bulk, "MAX_BULK_ITEMS", 2)
+
+    for files, archive in (([_Unread()] * 3, None), ([_Unread()] * 2, _Unread())):
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(bulk._collect_images(executor, files, archive))
+        assert raised.value.status_code == 400
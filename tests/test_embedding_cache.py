@@ -0,0 +1,84 @@
+import numpy as np
+
+from app.utils.embedding_cache import TextEmbeddingCache
+
+
+def _vector(seed, dim=8):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def test_restarted_cache_starts_warm(tmp_path):
+    cache = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    cache.put("Summer  Outfit", _vector(0))
+    cache.close()
+
+    restarted = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    assert np.array_equal(restarted.get("summer outfit"), _vector(0))
+    assert restarted.disk_hits == 1
+    restarted.close()
+
+
+def test_workers_share_one_log(tmp_path):
+    first = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    second = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+
+    first.put("beach", _vector(1))
+    second.put("office", _vector(2))
+    first._disk.flush()
+    second._disk.flush()
+
+    # Each sees what the other appended, and the file holds both records once
+    assert np.array_equal(second.get("beach"), _vector(1))
+    assert np.array_equal(first.get("office"), _vector(2))
+    second.put("beach", _vector(1))
+    second._disk.flush()
+    assert len(first._disk) == len(second._disk) == 2
+    first.close()
+    second.close()
+
+
+def test_torn_tail_is_dropped_before_appending(tmp_path):
+    cache = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    cache.put("beach", _vector(1))
+    cache.close()
+    path = next(tmp_path.iterdir())
+    with open(path, "ab") as f:
+        f.write(b"partial record")
+
+    cache = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    cache.put("office", _vector(2))
+    cache.close()
+
+    restarted = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    assert np.array_equal(restarted.get("beach"), _vector(1))
+    assert np.array_equal(restarted.get("office"), _vector(2))
+    restarted.close()
+
+
+def test_disk_capacity_is_respected(tmp_path):
+    cache = TextEmbeddingCache("model", persist_dir=str(tmp_path), disk_capacity=1)
+    cache.put("beach", _vector(1))
+    cache.put("office", _vector(2))
+    cache.close()
+
+    restarted = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    assert restarted.get("beach") is not None
+    assert restarted.get("office") is None
+    restarted.close()
+
+
+def test_disk_is_probed_outside_the_cache_lock(tmp_path):
+    cache = TextEmbeddingCache("model", persist_dir=str(tmp_path))
+    cache.put("gym", _vector(3))
+    cache._disk.flush()
+    cache._entries.clear()
+    probe = cache._disk.get
+
+    def get(key):
+        assert not cache._lock.locked() and not cache._disk._lock.locked()
+        return probe(key)
+    cache._disk.get = get
+
+    assert np.array_equal(cache.get("gym"), _vector(3)) and cache.get("party") is None
+    assert (cache.disk_hits, cache.misses) == (1, 1)
+    cache.close()
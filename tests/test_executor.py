@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient
+
+from app.api.listing import thumbnail_redirect
+from app.dependencies import app_state
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.services.executor import BoundedExecutor, ExecutorSaturatedError
+
+from tests.conftest import jpeg_bytes
+
+
+def _saturated(coroutine_fn, pool: BoundedExecutor) -> ExecutorSaturatedError:
+    """Run ``coroutine_fn`` while ``pool``'s only slot is taken, returning the rejection"""
+    release = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+        try:
+            await coroutine_fn()
+        except ExecutorSaturatedError as e:
+            return e
+        finally:
+            release.set()
+            await blocker
+
+    try:
+        return asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_rejects_past_workers_plus_queue():
+    pool = BoundedExecutor("io", max_workers=1, max_queue=1, retry_after=3)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        rejected = None
+        try:
+            await pool.run(lambda: None)
+        except ExecutorSaturatedError as e:
+            rejected = e
+        release.set()
+        await asyncio.gather(*running)
+        # Capacity comes back once the backlog drains
+        return rejected, await pool.run(lambda: "done")
+
+    try:
+        rejected, result = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert rejected.status_code == 503 and rejected.headers == {"Retry-After": "3"}
+    assert result == "done" and pool.stats()["rejected"] == 1
+
+
+def test_saturation_is_rendered_as_503_with_retry_after():
+    pool = BoundedExecutor("cpu", max_workers=1, max_queue=0, retry_after=5)
+    release = threading.Event()
+    app = FastAPI()
+
+    @app.get("/busy")
+    async def busy():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+        try:
+            return await pool.run(lambda: "unreachable")
+        finally:
+            release.set()
+            await blocker
+
+    try:
+        response = TestClient(app).get("/busy")
+    finally:
+        pool.shutdown()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_offloaded_embeddings_answer_503_when_saturated():
+    pool = BoundedExecutor("cpu", max_workers=1, max_queue=0, retry_after=7)
+    db = AsyncVectorDatabase(AsyncQdrantClient(":memory:"), "wardrobe", model=None, processor=None,
+                             cpu_executor=pool, io_executor=pool)
+
+    error = _saturated(lambda: db.embed_text("red dress"), pool)
+
+    assert error is not None and error.status_code == 503
+    assert error.headers["Retry-After"] == "7"
+
+
+class _Recording(BoundedExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    async def run(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return await super().run(fn, *args, **kwargs)
+
+
+def test_thumbnail_redirect_reads_the_original_on_the_io_pool(vector_db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_state, "thumbnail_widths", (256,))
+    monkeypatch.setattr(app_state, "thumbnail_format", "jpeg")
+    item_id = "00000000-0000-0000-0000-000000000001"
+    vector_db.upload_batch([jpeg_bytes(0, (640, 480))], [{"name": "shirt", "category": "top"}], [item_id])
+    originals = tmp_path / "app" / "static" / "images-qdrant" / "wardrobe"
+    originals.mkdir(parents=True)
+    (originals / f"{item_id}.jpg").write_bytes(jpeg_bytes(0, (640, 480)))
+    io_executor, cpu_executor = _Recording("io", 2, 8), _Recording("cpu", 2, 8)
+
+    try:
+        response = asyncio.run(thumbnail_redirect(vector_db, io_executor, cpu_executor, "wardrobe", item_id, 256))
+    finally:
+        io_executor.shutdown()
+        cpu_executor.shutdown()
+
+    assert response.status_code == 307
+    assert "_read_original" in io_executor.calls and cpu_executor.calls == ["_generate_derivatives"]
@@ -0,0 +1,59 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.inference_engine import InferenceEngine
+
+from tests.conftest import FakeModel, jpeg_bytes
+
+
+class _BlockingModel(FakeModel):
+    """Holds every forward pass until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_image_features(self, pixel_values):
+        self.started.set()
+        self.release.wait(timeout=10)
+        return super().get_image_features(pixel_values)
+
+
+def test_embeds_images_in_batches(processor):
+    engine = InferenceEngine(processor, FakeModel(), max_batch_size=4)
+    try:
+        futures = [engine.submit_image(jpeg_bytes(seed)) for seed in range(3)]
+        embeddings = np.stack([future.result(timeout=10) for future in futures])
+    finally:
+        engine.shutdown()
+
+    assert embeddings.shape == (3, FakeModel().projection.shape[1])
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1)
+
+
+def test_shutdown_rejects_new_work(processor):
+    engine = InferenceEngine(processor, FakeModel())
+    engine.start()
+    engine.shutdown()
+
+    with pytest.raises(RuntimeError, match="shut down"):
+        engine.submit_image(jpeg_bytes(0))
+
+
+def test_shutdown_fails_requests_left_in_the_queue(processor):
+    model = _BlockingModel()
+    engine = InferenceEngine(processor, model, max_batch_size=1)
+    running = engine.submit_image(jpeg_bytes(0))
+    assert model.started.wait(timeout=10)
+    queued = engine.submit_image(jpeg_bytes(1))
+
+    # The worker is stuck in a forward pass past the join timeout
+    engine.shutdown(timeout=0.05)
+
+    with pytest.raises(RuntimeError, match="shut down"):
+        queued.result(timeout=1)
+    model.release.set()
+    assert running.result(timeout=10) is not None
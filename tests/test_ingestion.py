@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from app.services.database import COMPLETED, FAILED, QUEUED, JobQueue
+from app.services.ingestion import IngestionWorkerPool, process_jobs
+from app.utils.thumbnails import DERIVATIVES_DIR
+
+from tests.conftest import jpeg_bytes
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    # Derivatives are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+
+    def make(images):
+        for i, data in enumerate(images):
+            path = tmp_path / f"{i}.jpg"
+            path.write_bytes(data)
+            queue.enqueue("wardrobe", {
+                "image_path": str(path), "content_hash": f"hash-{i}", "name": f"item-{i}", "category": "top",
+            })
+        return queue.claim(len(images))
+
+    return make
+
+
+def _derivatives():
+    directory = os.path.join(DERIVATIVES_DIR, "wardrobe")
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_stores_thumbnails_after_upsert(vector_db, client, jobs):
+    claimed = jobs([jpeg_bytes(0, (640, 480)), b"not an image"])
+
+    outcomes = process_jobs(vector_db, claimed, thumbnail_widths=(256,), thumbnail_format="jpeg")
+
+    (stored, error, _), (_, decode_error, retryable) = outcomes
+    assert error is None and stored["status"] == COMPLETED
+    assert decode_error.startswith("Could not decode") and not retryable
+    point = client.retrieve("wardrobe", ids=[claimed[0].id], with_payload=True)[0]
+    assert point.payload["thumbnails"] == stored["thumbnails"] != {}
+    # The hash computed while streaming the upload is reused rather than recomputed
+    assert point.payload["content_hash"] == "hash-0"
+    assert _derivatives() == ["hash-0-256.jpg"]
+
+
+def test_failed_upsert_leaves_no_thumbnails(vector_db, client, jobs, monkeypatch):
+    claimed = jobs([jpeg_bytes(0, (640, 480))])
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("Qdrant unavailable")
+    monkeypatch.setattr(client, "upsert", unavailable)
+
+    [(result, error, retryable)] = process_jobs(vector_db, claimed, thumbnail_widths=(256,), thumbnail_format="jpeg")
+
+    assert result is None and error.startswith("Upsert failed") and retryable
+    assert _derivatives() == []
+
+
+def test_thumbnail_urls_are_stored_in_one_request(vector_db, client, jobs, monkeypatch):
+    claimed = jobs([jpeg_bytes(0, (640, 480)), jpeg_bytes(1, (640, 480))])
+    calls = []
+    batch_update_points = client.batch_update_points
+    monkeypatch.setattr(client, "batch_update_points", lambda **kwargs: calls.append(kwargs) or batch_update_points(**kwargs))
+
+    process_jobs(vector_db, claimed, thumbnail_widths=(256,), thumbnail_format="jpeg")
+
+    assert len(calls) == 1 and len(calls[0]["update_operations"]) == 2
+    points = client.retrieve("wardrobe", ids=[job.id for job in claimed], with_payload=True)
+    assert all(point.payload["thumbnails"] for point in points)
+
+
+def test_original_is_removed_on_terminal_failure(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    paths = [tmp_path / f"{i}.jpg" for i in range(2)]
+    for path in paths:
+        path.write_bytes(b"not an image")
+        queue.enqueue("wardrobe", {"image_path": str(path), "content_hash": "hash", "name": "item", "category": "top"})
+    pool = IngestionWorkerPool(queue, {}, None, None, ready=lambda: True)
+
+    claimed = queue.claim(2)
+    pool._record(claimed, [(None, "Upsert failed", True), (None, "Could not decode image", False)])
+
+    assert [queue.get(job.id).status for job in claimed] == [QUEUED, FAILED]
+    assert [os.path.exists(job.payload["image_path"]) for job in claimed] == [True, False]
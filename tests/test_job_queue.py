@@ -0,0 +1,53 @@
+from app.services.database import FAILED, PROCESSING, QUEUED, JobQueue
+
+
+def _queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+
+
+def test_reclaims_expired_lease_until_attempts_run_out(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, lease_seconds=0)
+    job, _ = queue.enqueue("wardrobe", {"name": "shirt"})
+
+    # The worker dies holding the lease each time
+    assert [claimed.attempts for claimed in queue.claim(10)] == [1]
+    assert queue.fail_expired() == []
+    assert [claimed.attempts for claimed in queue.claim(10)] == [2]
+    assert queue.claim(10) == []
+
+    [failed] = queue.fail_expired()
+    assert failed.id == job.id
+    assert failed.status == FAILED
+    assert failed.attempts == 2
+    assert "Lease expired" in failed.error
+    assert queue.fail_expired() == []
+
+
+def test_unexpired_lease_is_not_reclaimed(tmp_path):
+    queue = _queue(tmp_path, max_attempts=1, lease_seconds=60)
+    job, _ = queue.enqueue("wardrobe", {})
+
+    assert len(queue.claim(10)) == 1
+    assert queue.claim(10) == []
+    assert queue.get(job.id).status == PROCESSING
+
+
+def test_failed_attempt_retries_with_backoff(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, retry_backoff=0.0)
+    job, _ = queue.enqueue("wardrobe", {})
+    queue.claim(10)
+
+    assert queue.fail(job.id, "Upsert failed") == QUEUED
+    assert queue.get(job.id).status == QUEUED
+    queue.claim(10)
+    assert queue.fail(job.id, "Upsert failed") == FAILED
+    assert queue.get(job.id).status == FAILED
+
+
+def test_idempotency_key_returns_original_job(tmp_path):
+    queue = _queue(tmp_path)
+    job, created = queue.enqueue("wardrobe", {}, idempotency_key="abc")
+    again, created_again = queue.enqueue("wardrobe", {}, idempotency_key="abc")
+
+    assert created and not created_again
+    assert again.id == job.id
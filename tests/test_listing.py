@@ -0,0 +1,65 @@
+import asyncio
+import json
+import uuid
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from qdrant_client.models import PointStruct
+
+from app.api.listing import list_collection
+
+from tests.conftest import EMBEDDING_DIM
+
+
+@pytest.fixture
+def item_ids(vector_db, client):
+    rng = np.random.default_rng(0)
+    ids = [str(uuid.uuid4()) for _ in range(7)]
+    client.upsert("wardrobe", [
+        PointStruct(id=point_id, vector=rng.standard_normal(EMBEDDING_DIM).tolist(),
+                    payload={"name": f"item-{i}", "category": "top", "thumbnails": {"256": f"/static/{i}-256.webp"}})
+        for i, point_id in enumerate(ids)
+    ])
+    return ids
+
+
+def _list(vector_db, executor, **kwargs):
+    options = {"page_size": 3, "cursor": None, "fields": None, "stream": False, **kwargs}
+    return asyncio.run(list_collection(vector_db, executor, "wardrobe", **options))
+
+
+def test_cursor_pages_cover_the_collection_once(vector_db, executor, item_ids):
+    seen = []
+    cursor = None
+    while True:
+        page = _list(vector_db, executor, cursor=cursor)
+        assert len(page["items"]) <= 3
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(item_ids)
+    assert all(item["thumbnail_url"].endswith("-256.webp") for item in page["items"])
+
+
+def test_invalid_cursor_is_a_bad_request(vector_db, executor, item_ids):
+    with pytest.raises(HTTPException) as raised:
+        _list(vector_db, executor, cursor="not-a-cursor")
+    assert raised.value.status_code == 400
+
+
+def test_stream_is_one_json_object_per_line(vector_db, executor, item_ids):
+    response = _list(vector_db, executor, stream=True, fields="name")
+
+    async def body():
+        return [chunk async for chunk in response.body_iterator]
+    chunks = asyncio.run(body())
+
+    assert response.media_type == "application/x-ndjson"
+    assert all(chunk.endswith("\n") and chunk.count("\n") == 1 for chunk in chunks)
+    items = [json.loads(chunk) for chunk in chunks]
+    assert sorted(item["id"] for item in items) == sorted(item_ids)
+    # Projected to the requested fields only
+    assert all(set(item) == {"id", "name"} for item in items)
@@ -0,0 +1,78 @@
+import time
+import uuid
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from app.services.local_index import LocalIndexRegistry, LocalVectorIndex
+from app.services.vector_db import VectorDatabase
+
+from tests.conftest import EMBEDDING_DIM, FakeModel
+
+
+def _other_process(client, processor):
+    # A second worker writing to the same collection without touching this process's index
+    return VectorDatabase(host=None, api_key=None, collection_name="wardrobe", model=FakeModel(),
+                          processor=processor, client=client)
+
+
+def _point(point_id, category, seed):
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).tolist()
+    return PointStruct(id=point_id, vector=vector, payload={"category": category, "updated_at": time.time()})
+
+
+def _ids(index):
+    return {str(point.id) for point in index.search(np.ones(EMBEDDING_DIM), 10)}
+
+
+def test_detects_count_preserving_writes(vector_db, client, processor):
+    registry = LocalIndexRegistry(client, "wardrobe", verify_interval=0)
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    client.upsert("wardrobe", [_point(first, "top", 0)])
+    assert _ids(registry.get()) == {first}
+
+    # Delete plus insert keeps the count at one
+    client.delete("wardrobe", points_selector=[first])
+    client.upsert("wardrobe", [_point(second, "top", 1)])
+    assert _ids(registry.get()) == {second}
+
+    # Payload rewrite of the same point
+    _other_process(client, processor).update_payload(second, {"category": "shoes"})
+    index = registry.get()
+    assert [str(point.id) for point in index.search(np.ones(EMBEDDING_DIM), 10, category="shoes")] == [second]
+
+
+def test_keeps_index_when_nothing_changed(vector_db, client):
+    registry = LocalIndexRegistry(client, "wardrobe", verify_interval=0)
+    client.upsert("wardrobe", [_point(str(uuid.uuid4()), "top", 0)])
+
+    assert registry.get() is registry.get()
+
+
+def test_rows_are_keyed_by_canonical_id():
+    index = LocalVectorIndex(dim=EMBEDDING_DIM)
+    point_id = uuid.uuid4()
+    index.upsert(point_id, np.ones(EMBEDDING_DIM), {"category": "top"})
+
+    index.update_payload(str(point_id), {"category": "shoes"})
+    index.upsert(str(point_id), np.ones(EMBEDDING_DIM), {"category": "shoes", "name": "boots"})
+
+    assert len(index) == 1
+    assert index.remove(str(point_id)) and len(index) == 0
+
+
+def test_writes_during_a_load_are_replayed(vector_db, client, monkeypatch):
+    registry = LocalIndexRegistry(client, "wardrobe", verify_interval=60)
+    stale, fresh = str(uuid.uuid4()), str(uuid.uuid4())
+    client.upsert("wardrobe", [_point(stale, "top", 0)])
+    scroll = client.scroll
+
+    def scroll_then_write(*args, **kwargs):
+        # These writes land after the page was read, so only the hooks carry them
+        page = scroll(*args, **kwargs)
+        registry.on_upsert([{"id": fresh, "vector": np.ones(EMBEDDING_DIM), "payload": {"category": "top"}}])
+        registry.on_delete(stale)
+        return page
+    monkeypatch.setattr(client, "scroll", scroll_then_write)
+
+    assert _ids(registry.get()) == {fresh}
@@ -0,0 +1,42 @@
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import metrics
+
+
+SAMPLE = re.compile(r'^([a-z_]+)(\{([a-z_]+="(?:[^"\\]|\\.)*",?)*\})? (-?[0-9.e+-]+|\+Inf)$')
+
+
+def test_exposition_format(monkeypatch):
+    monkeypatch.setattr(metrics.registry, "enabled", True)
+    # Keep the test gauge out of the shared registry
+    monkeypatch.setattr(metrics.registry, "_metrics", list(metrics.registry._metrics))
+    metrics.register_gauges("closet_test_queue", "A test gauge", ("pool",), lambda: [({"pool": 'a"b'}, 3)])
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        with metrics.stage("retrieve", "wardrobe"):
+            return {"id": item_id}
+
+    client = TestClient(app)
+    for item_id in ("a", "b"):
+        assert client.get(f"/items/{item_id}").status_code == 200
+
+    text = metrics.render()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    for line in lines:
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE.match(line), line
+
+    # Stages are labelled with the route template, not the raw path
+    stage_labels = 'stage="retrieve",route="/items/{item_id}",collection="wardrobe"'
+    buckets = [line for line in lines if line.startswith(f"closet_stage_duration_seconds_bucket{{{stage_labels}")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and buckets[-1].startswith(f'closet_stage_duration_seconds_bucket{{{stage_labels},le="+Inf"}}')
+    assert f"closet_stage_duration_seconds_count{{{stage_labels}}} 2" in lines
+    assert "# TYPE closet_stage_duration_seconds histogram" in lines
+    assert 'closet_test_queue{pool="a\\"b"} 3.0' in lines
@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.async_vector_db import AsyncVectorDatabase
+from app.services.outfit_generation import generate_outfit_async, generate_outfits_batch_async
+
+from tests.conftest import EMBEDDING_DIM
+
+
+class _TextEmbeddings(AsyncVectorDatabase):
+    """Deterministic text embeddings, so no text model is needed"""
+
+    async def embed_text(self, text):
+        return np.random.default_rng(sum(text.encode())).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+    async def embed_texts(self, texts):
+        return np.stack([await self.embed_text(text) for text in texts])
+
+
+def test_batch_matches_one_call_per_query():
+    rng = np.random.default_rng(0)
+    points = [
+        PointStruct(id=str(uuid.uuid4()), vector=rng.standard_normal(EMBEDDING_DIM).tolist(),
+                    payload={"name": f"item-{i}", "category": category, "tags": []})
+        for i, category in enumerate(["top", "bottom", "shoes"] * 8)
+    ]
+    queries = ["beach day", "office", "beach day", "night out"]
+    options = {"limit": 4, "candidate_pool": 5, "categories": ["top", "bottom", "shoes"], "category_limits": {"shoes": 3}}
+
+    async def scenario():
+        client = AsyncQdrantClient(":memory:")
+        await client.create_collection("wardrobe", vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+        await client.upsert("wardrobe", points)
+        db = _TextEmbeddings(client, "wardrobe", model=None, processor=None)
+        batched = await generate_outfits_batch_async(queries, db, **options)
+        single = {query: await generate_outfit_async(query, db, **options) for query in queries}
+        await client.close()
+        return batched, single
+
+    batched, single = asyncio.run(scenario())
+
+    # Repeated queries are answered once
+    assert list(batched) == ["beach day", "office", "night out"]
+    for query, outfits in batched.items():
+        expected = single[query]
+        assert [[item.id for item in outfit.items.values()] for outfit in outfits] == \
+            [[item.id for item in outfit.items.values()] for outfit in expected]
+        assert np.allclose([outfit.score for outfit in outfits], [outfit.score for outfit in expected])
@@ -0,0 +1,38 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.outfit_routes import _validate_outfit_request
+from app.models.schemas import BatchOutfitRequest, OutfitRequest
+from app.services.outfit_generation import MAX_CANDIDATE_POOL, MAX_OUTFIT_LIMIT
+from app.services.outfit_search import MAX_BEAM_WIDTH
+
+
+@pytest.mark.parametrize("fields", [
+    {"limit": None},
+    {"limit": 0},
+    {"limit": MAX_OUTFIT_LIMIT + 1},
+    {"candidate_pool": 0},
+    {"candidate_pool": MAX_CANDIDATE_POOL + 1},
+    {"category_limits": {"shoes": MAX_CANDIDATE_POOL + 1}},
+    {"category_limits": {"top": 0}},
+    {"beam_width": 0},
+    {"beam_width": MAX_BEAM_WIDTH + 1},
+    {"diversity": 1.5},
+    {"max_item_reuse": 0},
+])
+@pytest.mark.parametrize("make_request", [
+    lambda fields: OutfitRequest(query="summer", **fields),
+    lambda fields: BatchOutfitRequest(queries=["summer"], **fields),
+])
+def test_rejects_out_of_range_parameters(make_request, fields):
+    with pytest.raises(HTTPException) as raised:
+        _validate_outfit_request(make_request(fields))
+    assert raised.value.status_code == 400
+
+
+def test_accepts_bounds():
+    _validate_outfit_request(OutfitRequest(
+        query="summer", limit=MAX_OUTFIT_LIMIT, candidate_pool=MAX_CANDIDATE_POOL,
+        category_limits={"shoes": 1}, beam_width=MAX_BEAM_WIDTH, diversity=0, max_item_reuse=1
+    ))
+    _validate_outfit_request(OutfitRequest(query="summer"))
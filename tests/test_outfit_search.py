@@ -0,0 +1,105 @@
+import itertools
+
+import numpy as np
+
+from app.services.outfit_generation import _candidate_pools, _score_outfits
+from app.services.outfit_search import beam_search_outfits
+from app.utils.vector_ops import normalize_rows
+
+
+class _Point:
+    def __init__(self, point_id, vector, category):
+        self.id = point_id
+        self.vector = vector
+        self.payload = {"name": point_id, "category": category, "tags": []}
+
+
+def _candidates(seed=0, dim=8, per_category=6):
+    rng = np.random.default_rng(seed)
+    return [
+        [_Point(f"{category}-{i}", rng.standard_normal(dim).tolist(), category) for i in range(per_category)]
+        for category in ("top", "bottom")
+    ]
+
+
+def test_outfits_are_in_score_order_by_default():
+    candidates = _candidates()
+    query = normalize_rows(np.random.default_rng(1).standard_normal(8).astype(np.float32))
+
+    outfits = _score_outfits(query, ["top", "bottom"], candidates, "summer", limit=5)
+
+    scores = [outfit.score for outfit in outfits]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_reuse_cap_reranks_on_request():
+    candidates = _candidates()
+    query = normalize_rows(np.random.default_rng(1).standard_normal(8).astype(np.float32))
+
+    outfits = _score_outfits(query, ["top", "bottom"], candidates, "summer", limit=5, max_item_reuse=1)
+
+    tops = [outfit.items["top"].id for outfit in outfits]
+    assert len(tops) == len(set(tops))
+
+
+def _cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_pair_scores_match_the_pairwise_loop():
+    candidates = _candidates()
+    query = np.random.default_rng(1).standard_normal(8)
+    tops, bottoms = candidates
+
+    outfits = _score_outfits(query, ["top", "bottom"], candidates, "summer", limit=len(tops) * len(bottoms))
+
+    # The per-pair loop the matrix scoring replaced
+    expected = sorted((
+        (0.5 * (_cosine(query, top.vector) + _cosine(query, bottom.vector)) / 2 + 0.5 * _cosine(top.vector, bottom.vector),
+         top.id, bottom.id)
+        for top in tops for bottom in bottoms
+    ), reverse=True)
+    actual = [(outfit.score, outfit.top.id, outfit.bottom.id) for outfit in outfits]
+    assert [ids for _, *ids in actual] == [ids for _, *ids in expected]
+    assert np.allclose([score for score, *_ in actual], [score for score, *_ in expected], atol=1e-5)
+
+
+def test_candidate_pool_is_independent_of_limit():
+    assert _candidate_pools(["top", "bottom"], 3, 200, {"bottom": 50}) == [200, 50]
+    # Never fewer candidates than outfits asked for
+    assert _candidate_pools(["top", "bottom"], 10, 4, None) == [10, 10]
+
+
+def _exhaustive(matrices, relevance, limit, relevance_weight=0.5):
+    k = len(matrices)
+    pairs = k * (k - 1) // 2
+    scored = []
+    for combo in itertools.product(*(range(len(matrix)) for matrix in matrices)):
+        vectors = [matrix[index] for matrix, index in zip(matrices, combo)]
+        coherence = sum(float(a @ b) for a, b in itertools.combinations(vectors, 2))
+        score = relevance_weight * np.mean([relevance[i][index] for i, index in enumerate(combo)])
+        score += (1 - relevance_weight) * coherence / pairs
+        scored.append((score, combo))
+    scored.sort(key=lambda entry: -entry[0])
+    return scored[:limit]
+
+
+def test_beam_search_matches_exhaustive_search():
+    rng = np.random.default_rng(5)
+    query = normalize_rows(rng.standard_normal(8).astype(np.float32))
+    for sizes in ((5, 4), (4, 3, 5), (3, 3, 3, 2)):
+        matrices = [normalize_rows(rng.standard_normal((size, 8)).astype(np.float32)) for size in sizes]
+        relevance = [matrix @ query for matrix in matrices]
+
+        # A beam as wide as every partial outfit can't drop the winners
+        scores, combos = beam_search_outfits(matrices, relevance, limit=6, beam_width=int(np.prod(sizes)))
+
+        expected = _exhaustive(matrices, relevance, 6)
+        assert [tuple(combo) for combo in combos] == [combo for _, combo in expected]
+        assert np.allclose(scores, [score for score, _ in expected], atol=1e-5)
+
+        # A pruned beam may miss outfits, but what it returns is scored exactly
+        scores, combos = beam_search_outfits(matrices, relevance, limit=3, beam_width=3)
+        exact = dict((combo, score) for score, combo in _exhaustive(matrices, relevance, int(np.prod(sizes))))
+        assert np.allclose(scores, [exact[tuple(combo)] for combo in combos], atol=1e-5)
+        assert scores[0] <= expected[0][0] + 1e-5
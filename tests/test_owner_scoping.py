@@ -0,0 +1,67 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.listing import thumbnail_redirect
+from app.services.complete_the_look import complete_the_look
+
+from tests.conftest import jpeg_bytes
+
+
+@pytest.fixture
+def item(vector_db):
+    point_id = str(uuid.uuid4())
+    payload = {"name": "shirt", "category": "top", "owner_id": "alice", "thumbnails": {"256": "/static/shirt-256.webp"}}
+    assert vector_db.upload_batch([jpeg_bytes(0)], [payload], [point_id]) == [None]
+    return point_id
+
+
+def test_delete_only_matches_the_owner(vector_db, client, item):
+    assert vector_db.delete_clothing(item, owner_id="bob") is False
+    assert client.retrieve("wardrobe", ids=[item])
+
+    assert vector_db.delete_clothing(item, owner_id="alice") is True
+    assert client.retrieve("wardrobe", ids=[item]) == []
+    assert vector_db.delete_clothing(item, owner_id="alice") is False
+
+
+def test_thumbnail_is_owner_scoped(vector_db, item, executor):
+    def redirect(owner_id):
+        return asyncio.run(thumbnail_redirect(vector_db, executor, executor, "wardrobe", item, 256, owner_id))
+
+    with pytest.raises(HTTPException) as raised:
+        redirect("bob")
+    assert raised.value.status_code == 404
+    assert redirect("alice").headers["location"] == "/static/shirt-256.webp"
+
+
+class _Collection:
+    """Records which lookups and searches complete_the_look makes"""
+
+    def __init__(self, points):
+        self.points = points
+        self.calls = []
+
+    async def get_items_by_id(self, item_id, owner_id=None):
+        self.calls.append(("get", owner_id))
+        return self.points.get(item_id)
+
+    async def get_items_by_category(self, category, vector, limit=5, owner_id=None):
+        self.calls.append(("search", owner_id))
+        return []
+
+
+def test_complete_the_look_skips_the_wardrobe_without_an_owner():
+    source = type("Point", (), {"id": "coat", "vector": [1.0], "payload": {"category": "top"}})()
+    wardrobe, marketplace = _Collection({"shirt": source}), _Collection({"coat": source})
+
+    assert asyncio.run(complete_the_look(wardrobe, marketplace, "shirt")) is None
+    result = asyncio.run(complete_the_look(wardrobe, marketplace, "coat"))
+
+    assert result["source"] == "marketplace" and wardrobe.calls == []
+    assert marketplace.calls == [("get", None), ("get", None), ("search", None)]
+
+    asyncio.run(complete_the_look(wardrobe, marketplace, "coat", owner_id="alice"))
+    assert wardrobe.calls == [("get", "alice"), ("search", "alice")]
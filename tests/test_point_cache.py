@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+
+from app.services.point_cache import PointCache
+
+from tests.conftest import jpeg_bytes
+
+
+@pytest.fixture
+def cached_db(vector_db):
+    vector_db.point_cache = PointCache(max_entries=100, ttl=60)
+    return vector_db
+
+
+def _upload(db, seed=0, **payload):
+    point_id = str(uuid.uuid4())
+    assert db.upload_batch([jpeg_bytes(seed)], [{"name": "shirt", "category": "top", **payload}], [point_id]) == [None]
+    return point_id
+
+
+def test_repeated_lookups_are_served_from_the_cache(cached_db, client, monkeypatch):
+    point_id = _upload(cached_db)
+    assert cached_db.get_items_by_id(point_id) is not None
+
+    def unavailable(*args, **kwargs):
+        raise AssertionError("went to Qdrant")
+    monkeypatch.setattr(client, "retrieve", unavailable)
+
+    # Any spelling of the UUID hits the same entry
+    assert cached_db.get_items_by_id(point_id.upper()).payload["name"] == "shirt"
+    assert cached_db.point_cache.stats()["hits"] == 1
+
+
+def test_writes_invalidate_cached_points(cached_db):
+    point_id = _upload(cached_db)
+    cached_db.get_items_by_id(point_id)
+
+    cached_db.update_payload(point_id, {"name": "blouse"})
+    assert cached_db.get_items_by_id(point_id).payload["name"] == "blouse"
+
+    cached_db.update_payloads({point_id: {"name": "tee"}})
+    assert cached_db.get_items_by_id(point_id).payload["name"] == "tee"
+
+    cached_db.upload_batch([jpeg_bytes(1)], [{"name": "polo", "category": "top"}], [point_id])
+    assert cached_db.get_items_by_id(point_id).payload["name"] == "polo"
+
+    assert cached_db.delete_clothing(point_id)
+    assert cached_db.get_items_by_id(point_id) is None
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.point_cache.time.monotonic", lambda: now[0])
+    cache = PointCache(max_entries=1, ttl=10)
+    point = type("Point", (), {"id": 1})()
+
+    cache.put(point)
+    assert cache.get("1") is point
+    now[0] += 11
+    assert cache.get(1) is None
+
+    cache.put(point)
+    cache.put(type("Point", (), {"id": 2})())
+    # Bounded by max_entries, least recently used first
+    assert cache.get(1) is None and cache.get(2) is not None
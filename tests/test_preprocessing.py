@@ -0,0 +1,44 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.utils.preprocessing import decode_image, preprocess_image, preprocess_images
+
+from tests.conftest import jpeg_bytes
+
+
+def _reference_pixels(processor, images):
+    decoded = [ImageOps.exif_transpose(Image.open(BytesIO(data))).convert("RGB") for data in images]
+    return processor(images=decoded, return_tensors="np")["pixel_values"]
+
+
+def test_fast_path_matches_processor(processor):
+    # Large enough for draft mode to halve the decode, plus portrait and tiny images
+    images = [jpeg_bytes(0, (1024, 768)), jpeg_bytes(1, (300, 500)), jpeg_bytes(2, (160, 120))]
+
+    fast = preprocess_images(images, processor)
+    reference = _reference_pixels(processor, images)
+
+    assert fast.shape == reference.shape
+    assert fast.dtype == np.float32
+    # Draft decoding and Pillow vs HF resizing differ slightly per pixel, not in aggregate
+    assert np.abs(fast - reference).mean() < 0.05
+    for actual, expected in zip(fast.reshape(len(images), -1), reference.reshape(len(images), -1)):
+        cosine = actual @ expected / (np.linalg.norm(actual) * np.linalg.norm(expected))
+        assert cosine > 0.99
+
+
+def test_processor_fallback_decodes_jpeg(processor):
+    class OpaqueProcessor:
+        """A processor the fast path doesn't recognise"""
+        def __call__(self, **kwargs):
+            return processor(**kwargs)
+
+    pixels = preprocess_image(jpeg_bytes(3), OpaqueProcessor())
+
+    assert pixels.shape == (3, 224, 224)
+
+
+def test_decode_without_min_size_keeps_full_resolution():
+    assert decode_image(jpeg_bytes(4, (640, 480)), 0).size == (640, 480)
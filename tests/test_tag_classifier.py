@@ -0,0 +1,36 @@
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from tests.conftest import EMBEDDING_DIM
+
+
+def _brute_force(client, embedding, k):
+    points, _ = client.scroll("tags", limit=100, with_payload=True, with_vectors=True)
+    vectors = np.asarray([point.vector for point in points], dtype=np.float64)
+    scores = vectors @ embedding / np.linalg.norm(vectors, axis=1)
+    return [points[i].payload["tag"] for i in np.argsort(-scores)[:k]]
+
+
+def test_top_k_matches_brute_force_dot_product(tag_classifier, client):
+    embeddings = np.random.default_rng(2).standard_normal((20, EMBEDDING_DIM)).astype(np.float32)
+
+    tags = tag_classifier.tag_batch(embeddings)
+
+    assert tags == [_brute_force(client, embedding, 3) for embedding in embeddings]
+    assert tag_classifier.tag(embeddings[0]) == tags[0]
+
+
+def test_top_k_matches_qdrant_query(tag_classifier, client):
+    embedding = np.random.default_rng(3).standard_normal(EMBEDDING_DIM)
+
+    response = client.query_points("tags", query=embedding.tolist(), limit=3, with_payload=True)
+
+    assert tag_classifier.tag(embedding) == [point.payload["tag"] for point in response.points]
+
+
+def test_refresh_swaps_in_the_new_vocabulary(tag_classifier, client):
+    embedding = np.random.default_rng(4).standard_normal(EMBEDDING_DIM)
+    client.upsert("tags", [PointStruct(id=100, vector=embedding.tolist(), payload={"tag": "exact"})])
+
+    assert tag_classifier.refresh() == 9
+    assert tag_classifier.tag(embedding, k=1) == ["exact"]
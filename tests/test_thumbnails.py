@@ -0,0 +1,51 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.utils.static_files import CachedStaticFiles
+from app.utils.thumbnails import DERIVATIVES_DIR, generate_derivatives, pick_thumbnail
+
+from tests.conftest import jpeg_bytes
+
+
+def _static_client(directory):
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=str(directory), max_age=600))
+    return TestClient(app)
+
+
+def test_derivatives_are_cached_as_immutable(tmp_path):
+    (tmp_path / "derivatives").mkdir()
+    (tmp_path / "derivatives" / "abc-256.webp").write_bytes(b"derivative")
+    (tmp_path / "original.jpg").write_bytes(b"original")
+    client = _static_client(tmp_path)
+
+    derivative = client.get("/static/derivatives/abc-256.webp")
+    original = client.get("/static/original.jpg")
+
+    assert derivative.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert original.headers["Cache-Control"] == "public, max-age=600"
+
+    revalidated = client.get("/static/original.jpg", headers={"If-None-Match": original.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["Cache-Control"] == "public, max-age=600"
+    assert "Cache-Control" not in client.get("/static/missing.jpg").headers
+
+
+def test_generates_each_width_once_without_upscaling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = jpeg_bytes(0, (640, 480))
+
+    urls = generate_derivatives(data, "f" * 64, "wardrobe", widths=(256, 512, 1024), fmt="jpeg")
+
+    assert sorted(urls) == ["256", "512"]
+    directory = os.path.join(DERIVATIVES_DIR, "wardrobe")
+    assert sorted(os.listdir(directory)) == [f"{'f' * 24}-256.jpg", f"{'f' * 24}-512.jpg"]
+    assert Image.open(os.path.join(directory, f"{'f' * 24}-256.jpg")).size == (256, 192)
+    assert pick_thumbnail(urls, 300) == urls["512"]
+
+    mtime = os.path.getmtime(os.path.join(directory, f"{'f' * 24}-256.jpg"))
+    assert generate_derivatives(data, "f" * 64, "wardrobe", widths=(256,), fmt="jpeg") == {"256": urls["256"]}
+    assert os.path.getmtime(os.path.join(directory, f"{'f' * 24}-256.jpg")) == mtime
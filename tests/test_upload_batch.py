@@ -0,0 +1,79 @@
+import uuid
+from io import BytesIO
+
+from PIL import Image
+
+from tests.conftest import jpeg_bytes
+
+
+def _rotated_jpeg(seed: int) -> bytes:
+    # Large enough for draft-mode decoding to kick in, and stored sideways with an EXIF rotation
+    image = Image.open(BytesIO(jpeg_bytes(seed, (1600, 1200))))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def test_upload_batch_stores_perceptual_hash(vector_db, client):
+    images = [_rotated_jpeg(seed) for seed in range(3)]
+    point_ids = [str(uuid.uuid4()) for _ in images]
+    payloads = [{"name": f"item-{i}", "category": "top", "owner_id": "alice"} for i in range(len(images))]
+
+    errors = vector_db.upload_batch(images, payloads, point_ids)
+
+    assert errors == [None, None, None]
+    points = client.retrieve("wardrobe", ids=point_ids, with_payload=True)
+    hashes = {str(point.id): point.payload["perceptual_hash"] for point in points}
+    for point_id, image in zip(point_ids, images):
+        # The single-upload path must store the same hash for the same image
+        single_id = str(uuid.uuid4())
+        vector_db.upload_clothing(image, "item", "top", single_id)
+        [single] = client.retrieve("wardrobe", ids=[single_id], with_payload=True)
+        assert hashes[point_id] == single.payload["perceptual_hash"]
+
+
+def test_upload_batch_isolates_undecodable_images(vector_db, client):
+    images = [jpeg_bytes(0), b"not an image", jpeg_bytes(1)]
+    point_ids = [str(uuid.uuid4()) for _ in images]
+    payloads = [{"name": f"item-{i}", "category": "top"} for i in range(len(images))]
+
+    errors = vector_db.upload_batch(images, payloads, point_ids)
+
+    assert errors[0] is None and errors[2] is None
+    assert errors[1].startswith("Could not decode image")
+    stored = {str(point.id) for point in client.retrieve("wardrobe", ids=point_ids)}
+    assert stored == {point_ids[0], point_ids[2]}
+
+
+def test_single_upload_only_queries_qdrant_for_reuse_existing(vector_db, monkeypatch):
+    lookups = []
+    find_by_content_hash = vector_db.find_by_content_hash
+    monkeypatch.setattr(vector_db, "find_by_content_hash", lambda *args, **kwargs: lookups.append(args) or find_by_content_hash(*args, **kwargs))
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+
+    vector_db.upload_clothing(jpeg_bytes(0), "shirt", "top", first)
+    assert lookups == []
+
+    assert vector_db.upload_clothing(jpeg_bytes(0), "shirt", "top", second, reuse_existing=True) == first
+    assert len(lookups) == 1
+
+
+def test_upload_batch_embeds_identical_images_once(vector_db, client, monkeypatch):
+    embedded = []
+    embed_images = vector_db.embed_images
+    monkeypatch.setattr(vector_db, "embed_images", lambda pixels: embedded.append(len(pixels)) or embed_images(pixels))
+    images = [jpeg_bytes(0), jpeg_bytes(1), jpeg_bytes(0), b"not an image", b"not an image"]
+    point_ids = [str(uuid.uuid4()) for _ in images]
+    payloads = [{"name": f"item-{i}", "category": "top"} for i in range(len(images))]
+
+    errors = vector_db.upload_batch(images, payloads, point_ids)
+
+    assert embedded == [2]
+    assert errors[:3] == [None, None, None]
+    assert errors[3].startswith("Could not decode image") and errors[4] == errors[3]
+    points = {str(point.id): point for point in client.retrieve("wardrobe", ids=point_ids[:3], with_payload=True, with_vectors=True)}
+    first, copy = points[point_ids[0]], points[point_ids[2]]
+    assert first.vector == copy.vector and first.payload["perceptual_hash"] == copy.payload["perceptual_hash"]
+    assert copy.payload["name"] == "item-2"
@@ -0,0 +1,71 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.api.uploads import enqueue_upload, upload_status
+from app.services.database import QUEUED, JobQueue
+
+from tests.conftest import jpeg_bytes
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # Uploads are stored relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def _upload(seed=0):
+    return UploadFile(file=io.BytesIO(jpeg_bytes(seed)), filename="item.jpg")
+
+
+def test_marketplace_upload_is_queued(queue, executor):
+    fields = {"name": "coat", "category": "outerwear", "price": 120, "store": "acme"}
+
+    response = asyncio.run(enqueue_upload(queue, executor, "marketplace", _upload(), fields, idempotency_key="k"))
+
+    assert response["status"] == QUEUED
+    assert response["status_url"] == f"/api/marketplace/upload-status/{response['id']}"
+    job = queue.get(response["id"])
+    assert job.collection == "marketplace"
+    assert {key: job.payload[key] for key in fields} == fields
+    assert os.path.exists(job.payload["image_path"])
+
+    # Same key, same job; the second copy of the image isn't kept
+    again = asyncio.run(enqueue_upload(queue, executor, "marketplace", _upload(1), fields, idempotency_key="k"))
+    assert again["id"] == response["id"]
+    assert len(os.listdir("app/static/images-qdrant/marketplace")) == 1
+
+
+def test_status_is_scoped_to_collection_and_owner(queue, executor):
+    response = asyncio.run(enqueue_upload(
+        queue, executor, "wardrobe", _upload(), {"name": "shirt", "category": "top"}, owner_id="alice"
+    ))
+
+    assert asyncio.run(upload_status(queue, executor, "wardrobe", response["id"], "alice"))["id"] == response["id"]
+    for collection, owner_id in (("wardrobe", "bob"), ("marketplace", None)):
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(upload_status(queue, executor, collection, response["id"], owner_id))
+        assert raised.value.status_code == 404
+
+
+def test_invalid_category_is_rejected_before_storing(queue, executor):
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(enqueue_upload(queue, executor, "wardrobe", _upload(), {"name": "hat", "category": "hats"}))
+
+    assert raised.value.status_code == 400
+    assert not os.path.exists("app/static/images-qdrant/wardrobe")
+
+
+def test_failed_enqueue_removes_stored_image(queue, executor, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError("database is locked")
+    monkeypatch.setattr(queue, "enqueue", unavailable)
+
+    with pytest.raises(OSError):
+        asyncio.run(enqueue_upload(queue, executor, "wardrobe", _upload(), {"name": "shirt", "category": "top"}))
+
+    assert os.listdir("app/static/images-qdrant/wardrobe") == []